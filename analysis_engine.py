@@ -1,12 +1,17 @@
 import pandas as pd
+import numpy as np
 import os
 import re
+import sys
 import logging
+import signal
 import warnings
+import threading
+import time
 from collections import defaultdict
 from datetime import datetime
 from multiprocessing import Pool, cpu_count
-from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
 import itertools
 
 from rapidfuzz import fuzz
@@ -23,12 +28,53 @@ from openpyxl.drawing.line import LineProperties
 
 from typing import Dict, Any
 
+try:
+    import psutil  # optional: more accurate free-memory readings
+except ImportError:
+    psutil = None
+
 import config
 import excel_converter
+from run_state import lineage_id, record_keys, frame_fingerprint, matching_fingerprint, analysis_input_hash, master_cluster_fingerprint, reference_frame_key
 from config import THEME_COLORS, PROVINCE_PROFILES
 
 INTENDED_COLS = ["First Name", "Middle Name", "Last Name", "Suffix", "Birthdate", "City", "Sex", "Contact Number"]
 
+# How often long-running loops look at the cancel flag, and how many rows/pairs they process between checks
+CANCEL_POLL_SECONDS = 0.2
+CANCEL_CHECK_EVERY = 2048
+
+class AnalysisCancelled(Exception):
+    """Raised inside the engine once the user has cancelled a running analysis."""
+    pass
+
+class CancellationToken:
+    """Thread-safe cancel flag shared between the GUI thread and a running AnalysisEngine."""
+    def __init__(self):
+        self._event = threading.Event()
+        self.requested_at = None
+
+    def cancel(self):
+        if not self._event.is_set():
+            self.requested_at = time.perf_counter()
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise AnalysisCancelled()
+
+    def seconds_since_request(self):
+        """Cancellation latency: time elapsed since cancel() was called, or None if it never was."""
+        return None if self.requested_at is None else time.perf_counter() - self.requested_at
+
+def _raise_if_cancelled(cancel_token):
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
 def get_automatic_output_path(user_filepath, province_name, is_pdf):
     output_dir = os.path.dirname(user_filepath)
     base_name = os.path.splitext(os.path.basename(user_filepath))[0]
@@ -309,25 +355,22 @@ def compare_records_lenient_adaptive(rec1: Dict[str, Any], rec2: Dict[str, Any])
     score = _calculate_adaptive_match_confidence(rec1, rec2)
     return "Fuzzy Match" if score > 95 else "No Match"
 
-def compare_records_strict_configurable(rec1: Dict[str, Any], rec2: Dict[str, Any]) -> bool:
-    """
-    Compare two records using strict configurable thresholds.
-    
-    Args:
-        rec1: First record to compare as a dictionary with string keys
-        rec2: Second record to compare as a dictionary with string keys
-    
-    Returns:
-        bool: True if records match according to strict criteria, False otherwise
+def _configurable_score(rec1: Dict[str, Any], rec2: Dict[str, Any], tier: str):
+    """Score a pair and return (score, threshold) for the "strict", "standard" or "lenient" tier.
+
+    Uses the enhanced adaptive algorithm when adaptive mode is enabled, and applies the tier's
+    threshold adjustment only for name-only pairs (no birthdate, sex or city on both sides).
     """
-    # Use enhanced adaptive algorithm when adaptive mode is enabled
     if config.ADAPTIVE_MATCHING_CONFIG["enable_adaptive_mode"]:
         score = _calculate_adaptive_match_confidence(rec1, rec2)
     else:
         score = _calculate_match_confidence_optimized(rec1, rec2)
-    
-    # Use baseline threshold by default
-    threshold = config.ADAPTIVE_MATCHING_CONFIG["baseline_thresholds"]["strict_threshold"]  # Original 198
+    return score, _configurable_threshold(rec1, rec2, tier)
+
+def _configurable_threshold(rec1: Dict[str, Any], rec2: Dict[str, Any], tier: str):
+    """Threshold of the tier for this pair; the score itself does not depend on the tier."""
+    # Use baseline threshold by default (strict 198, standard 110, lenient 95)
+    threshold = config.ADAPTIVE_MATCHING_CONFIG["baseline_thresholds"][f"{tier}_threshold"]
     
     # Apply adjustment only when adaptive mode is enabled AND no discriminating fields
     if config.ADAPTIVE_MATCHING_CONFIG["enable_adaptive_mode"]:
@@ -340,9 +383,36 @@ def compare_records_strict_configurable(rec1: Dict[str, Any], rec2: Dict[str, An
         
         # Only adjust threshold for name-only matching (no birthdate, sex, or city)
         if not (has_birthdate_raw or has_birthdate_processed or has_sex or has_city):
-            adjustment = config.ADAPTIVE_MATCHING_CONFIG["threshold_adjustments"]["strict_adjustment"]
-            threshold = threshold + adjustment  # 198 + adjustment
+            threshold = threshold + config.ADAPTIVE_MATCHING_CONFIG["threshold_adjustments"][f"{tier}_adjustment"]
+    
+    return threshold
+
+def tier_thresholds(tier, name_only, matching=None):
+    """_configurable_threshold for many pairs at once, from their name-only flags (matching: ADAPTIVE_MATCHING_CONFIG layout)."""
+    matching = matching or config.ADAPTIVE_MATCHING_CONFIG
+    threshold = matching["baseline_thresholds"][f"{tier}_threshold"]
+    if not matching["enable_adaptive_mode"]:
+        return np.full(len(name_only), threshold, dtype=np.float64)
+    return np.where(name_only, threshold + matching["threshold_adjustments"][f"{tier}_adjustment"], threshold).astype(np.float64)
+
+def _discriminating_fields(df):
+    """Per record, whether each field that cancels the name-only adjustment is filled (as _configurable_threshold reads it)."""
+    filled = lambda col: df[col].astype(str).str.strip().ne("") if col in df.columns else pd.Series(False, index=df.index)
+    return pd.DataFrame({"birthdate": filled("Birthdate"), "birthdate_std": df["_opt_bdate_std"].map(bool),
+                         "sex": filled("Sex"), "city": filled("City")}, index=df.index)
+
+def compare_records_strict_configurable(rec1: Dict[str, Any], rec2: Dict[str, Any]) -> str:
+    """
+    Compare two records using strict configurable thresholds.
+    
+    Args:
+        rec1: First record to compare as a dictionary with string keys
+        rec2: Second record to compare as a dictionary with string keys
     
+    Returns:
+        str: "Exact Match" if score > threshold, otherwise "No Match"
+    """
+    score, threshold = _configurable_score(rec1, rec2, "strict")
     return "Exact Match" if score > threshold else "No Match"
 
 def compare_records_standard_configurable(rec1: Dict[str, Any], rec2: Dict[str, Any]) -> str:
@@ -355,29 +425,7 @@ def compare_records_standard_configurable(rec1: Dict[str, Any], rec2: Dict[str,
     Returns:
         str: "Fuzzy Match" if score > threshold, otherwise "No Match"
     """
-    # Use enhanced adaptive algorithm when adaptive mode is enabled
-    if config.ADAPTIVE_MATCHING_CONFIG["enable_adaptive_mode"]:
-        score = _calculate_adaptive_match_confidence(rec1, rec2)
-    else:
-        score = _calculate_match_confidence_optimized(rec1, rec2)
-    
-    # Use baseline threshold by default
-    threshold = config.ADAPTIVE_MATCHING_CONFIG["baseline_thresholds"]["standard_threshold"]  # Your tuned 110
-    
-    # Apply adjustment only when adaptive mode is enabled AND no discriminating fields
-    if config.ADAPTIVE_MATCHING_CONFIG["enable_adaptive_mode"]:
-        has_birthdate_raw = bool(str(rec1.get("Birthdate", "")).strip() and str(rec2.get("Birthdate", "")).strip())
-        has_birthdate_processed = bool(rec1['_opt_bdate_std'] and rec2['_opt_bdate_std'])
-        has_sex = bool(str(rec1.get("Sex", "")).strip() and str(rec2.get("Sex", "")).strip())
-        
-        # Check if we have city data as additional discriminating field
-        has_city = bool(str(rec1.get("City", "")).strip() and str(rec2.get("City", "")).strip())
-        
-        # Only adjust threshold for name-only matching (no birthdate, sex, or city)
-        if not (has_birthdate_raw or has_birthdate_processed or has_sex or has_city):
-            adjustment = config.ADAPTIVE_MATCHING_CONFIG["threshold_adjustments"]["standard_adjustment"]
-            threshold = threshold + adjustment  # 110 + adjustment
-    
+    score, threshold = _configurable_score(rec1, rec2, "standard")
     return "Fuzzy Match" if score > threshold else "No Match"
 
 def compare_records_lenient_configurable(rec1: Dict[str, Any], rec2: Dict[str, Any]) -> str:
@@ -390,31 +438,30 @@ def compare_records_lenient_configurable(rec1: Dict[str, Any], rec2: Dict[str, A
     Returns:
         str: "Fuzzy Match" if score > threshold, otherwise "No Match"
     """
-    # Use enhanced adaptive algorithm when adaptive mode is enabled
-    if config.ADAPTIVE_MATCHING_CONFIG["enable_adaptive_mode"]:
-        score = _calculate_adaptive_match_confidence(rec1, rec2)
-    else:
-        score = _calculate_match_confidence_optimized(rec1, rec2)
-    
-    # Use baseline threshold by default
-    threshold = config.ADAPTIVE_MATCHING_CONFIG["baseline_thresholds"]["lenient_threshold"]  # Original 95
-    
-    # Apply adjustment only when adaptive mode is enabled AND no discriminating fields
-    if config.ADAPTIVE_MATCHING_CONFIG["enable_adaptive_mode"]:
-        has_birthdate_raw = bool(str(rec1.get("Birthdate", "")).strip() and str(rec2.get("Birthdate", "")).strip())
-        has_birthdate_processed = bool(rec1['_opt_bdate_std'] and rec2['_opt_bdate_std'])
-        has_sex = bool(str(rec1.get("Sex", "")).strip() and str(rec2.get("Sex", "")).strip())
-        
-        # Check if we have city data as additional discriminating field
-        has_city = bool(str(rec1.get("City", "")).strip() and str(rec2.get("City", "")).strip())
-        
-        # Only adjust threshold for name-only matching (no birthdate, sex, or city)
-        if not (has_birthdate_raw or has_birthdate_processed or has_sex or has_city):
-            adjustment = config.ADAPTIVE_MATCHING_CONFIG["threshold_adjustments"]["lenient_adjustment"]
-            threshold = threshold + adjustment  # 95 + adjustment
-    
+    score, threshold = _configurable_score(rec1, rec2, "lenient")
     return "Fuzzy Match" if score > threshold else "No Match"
 
+# Tier and match status of each configurable pass, so workers can keep the score alongside the status
+CONFIGURABLE_TIERS = {
+    compare_records_strict_configurable: ("strict", "Exact Match"),
+    compare_records_standard_configurable: ("standard", "Fuzzy Match"),
+    compare_records_lenient_configurable: ("lenient", "Fuzzy Match")
+}
+
+# Compact edge encoding returned by workers: row indices, status code and confidence score
+MATCH_STATUS_CODES = {"No Match": 0, "Exact Match": 1, "Fuzzy Match": 2}
+MATCH_STATUS_NAMES = {code: name for name, code in MATCH_STATUS_CODES.items()}
+# Edges kept between incremental runs: a/b are row positions in the stored file (b is the master/official index for those pair types)
+RUN_STATE_EDGE_DTYPE = np.dtype([("a", np.int64), ("b", np.int64), ("status", np.int8), ("score", np.float32)])
+MATCH_EDGE_DTYPE = np.dtype([("i", np.int64), ("j", np.int64), ("status", np.int8), ("score", np.float32)])
+
+# Passes run per pair type, strictest first; a pair matched by one pass is not re-scored by the next
+PASS_PIPELINE = {
+    'user_official': [compare_records_strict_configurable, compare_records_standard_configurable, compare_records_lenient_configurable],
+    'user_master': [compare_records_strict_configurable, compare_records_standard_configurable],
+    'user_user': [compare_records_strict_configurable, compare_records_standard_configurable]
+}
+
 def _get_blocking_keys_optimized(rec):
     keys = set()
     fname_exp, lname, bdate = rec['_opt_fname_exp'], rec['_opt_lname_raw'], rec['_opt_bdate_std']
@@ -427,53 +474,761 @@ def _get_blocking_keys_optimized(rec):
     for formal_name in rec['_opt_nickname_set']: keys.add(f"FL_{formal_name.upper().replace(' ', '')}_{lname.upper().replace(' ', '')}")
     return keys
 
-def _generate_pairs_from_blocks(df):
-    candidate_pairs, inverted_index = set(), defaultdict(list)
-    for i, rec_dict in df.iterrows():
-        for key in _get_blocking_keys_optimized(rec_dict): inverted_index[key].append(i)
-    for indices in inverted_index.values():
+def _row_blocking_keys(df, cancel_token=None):
+    """Blocking keys of every row, as {row index: set of keys}."""
+    row_keys = {}
+    for n, (i, rec_dict) in enumerate(df.iterrows()):
+        if n % CANCEL_CHECK_EVERY == 0: _raise_if_cancelled(cancel_token)
+        row_keys[i] = _get_blocking_keys_optimized(rec_dict)
+    return row_keys
+
+def _build_inverted_index(df, cancel_token=None, key_filter=None, row_keys=None):
+    """Map blocking key -> row indices; key_filter (if given) keeps only the keys this caller owns.
+
+    row_keys (from _row_blocking_keys, possibly reused from an earlier run) skips re-deriving the keys.
+    """
+    if row_keys is None: row_keys = _row_blocking_keys(df, cancel_token)
+    inverted_index = defaultdict(list)
+    for i in df.index:
+        for key in row_keys[i]:
+            if key_filter is None or key_filter(key): inverted_index[key].append(i)
+    return inverted_index
+
+# Weight of one shared blocking key when candidate pairs are ranked for a time budget: agreeing on the exact
+# first and last name, or on last name and birthdate, is stronger evidence than a phonetic key
+_BLOCKING_KEY_WEIGHTS = {"FL": 3, "LN": 3, "SOUNDEX": 1, "SORTED": 1}
+
+def _blocking_key_weight(key):
+    return _BLOCKING_KEY_WEIGHTS.get(key.split('_', 1)[0], 1)
+
+def _generate_pairs_from_blocks(df, cancel_token=None, key_filter=None, row_keys=None, focus=None, evidence=None):
+    """Candidate (i, j) pairs with i < j; with focus, only pairs that involve at least one focus row.
+
+    evidence (a defaultdict(int)), if given, receives the summed blocking-key weight of every pair.
+    """
+    candidate_pairs, inverted_index = set(), _build_inverted_index(df, cancel_token, key_filter, row_keys)
+    for n, (key, indices) in enumerate(inverted_index.items()):
+        if n % CANCEL_CHECK_EVERY == 0: _raise_if_cancelled(cancel_token)
         if len(indices) > 1:
-            for pair in itertools.combinations(sorted(indices), 2): candidate_pairs.add(pair)
+            if focus is None:
+                block_pairs = itertools.combinations(sorted(indices), 2)
+            else:
+                block_pairs = {(a, b) if a < b else (b, a) for a in indices if a in focus for b in indices if b != a}
+            if evidence is None:
+                candidate_pairs.update(block_pairs)
+                continue
+            weight = _blocking_key_weight(key)
+            for pair in block_pairs:
+                candidate_pairs.add(pair)
+                evidence[pair] += weight
     return list(candidate_pairs)
 
-def _generate_pairs_from_blocks_2_files(df1, df2):
-    candidate_pairs, inverted_index1, inverted_index2 = set(), defaultdict(list), defaultdict(list)
-    for i, rec_dict in df1.iterrows():
-        for key in _get_blocking_keys_optimized(rec_dict): inverted_index1[key].append(i)
-    for i, rec_dict in df2.iterrows():
-        for key in _get_blocking_keys_optimized(rec_dict): inverted_index2[key].append(i)
+def _generate_pairs_from_blocks_2_files(df1, df2, cancel_token=None, key_filter=None, row_keys=None, index2=None, evidence=None):
+    """Candidate (df1 index, df2 index) pairs; index2 is df2's prebuilt inverted index (ReferenceIndex)."""
+    candidate_pairs = set()
+    inverted_index1 = _build_inverted_index(df1, cancel_token, key_filter, row_keys)
+    inverted_index2 = index2 if index2 is not None else _build_inverted_index(df2, cancel_token, key_filter)
     common_keys = set(inverted_index1.keys()) & set(inverted_index2.keys())
-    for key in common_keys:
+    for n, key in enumerate(common_keys):
+        if n % CANCEL_CHECK_EVERY == 0: _raise_if_cancelled(cancel_token)
+        if evidence is None:
+            for i in inverted_index1[key]:
+                for j in inverted_index2[key]: candidate_pairs.add((i, j))
+            continue
+        weight = _blocking_key_weight(key)
         for i in inverted_index1[key]:
-            for j in inverted_index2[key]: candidate_pairs.add((i, j))
+            for j in inverted_index2[key]:
+                candidate_pairs.add((i, j))
+                evidence[(i, j)] += weight
     return list(candidate_pairs)
 
-def process_chunk(chunk, df1_dicts, df2_dicts, comparison_func):
-    results = []
-    for idx1, idx2 in chunk:
+def process_chunk(chunk, df1_dicts, df2_dicts, comparison_func, cancel_token=None):
+    """Score (idx1, idx2) pairs and return the matches as a MATCH_EDGE_DTYPE array.
+
+    Configurable passes keep their confidence score; other comparison functions report NaN. Near misses
+    (see THRESHOLD_SWEEP_CONFIG) come back as "No Match" rows for _split_near_misses.
+    """
+    tier = CONFIGURABLE_TIERS.get(comparison_func)
+    floor = config.THRESHOLD_SWEEP_CONFIG["min_stored_score"] if tier is not None and config.THRESHOLD_SWEEP_CONFIG["store_near_misses"] else None
+    ii, jj, codes, scores = [], [], [], []
+    for n, (idx1, idx2) in enumerate(chunk):
+        if n % CANCEL_CHECK_EVERY == 0: _raise_if_cancelled(cancel_token)
         rec1, rec2 = df1_dicts[idx1], df2_dicts[idx2]
-        status = comparison_func(rec1, rec2)
-        if status != "No Match": results.append(((idx1, idx2), status))
-    return results
-
-def _run_parallel_comparison(df1, df2, comparison_func, candidate_pairs):
-    if not candidate_pairs: return []
-    df1_dicts = df1.to_dict('index')
-    df2_dicts = df2.to_dict('index') if df2 is not None else df1.to_dict('index')
-    num_processes = max(1, cpu_count() - 1)
-    chunk_size = max(1, len(candidate_pairs) // (num_processes * 4))
-    chunks = [candidate_pairs[i:i + chunk_size] for i in range(0, len(candidate_pairs), chunk_size)]
-    worker_func = partial(process_chunk, df1_dicts=df1_dicts, df2_dicts=df2_dicts, comparison_func=comparison_func)
-    with Pool(processes=num_processes) as pool:
-        results = pool.map(worker_func, chunks)
-    return [item for sublist in results for item in sublist]
+        if tier is not None:
+            score, threshold = _configurable_score(rec1, rec2, tier[0])
+            status = tier[1] if score > threshold else "No Match"
+        else:
+            score, status = np.nan, comparison_func(rec1, rec2)
+        if status != "No Match" or (floor is not None and score >= floor):
+            ii.append(idx1); jj.append(idx2); codes.append(MATCH_STATUS_CODES[status]); scores.append(score)
+    edges = np.empty(len(ii), dtype=MATCH_EDGE_DTYPE)
+    edges["i"], edges["j"], edges["status"], edges["score"] = ii, jj, codes, scores
+    return edges
+
+def _split_near_misses(edges, near_misses=None):
+    """The matches of an edge array; its "No Match" rows are appended to the near_misses list, if given."""
+    missed = edges["status"] == MATCH_STATUS_CODES["No Match"]
+    if not missed.any():
+        return edges
+    if near_misses is not None:
+        near_misses.append(edges[missed])
+    return edges[~missed]
+
+def _pair_keys(edges):
+    """(i, j) of each edge as one int64; index labels are row numbers, far below 2**31."""
+    return (edges["i"].astype(np.int64) << 32) | edges["j"].astype(np.int64)
+
+def _concat_edges(edge_arrays):
+    edge_arrays = [a for a in edge_arrays if len(a)]
+    if not edge_arrays: return np.empty(0, dtype=MATCH_EDGE_DTYPE)
+    return edge_arrays[0] if len(edge_arrays) == 1 else np.concatenate(edge_arrays)
+
+# Only these columns are read by the comparison functions, so only these are shipped to workers
+_MATCH_FIELDS = ["Sex", "Birthdate", "City", "_opt_mname_raw", "_opt_lname_raw", "_opt_fname_exp", "_opt_fname_std", "_opt_nickname_set", "_opt_soundex_lname", "_opt_suffix_std", "_opt_bdate_std", "_opt_city_std"]
+
+# Per-process record store, filled once by the pool initializer instead of being pickled with every task
+_WORKER_STATE = {}
+
+def _init_comparison_worker(df1_dicts, df2_dicts, comparison_func):
+    # Ctrl+C reaches the whole process group; the parent cancels through its token and terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _WORKER_STATE.update(df1_dicts=df1_dicts, df2_dicts=df2_dicts, comparison_func=comparison_func)
+
+def _process_chunk_in_worker(chunk):
+    return process_chunk(chunk, _WORKER_STATE["df1_dicts"], _WORKER_STATE["df2_dicts"], _WORKER_STATE["comparison_func"])
+
+def _match_records(df):
+    return df[[c for c in _MATCH_FIELDS if c in df.columns]].to_dict('index')
+
+def _estimate_record_store_bytes(df1, df2):
+    """Approximate in-memory size of the record dictionaries one worker holds for a pass."""
+    frames = [df1] if df2 is None else [df1, df2]
+    raw = sum(int(df[[c for c in _MATCH_FIELDS if c in df.columns]].memory_usage(index=True, deep=True).sum()) for df in frames)
+    return int(raw * config.PARALLEL_CONFIG["record_overhead_factor"])
+
+def _get_available_memory_bytes():
+    """Currently available physical memory in bytes, or None when it cannot be measured."""
+    if psutil is not None:
+        try:
+            return int(psutil.virtual_memory().available)
+        except Exception:
+            pass
+    if os.name == "nt":
+        try:
+            import ctypes
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong), ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong), ("ullTotalVirtual", ctypes.c_ulonglong),
+                            ("ullAvailVirtual", ctypes.c_ulonglong), ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            status = MEMORYSTATUSEX(); status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return int(status.ullAvailPhys)
+        except Exception:
+            return None
+        return None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def _chunk_size_for(num_pairs, num_workers):
+    cfg = config.PARALLEL_CONFIG
+    chunk_size = max(1, num_pairs // (max(1, num_workers) * 4))
+    return min(max(chunk_size, int(cfg["min_chunk_pairs"])), int(cfg["max_chunk_pairs"]))
+
+def _plan_parallelism(store_bytes, num_pairs, log_callback=None):
+    """Pick worker count and chunk size from CPU count, available RAM and the record store size.
+
+    Returns (num_processes, chunk_size); num_processes == 0 means the store does not fit into even
+    one worker process and should be scored with a shared in-memory store instead of copies.
+    """
+    cfg = config.PARALLEL_CONFIG
+    cpu_workers = max(1, cpu_count() - 1)
+    if cfg["max_workers"]:
+        cpu_workers = max(1, min(cpu_workers, int(cfg["max_workers"])))
+    if cfg["memory_limit_mb"]:
+        budget = int(cfg["memory_limit_mb"]) * 1024 * 1024
+    else:
+        available = _get_available_memory_bytes()
+        budget = int(available * cfg["available_memory_fraction"]) if available is not None else None
+
+    num_processes = cpu_workers
+    if budget is not None:
+        per_worker = int(cfg["worker_baseline_mb"]) * 1024 * 1024 + store_bytes
+        # The parent keeps its own copy of the store while the pool runs
+        memory_workers = int(max(0, budget - store_bytes) // per_worker)
+        if memory_workers < 1:
+            num_processes = 0
+            message = f"⚠️ Low memory: {budget / 2**20:.0f} MB available for ~{store_bytes / 2**20:.0f} MB of records per worker. Comparing with threads over a shared record store."
+        elif memory_workers < cpu_workers:
+            num_processes = memory_workers
+            message = f"⚠️ Low memory: using {num_processes} of {cpu_workers} worker processes (~{per_worker / 2**20:.0f} MB each, {budget / 2**20:.0f} MB available)."
+        if num_processes < cpu_workers:
+            logging.warning(message)
+            if log_callback: log_callback(message)
+
+    return num_processes, _chunk_size_for(num_pairs, num_processes)
+
+def _thread_worker_count():
+    cfg = config.PARALLEL_CONFIG
+    workers = cpu_count()
+    if cfg["max_workers"]:
+        workers = min(workers, int(cfg["max_workers"]))
+    return max(1, workers)
+
+EXECUTION_BACKENDS = ("process", "thread", "inline")
+
+def _resolve_backend(backend=None):
+    """Map a backend name (or None for the configured default) to one of EXECUTION_BACKENDS.
+
+    "auto" picks threads on free-threaded CPython builds and processes everywhere else.
+    """
+    backend = str(backend or config.PARALLEL_CONFIG.get("backend") or "auto").lower()
+    if backend == "auto":
+        gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+        backend = "process" if gil_enabled else "thread"
+    if backend not in EXECUTION_BACKENDS:
+        raise ValueError(f"Unknown execution backend '{backend}'. Expected 'auto' or one of: {', '.join(EXECUTION_BACKENDS)}")
+    return backend
+
+def _past(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+def _wait_async(async_results, cancel_token=None, deadline=None):
+    """Poll multiprocessing AsyncResults in order until all are ready; raises AnalysisCancelled on cancel.
+
+    At the deadline, returns the results so far with None for every chunk that has not finished.
+    """
+    for result in async_results:
+        while not result.ready():
+            result.wait(CANCEL_POLL_SECONDS)
+            _raise_if_cancelled(cancel_token)
+            if _past(deadline):
+                return [r.get() if r.ready() else None for r in async_results]
+    return [r.get() for r in async_results]
+
+class _InlineExecutor:
+    """Scores chunks one after another in the calling thread."""
+    name = "inline"
+
+    def __init__(self, num_workers, df1_dicts, df2_dicts, comparison_func):
+        self.num_workers = num_workers
+        self.df1_dicts, self.df2_dicts = df1_dicts, df2_dicts
+        self.comparison_func = comparison_func
+
+    def map(self, chunks, cancel_token=None, deadline=None):
+        """Edge arrays per chunk, in order; chunks not started by the deadline come back as None."""
+        return [None if _past(deadline) else process_chunk(chunk, self.df1_dicts, self.df2_dicts, self.comparison_func, cancel_token) for chunk in chunks]
+
+class _ThreadExecutor(_InlineExecutor):
+    """Scores chunks on a thread pool; every thread reads the same record store, nothing is copied.
+
+    Pays off when the scorers release the GIL (rapidfuzz C++ kernels) or on free-threaded builds.
+    """
+    name = "thread"
+
+    def map(self, chunks, cancel_token=None, deadline=None):
+        with ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="dedupe-score") as pool:
+            futures = [pool.submit(process_chunk, chunk, self.df1_dicts, self.df2_dicts, self.comparison_func, cancel_token) for chunk in chunks]
+            pending = set(futures)
+            while pending:
+                _, pending = wait_futures(pending, timeout=CANCEL_POLL_SECONDS)
+                if cancel_token is not None and cancel_token.cancelled:
+                    # Queued chunks are dropped; running ones stop at their next cancel check
+                    for future in pending: future.cancel()
+                    raise AnalysisCancelled()
+                if pending and _past(deadline):
+                    # Queued chunks are dropped; running ones are finished and kept
+                    for future in pending: future.cancel()
+                    break
+        return [None if future.cancelled() else future.result() for future in futures]
+
+class _ProcessExecutor(_InlineExecutor):
+    """Scores chunks on a multiprocessing pool; each worker receives one copy of the record store."""
+    name = "process"
+
+    def map(self, chunks, cancel_token=None, deadline=None):
+        with Pool(processes=self.num_workers, initializer=_init_comparison_worker, initargs=(self.df1_dicts, self.df2_dicts, self.comparison_func)) as pool:
+            # Poll instead of blocking in map() so a cancel request can terminate the workers promptly
+            try:
+                if deadline is None:
+                    return _wait_async([pool.map_async(_process_chunk_in_worker, chunks)], cancel_token)[0]
+                # One task per chunk, queued in order; chunks still running at the deadline go with the pool
+                return _wait_async([pool.apply_async(_process_chunk_in_worker, (chunk,)) for chunk in chunks], cancel_token, deadline)
+            except AnalysisCancelled:
+                pool.terminate()
+                pool.join()
+                raise
+
+_EXECUTORS = {"inline": _InlineExecutor, "thread": _ThreadExecutor, "process": _ProcessExecutor}
+
+def _init_warm_worker(reference_dicts):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _WORKER_STATE.update(reference_dicts=reference_dicts)
+
+def _process_task_in_warm_worker(task):
+    chunk, df1_dicts, df2_source, df2_dicts, comparison_func = task
+    if df2_dicts is None: df2_dicts = _WORKER_STATE["reference_dicts"][df2_source]
+    return process_chunk(chunk, df1_dicts, df2_dicts, comparison_func)
+
+class _WarmProcessPool:
+    """A process pool that outlives single passes and analyses (see ReferenceIndex).
+
+    Workers receive the MasterDB/OfficialsDB record stores once at start-up; each task then carries only
+    the user records its chunk refers to. Several analyses may submit to the pool at the same time.
+    """
+    name = "process"
+
+    def __init__(self, num_workers, reference_dicts):
+        self.num_workers = num_workers
+        self.pool = Pool(processes=num_workers, initializer=_init_warm_worker, initargs=(reference_dicts,))
+
+    def map(self, df1_dicts, df2_source, chunks, comparison_func, cancel_token=None, deadline=None):
+        def task(chunk):
+            rows = {i for i, _ in chunk}
+            if df2_source == "user":
+                rows.update(j for _, j in chunk)
+            subset = {i: df1_dicts[i] for i in rows}
+            return (chunk, subset, df2_source, subset if df2_source == "user" else None, comparison_func)
+        # The pool is shared, so its workers are not terminated on cancel; close() does that
+        if deadline is None:
+            return _wait_async([self.pool.map_async(_process_task_in_warm_worker, [task(chunk) for chunk in chunks])], cancel_token)[0]
+        # Nor at the deadline: only two chunks per worker are queued at a time, so little runs past it
+        results, in_flight, submitted = [None] * len(chunks), {}, 0
+        while True:
+            while submitted < len(chunks) and len(in_flight) < 2 * self.num_workers and not _past(deadline):
+                in_flight[submitted] = self.pool.apply_async(_process_task_in_warm_worker, (task(chunks[submitted]),))
+                submitted += 1
+            if not in_flight:
+                return results
+            next(iter(in_flight.values())).wait(CANCEL_POLL_SECONDS)
+            _raise_if_cancelled(cancel_token)
+            for n, result in list(in_flight.items()):
+                if result.ready():
+                    results[n] = result.get()
+                    del in_flight[n]
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+def _run_parallel_comparison(df1, df2, comparison_func, candidate_pairs, cancel_token=None, log_callback=None, backend=None, warm_pool=None, df2_source=None, deadline=None, near_misses=None):
+    """Score candidate pairs on the chosen backend; returns one MATCH_EDGE_DTYPE array of matches.
+
+    With a warm_pool (process backend only), df2 is looked up in the workers' stores by df2_source.
+    With a deadline (time.monotonic() value) pairs are scored in list order and (edges, unscored pairs)
+    is returned; the unscored pairs are those of chunks not finished in time. Near misses are appended
+    to the near_misses list when one is given.
+    """
+    if not candidate_pairs or _past(deadline):
+        edges = np.empty(0, dtype=MATCH_EDGE_DTYPE)
+        return edges if deadline is None else (edges, list(candidate_pairs))
+    backend = _resolve_backend(backend)
+    max_chunk = int(config.TIME_BUDGET_CONFIG["max_chunk_pairs"]) if deadline is not None else None
+    if warm_pool is not None and backend == "process":
+        chunk_size = min(_chunk_size_for(len(candidate_pairs), warm_pool.num_workers), max_chunk or len(candidate_pairs))
+        chunks = [candidate_pairs[i:i + chunk_size] for i in range(0, len(candidate_pairs), chunk_size)]
+        results = warm_pool.map(_match_records(df1), df2_source or "user", chunks, comparison_func, cancel_token, deadline)
+    else:
+        if backend == "process":
+            num_workers, chunk_size = _plan_parallelism(_estimate_record_store_bytes(df1, df2), len(candidate_pairs), log_callback)
+            if num_workers == 0:
+                backend, num_workers = "thread", _thread_worker_count()
+        else:
+            num_workers = 1 if backend == "inline" else _thread_worker_count()
+            chunk_size = _chunk_size_for(len(candidate_pairs), num_workers)
+        chunk_size = min(chunk_size, max_chunk or chunk_size)
+        df1_dicts = _match_records(df1)
+        df2_dicts = _match_records(df2) if df2 is not None else df1_dicts
+        chunks = [candidate_pairs[i:i + chunk_size] for i in range(0, len(candidate_pairs), chunk_size)]
+        results = _EXECUTORS[backend](num_workers, df1_dicts, df2_dicts, comparison_func).map(chunks, cancel_token, deadline)
+    if deadline is None:
+        return _split_near_misses(_concat_edges(results), near_misses)
+    unscored = [pair for chunk, result in zip(chunks, results) if result is None for pair in chunk]
+    return _split_near_misses(_concat_edges([result for result in results if result is not None]), near_misses), unscored
+
+def _rank_pairs(pairs, evidence):
+    """Pairs ordered by descending blocking evidence; pairs without any (earlier pending ones) go last."""
+    weights = np.fromiter((evidence.get(pair, 0) for pair in pairs), dtype=np.int64, count=len(pairs))
+    return [pairs[k] for k in np.argsort(-weights, kind="stable").tolist()]
+
+class _UnionFind:
+    """Integer-indexed disjoint sets with iterative path compression.
+
+    Each set also carries a sticky flag (used for "contains a fuzzy edge") that survives unions.
+    """
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.flagged = [False] * size
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b, flag=False):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+            self.flagged[root_a] = self.flagged[root_a] or self.flagged[root_b]
+        if flag:
+            self.flagged[root_a] = True
+
+    def union_all(self, a_ids, b_ids, flags):
+        """union() over parallel sequences, with find inlined for large edge lists."""
+        parent, flagged = self.parent, self.flagged
+        for a, b, flag in zip(a_ids, b_ids, flags):
+            root_a = a
+            while parent[root_a] != root_a: root_a = parent[root_a]
+            while parent[a] != root_a: parent[a], a = root_a, parent[a]
+            root_b = b
+            while parent[root_b] != root_b: root_b = parent[root_b]
+            while parent[b] != root_b: parent[b], b = root_b, parent[b]
+            if root_a != root_b:
+                parent[root_b] = root_a
+                flagged[root_a] = flagged[root_a] or flagged[root_b]
+            if flag:
+                flagged[root_a] = True
+
+    def roots(self, nodes):
+        """Root of every node in an int array (pointer jumping over a snapshot of the parents)."""
+        parent = np.asarray(self.parent, dtype=np.int64)
+        roots = parent[nodes]
+        while True:
+            above = parent[roots]
+            if np.array_equal(above, roots):
+                return roots
+            roots = above
+
+def _weak_bridge(a_ids, b_ids, fuzzy, scores, min_part_size):
+    """Lowest-scoring weak bridge of one connected group, as (edge position, records on one side), or None.
+
+    A weak bridge is a fuzzy edge that is the only link between two parts of at least min_part_size records.
+    Iterative DFS (Tarjan low-links) with subtree sizes; records are listed in preorder, so a subtree is a slice.
+    """
+    adjacency = defaultdict(list)
+    for k, (u, v) in enumerate(zip(a_ids, b_ids)):
+        adjacency[u].append((v, k))
+        adjacency[v].append((u, k))
+    total = len(adjacency)
+    start = a_ids[0]
+    entry, low, size, preorder = {start: 0}, {start: 0}, {start: 1}, [start]
+    stack, best = [(start, -1, iter(adjacency[start]))], None
+    while stack:
+        node, parent_edge, neighbours = stack[-1]
+        for nxt, k in neighbours:
+            if k == parent_edge:
+                continue
+            if nxt in entry:
+                low[node] = min(low[node], entry[nxt])
+            else:
+                entry[nxt] = low[nxt] = len(preorder)
+                size[nxt] = 1
+                preorder.append(nxt)
+                stack.append((nxt, k, iter(adjacency[nxt])))
+                break
+        else:
+            stack.pop()
+            if not stack:
+                break
+            parent = stack[-1][0]
+            low[parent] = min(low[parent], low[node])
+            size[parent] += size[node]
+            smaller = min(size[node], total - size[node])
+            if low[node] > entry[parent] and fuzzy[parent_edge] and smaller >= min_part_size:
+                # Missing scores (non-configurable matchers) are never the weakest
+                score = scores[parent_edge] if scores[parent_edge] == scores[parent_edge] else float("inf")
+                if best is None or (score, -smaller) < best[0]:
+                    best = ((score, -smaller), parent_edge, node)
+    if best is None:
+        return None
+    _, k, node = best
+    return k, set(preorder[entry[node]:entry[node] + size[node]])
+
+def _split_overmerged(a_ids, b_ids, fuzzy, scores, min_group_size, min_part_size, max_cost):
+    """Cut weak bridges in groups larger than min_group_size; returns (mask of kept edges, stats).
+
+    Each group is cut at its lowest-scoring weak bridge and the parts are checked again, until they are
+    small enough or have none left. A search costs the records plus edges of its part; once the total
+    passes max_cost the remaining parts are kept whole.
+    """
+    keep = np.ones(len(a_ids), dtype=bool)
+    stats = {"groups_over": 0, "largest_before": 0, "edges_cut": 0, "groups_left": 0, "cost": 0}
+    if not len(a_ids):
+        return keep, stats
+    nodes, compact = np.unique(np.concatenate([a_ids, b_ids]), return_inverse=True)
+    a_local, b_local = compact[:len(a_ids)], compact[len(a_ids):]
+    graph = _UnionFind(len(nodes))
+    graph.union_all(a_local.tolist(), b_local.tolist(), [False] * len(a_ids))
+    node_roots = graph.roots(np.arange(len(nodes)))
+    roots, counts = np.unique(node_roots, return_counts=True)
+    stats["largest_before"] = int(counts.max())
+    oversized = roots[counts > min_group_size]
+    stats["groups_over"] = len(oversized)
+    if not len(oversized):
+        return keep, stats
+
+    edge_roots = node_roots[a_local]
+    edge_order = np.argsort(edge_roots, kind="stable")
+    bounds = np.searchsorted(edge_roots[edge_order], np.stack([oversized, oversized + 1])).T
+    a_list, b_list, fuzzy_list, score_list = a_local.tolist(), b_local.tolist(), fuzzy.tolist(), scores.tolist()
+    # Smallest parts first (popped from the end), so one runaway group cannot use up the budget alone
+    parts = sorted(((edge_order[lo:hi].tolist(), int(count)) for (lo, hi), count in zip(bounds.tolist(), counts[counts > min_group_size].tolist())),
+                   key=lambda part: -part[1])
+    while parts:
+        part, records = parts.pop()
+        if records <= min_group_size:
+            continue
+        if stats["cost"] >= max_cost:
+            stats["groups_left"] += 1
+            continue
+        stats["cost"] += records + len(part)
+        found = _weak_bridge([a_list[k] for k in part], [b_list[k] for k in part],
+                             [fuzzy_list[k] for k in part], [score_list[k] for k in part], min_part_size)
+        if found is None:
+            continue
+        cut, side = found
+        keep[part[cut]] = False
+        stats["edges_cut"] += 1
+        inside = [k for k in part if k != part[cut] and a_list[k] in side]
+        outside = [k for k in part if k != part[cut] and a_list[k] not in side]
+        parts.extend(sorted([(inside, len(side)), (outside, records - len(side))], key=lambda part: -part[1]))
+    return keep, stats
+
+# Report rows carry their provenance as integers (source id, index label in that source). The "Row" text,
+# e.g. "userfile 14" (the spreadsheet row), is only rendered when the report is written. Ids follow the
+# alphabetical order of the display names, so sorting by id sorts like the text prefix.
+ROW_SOURCE_IDS = {"master": 0, "official": 1, "user": 2}
+ROW_SOURCE_NAMES = {0: "masterdb", 1: "official", 2: "userfile"}
+ROW_SOURCE_COL, ROW_INDEX_COL = "_row_source", "_row_index"
+
+# Match artifact columns (run_state.MatchArtifactStore). Sources are ROW_SOURCE_IDS; status "No Match" rows
+# are near misses; tier -1 = none or unknown (non-configurable matcher); name_only = the tier adjustments
+# apply; section -1 / group_id 0 = record not shown in a report section; clusters are MasterDB duplicate
+# clusters by MasterDB index label
+ARTIFACT_EDGE_DTYPE = np.dtype([("source1", np.int8), ("index1", np.int64), ("source2", np.int8), ("index2", np.int64),
+                                ("status", np.int8), ("tier", np.int8), ("score", np.float32), ("name_only", np.bool_)])
+ARTIFACT_TIER_CODES = {"strict": 0, "standard": 1, "lenient": 2}
+ARTIFACT_CLUSTER_DTYPE = np.dtype([("index", np.int64), ("cluster", np.int64)])
+GROUP_MEMBER_DTYPE = np.dtype([("source", np.int8), ("index", np.int64), ("component", np.int64), ("section", np.int8), ("group_id", np.int32)])
+REPORT_SECTION_CODES = {"officials": 0, "linking": 1, "dedupe": 2}
+
+def row_label(source, index):
+    """Row text shown in reports, e.g. row_label("master", 201) -> "masterdb 203"."""
+    return f"{ROW_SOURCE_NAMES[ROW_SOURCE_IDS[source]]} {index + 2}"
+
+LIVE_FINDING_ICONS = {"officials": "🏛️", "linking": "🔗", "dedupe": "👥"}
+LIVE_FINDING_TITLES = {"officials": "Official hit", "linking": "Linked to MasterDB", "dedupe": "Duplicate"}
+
+def describe_findings(update):
+    """Log lines for one ("findings", update) progress message."""
+    counts = update["counts"]
+    lines = [f"🔎 Live findings: {counts['new']:,} new and {counts['grown']:,} grown groups "
+             f"({counts['officials']:,} with officials). Preliminary until the report is written."]
+    for finding in update["groups"]:
+        lines.append(f"  {LIVE_FINDING_ICONS[finding['section']]} {LIVE_FINDING_TITLES[finding['section']]} ({finding['change']}): "
+                     f"{finding['name']} - {', '.join(finding['rows'])}")
+    if update["more"]:
+        lines.append(f"  ... and {update['more']:,} more.")
+    return lines
+
+def _with_row_labels(df):
+    """A report section for display: the provenance columns replaced by the "Row" text, in place of the first."""
+    if df is None or df.empty or ROW_SOURCE_COL not in df.columns:
+        return df
+    text = df[ROW_SOURCE_COL].map(ROW_SOURCE_NAMES) + " " + (df[ROW_INDEX_COL] + 2).astype(str)
+    position = df.columns.get_loc(ROW_SOURCE_COL)
+    display = df.drop(columns=[ROW_SOURCE_COL, ROW_INDEX_COL])
+    display.insert(position, "Row", text)
+    return display
+
+def _assemble_section(rows, frames):
+    """A report section from (source, row position, group_id, remark) rows, kept in that order.
+
+    Records are taken with one .take per source; group_id, the provenance columns and Remarks are attached
+    as whole columns.
+    """
+    if not rows:
+        return pd.DataFrame()
+    sources, positions, group_ids, remarks = (np.array(column) for column in zip(*rows))
+    parts, picked_rows = [], []
+    for source in sorted(set(sources.tolist())):
+        picked = np.flatnonzero(sources == source)
+        part = frames[source].take(positions[picked])
+        part["group_id"] = group_ids[picked]
+        part[ROW_SOURCE_COL] = np.int8(ROW_SOURCE_IDS[source])
+        part[ROW_INDEX_COL] = part.index.to_numpy(dtype=np.int64)
+        part["Remarks"] = remarks[picked]
+        parts.append(part)
+        picked_rows.append(picked)
+    section = pd.concat(parts) if len(parts) > 1 else parts[0]
+    return section.iloc[np.argsort(np.concatenate(picked_rows), kind="stable")].reset_index(drop=True)
+
+def master_duplicate_clusters(master_df, cancel_token=None, log_callback=None, backend=None):
+    """Duplicate clusters inside a precomputed MasterDB, found with the user_user blocking and passes.
+
+    Returns {"index": index labels, "cluster": cluster id per label, "fuzzy": per cluster id, whether it
+    holds a fuzzy edge}; only records in a cluster of two or more are listed.
+    """
+    pairs = _generate_pairs_from_blocks(master_df, cancel_token)
+    matched, found = set(), []
+    for func in PASS_PIPELINE['user_user']:
+        pairs_to_check = [p for p in pairs if p not in matched]
+        edges = _run_parallel_comparison(master_df, None, func, pairs_to_check, cancel_token, log_callback, backend)
+        matched.update(zip(edges["i"].tolist(), edges["j"].tolist()))
+        found.append(edges)
+    edges = _concat_edges(found)
+    pos1, pos2 = master_df.index.get_indexer(edges["i"]), master_df.index.get_indexer(edges["j"])
+    graph = _UnionFind(len(master_df))
+    graph.union_all(pos1.tolist(), pos2.tolist(), (edges["status"] == MATCH_STATUS_CODES["Fuzzy Match"]).tolist())
+    nodes = np.unique(np.concatenate([pos1, pos2]))
+    roots, cluster = np.unique(graph.roots(nodes), return_inverse=True)
+    return {"index": master_df.index.to_numpy(dtype=np.int64)[nodes], "cluster": cluster.astype(np.int64),
+            "fuzzy": np.array([graph.flagged[root] for root in roots.tolist()], dtype=bool)}
+
+def prepare_master_clusters(store, master_df, symmetrical_map, master_fingerprint, cancel_token=None, log_callback=None, backend=None):
+    """The stored clusters of this MasterDB version; computed and saved first when there are none yet.
+
+    master_df is the precomputed frame; master_fingerprint is frame_fingerprint() of the MasterDB as loaded,
+    so analyses and ReferenceIndex instances find the same stored clusters.
+    """
+    if store is None or not config.MASTER_CLUSTER_CONFIG["enabled"] or master_df is None or master_df.empty:
+        return None
+    log = log_callback or (lambda message: None)
+    fingerprint = master_cluster_fingerprint(master_fingerprint, symmetrical_map)
+    clusters = store.load(fingerprint)
+    if clusters is not None:
+        return clusters
+    log("🧮 New MasterDB version: finding duplicate records inside it (done once per version)...")
+    started = time.perf_counter()
+    clusters = master_duplicate_clusters(master_df, cancel_token, log_callback, backend)
+    log(f"✅ [MasterDB] {len(clusters['fuzzy']):,} duplicate clusters ({len(clusters['index']):,} records) found in {time.perf_counter() - started:.1f}s.")
+    try:
+        store.save(fingerprint, clusters)
+    except OSError as e:
+        logging.warning("Could not save MasterDB clusters: %s", e)
+        log(f"⚠️ Could not save the MasterDB clusters; they will be computed again next time: {e}")
+    return clusters
+
+def _symmetrical_nickname_map(nickname_map):
+    """Every nickname and formal name maps to the full set of names it is interchangeable with."""
+    symmetrical_map = defaultdict(set)
+    for nick, formal_list in nickname_map.items():
+        std_nick, std_formals = nick.lower().replace('.', '').replace(' ', ''), {f.lower().replace('.', '').replace(' ', '') for f in formal_list}
+        all_names = {std_nick} | std_formals
+        for name in all_names:
+            symmetrical_map[name].update(all_names)
+    return symmetrical_map
+
+class ReferenceIndex:
+    """MasterDB and OfficialsDB prepared once and shared by many analyses (batch runs).
+
+    Holds the precomputed frames, their blocking indexes and content fingerprints, and optionally a
+    warm worker pool that already has their records. Engines only read from it.
+    """
+
+    def __init__(self, master_df, officials_df, nickname_map, cancel_token=None, master_clusters=None, log_callback=None):
+        self.nickname_map = nickname_map
+        self.symmetrical_map = _symmetrical_nickname_map(nickname_map)
+        self.fingerprints = {"user_official": frame_fingerprint(officials_df), "user_master": frame_fingerprint(master_df)}
+        self.frames, self.indexes = {}, {}
+        for source, df in (("master", master_df), ("official", officials_df)):
+            if df is not None:
+                df = _precompute_dataframe(df.copy(), self.symmetrical_map)
+            self.frames[source] = df
+            if df is not None and not df.empty:
+                self.indexes[source] = _build_inverted_index(df, cancel_token)
+        # Duplicate clusters inside the MasterDB, from (or saved to) a run_state.MasterClusterStore
+        self.master_clusters = prepare_master_clusters(master_clusters, self.frames["master"], self.symmetrical_map,
+                                                       self.fingerprints["user_master"], cancel_token, log_callback)
+        self.pool = None
+        self._record_stores = {}
+
+    @property
+    def master_df(self):
+        return self.frames["master"]
+
+    @property
+    def officials_df(self):
+        return self.frames["official"]
+
+    def record_store(self, source):
+        """{index: match fields} of the "master" or "official" frame, built on first use."""
+        store = self._record_stores.get(source)
+        if store is None:
+            store = self._record_stores[source] = _match_records(self.frames[source])
+        return store
+
+    def match_records(self, records_df, include_non_matches=False):
+        """Score cleaned records against the reference with the same blocking, passes and thresholds as an analysis.
+
+        Returns {row index: [(source, reference index, status, tier, score), ...]}. A reference record is
+        listed once, at the strictest pass it matches (officials: strict/standard/lenient, master: strict/standard);
+        with include_non_matches, blocked candidates that pass no tier are listed as ("No Match", None).
+        """
+        df = _precompute_dataframe(records_df.copy(), self.symmetrical_map)
+        results = {}
+        for i, rec in _match_records(df).items():
+            keys = _get_blocking_keys_optimized(rec)
+            matches = results[i] = []
+            for source, pair_type in (("official", "user_official"), ("master", "user_master")):
+                index = self.indexes.get(source)
+                if index is None: continue
+                store = self.record_store(source)
+                tiers = [CONFIGURABLE_TIERS[func] for func in PASS_PIPELINE[pair_type]]
+                for j in sorted({j for key in keys for j in index.get(key, ())}):
+                    score, _ = _configurable_score(rec, store[j], tiers[0][0])
+                    for tier, status in tiers:
+                        if score > _configurable_threshold(rec, store[j], tier):
+                            matches.append((source, j, status, tier, score))
+                            break
+                    else:
+                        if include_non_matches: matches.append((source, j, "No Match", None, score))
+        return results
+
+    def start_pool(self, backend=None, log_callback=None):
+        """Start the warm worker pool when the process backend applies and memory allows; returns it or None."""
+        if self.pool is not None or _resolve_backend(backend) != "process":
+            return self.pool
+        frames = [df for df in self.frames.values() if df is not None and not df.empty]
+        if not frames:
+            return None
+        store_bytes = sum(_estimate_record_store_bytes(df, None) for df in frames)
+        num_workers, _ = _plan_parallelism(store_bytes, 0, log_callback)
+        if num_workers > 0:
+            self.pool = _WarmProcessPool(num_workers, {source: self.record_store(source) for source, df in self.frames.items() if df is not None and not df.empty})
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 class AnalysisEngine:
-    def __init__(self, user_df, master_df, officials_df, nickname_map, user_filepath, province_name, log_callback, status_callback, start_time, final_report_callback, progress_queue):
+    def __init__(self, user_df, master_df, officials_df, nickname_map, user_filepath, province_name, log_callback, status_callback, start_time, final_report_callback, progress_queue, cancel_token=None, execution_backend=None, nodes=None, run_state=None, checkpoints=None, reference=None, time_budget=None, artifacts=None, master_clusters=None, out_of_core=None):
+        # A ReferenceIndex replaces master_df/officials_df with its prepared, shared frames
+        self.reference = reference
         self.user_df = user_df
-        self.master_df = master_df
-        self.officials_df = officials_df
-        self.nickname_map = nickname_map
+        self.master_df = reference.master_df if reference is not None else master_df
+        self.officials_df = reference.officials_df if reference is not None else officials_df
+        self.nickname_map = reference.nickname_map if reference is not None else nickname_map
         self.user_filepath = user_filepath
         self.province_name = province_name
         self.log_callback = log_callback
@@ -481,6 +1236,59 @@ class AnalysisEngine:
         self.start_time = start_time
         self.final_report_callback = final_report_callback
         self.progress_queue = progress_queue
+        self.cancel_token = cancel_token
+        self.cancel_latency = None
+        self.execution_backend = _resolve_backend(execution_backend)
+        if nodes is None and config.DISTRIBUTED_CONFIG["enabled"]:
+            nodes = config.DISTRIBUTED_CONFIG["nodes"]
+        self.nodes = list(nodes) if nodes else []
+        # Out-of-core matching (out_of_core.py) streams blocks from a scratch SQLite database; nodes take precedence
+        if out_of_core is None:
+            out_of_core = config.OUT_OF_CORE_CONFIG["enabled"]
+        self.out_of_core = bool(out_of_core) and not self.nodes
+        # Group splitting needs every cross-link scored, so it turns off skipping connected pairs
+        self.skip_connected_pairs = config.MATCHING_OPTIMIZATIONS["skip_connected_pairs"] and not config.CLUSTER_SPLIT_CONFIG["enabled"] and not self.out_of_core
+        self.skipped_comparisons = 0
+        self.officials_first = config.MATCHING_OPTIMIZATIONS["officials_first_short_circuit"] and not config.CLUSTER_SPLIT_CONFIG["enabled"] and not self.out_of_core
+        self.official_resolved_user_indices = set()
+        self.short_circuit_stats = {}
+        # Incremental re-runs: encrypted per-lineage state (run_state.RunStateStore); not used with nodes
+        self.run_state = run_state if config.INCREMENTAL_CONFIG["enabled"] and not self.nodes and not self.out_of_core else None
+        self.lineage = lineage_id(user_filepath, province_name)
+        self._prior = None
+        self._record_keys = self._reference_fingerprints = self._matching_fingerprint = None
+        self._user_block_keys = None
+        self._unscored_pairs = defaultdict(set)
+        # Per pair type: arrays of scored pairs that missed every threshold (THRESHOLD_SWEEP_CONFIG)
+        self._near_misses = defaultdict(list)
+        # Stage checkpoints (run_state.CheckpointStore), keyed by a hash of the raw inputs
+        self.checkpoints = checkpoints if config.CHECKPOINT_CONFIG["enabled"] else None
+        self.run_key = None
+        # Edges, groups and provenance of the finished run (run_state.MatchArtifactStore)
+        self.artifacts = artifacts if config.MATCH_ARTIFACT_CONFIG["enabled"] else None
+        self.group_members = None
+        # Duplicate clusters inside the MasterDB: a run_state.MasterClusterStore, or the reference's clusters
+        self._master_cluster_store = master_clusters
+        self.master_clusters = reference.master_clusters if reference is not None else None
+        self._resume_edges = None
+        self._resume_passes_done = 0
+        # What the match checkpoints written so far hold: each pass writes only what it added
+        self._checkpoint_passes = self._checkpoint_edges = 0
+        self._checkpoint_near_misses = {}
+        self._new_unscored, self._new_deferred = defaultdict(set), defaultdict(set)
+        # Time budget (seconds from the start of run_analysis): pairs are scored most-likely first and the
+        # ones not reached are left pending for the next run of this lineage
+        budget = time_budget if time_budget is not None else config.TIME_BUDGET_CONFIG["seconds"]
+        self.time_budget = float(budget) if budget else None
+        self._deadline = None
+        self._pair_evidence = {}
+        self._budget_deferred = defaultdict(set)
+        self.budget_stats = None
+        # Live findings (LIVE_FINDINGS_CONFIG): per node, the group size last sent to the progress queue
+        self.live_findings = config.LIVE_FINDINGS_CONFIG["enabled"]
+        self._announced_sizes = None
+        self._last_findings_at = 0.0
+        self.report_saved = False
         self.symmetrical_map = defaultdict(set)
         self.reports = {}
         self.summary_stats = {}
@@ -492,134 +1300,798 @@ class AnalysisEngine:
         if self.user_df is None or self.user_df.empty:
             return
 
-        self._preprocess_data()
-        self._perform_matching()
-        self._generate_reports()
+        if self.time_budget and self.nodes:
+            self.log_callback("⚠️ The time budget is not supported with matching nodes; every pair will be compared.")
+        elif self.time_budget and self.out_of_core:
+            self.log_callback("⚠️ The time budget is not supported with out-of-core matching; every pair will be compared.")
+        elif self.time_budget:
+            self._deadline = time.monotonic() + self.time_budget * (1 - config.TIME_BUDGET_CONFIG["report_reserve_fraction"])
+        try:
+            resumed_stage = self._resume_from_checkpoints()
+            if resumed_stage is None:
+                self._preprocess_data()
+                self._checkpoint("prep")
+            _raise_if_cancelled(self.cancel_token)
+            if resumed_stage != "groups":
+                self._perform_matching()
+                _raise_if_cancelled(self.cancel_token)
+                self._generate_reports()
+                self._checkpoint("groups")
+            _raise_if_cancelled(self.cancel_token)
+        except AnalysisCancelled:
+            self._report_cancelled()
+            return
+        self._save_run_state()
+        self._save_artifact()
         self._save_results()
+        if self.report_saved and self.checkpoints is not None:
+            self.checkpoints.discard(self.run_key)
+
+    def _report_cancelled(self):
+        """Log a cancelled run; report generation is skipped entirely."""
+        self.cancel_latency = self.cancel_token.seconds_since_request() if self.cancel_token is not None else None
+        latency_text = f" Stopped {self.cancel_latency:.2f}s after the request." if self.cancel_latency is not None else ""
+        logging.info("Analysis cancelled; cancellation latency %s", self.cancel_latency)
+        self.log_callback(f"🛑 Analysis cancelled. No report was generated.{latency_text}")
+        self.status_callback("main", "Analysis cancelled.", "error")
+
+    def _checkpoint(self, stage, passes_done=None):
+        """Write the state needed to resume after this stage; a failed write only disables checkpoints."""
+        if self.checkpoints is None:
+            return
+        if stage == "match" and passes_done == self._checkpoint_passes:
+            return
+        try:
+            if stage == "prep":
+                # A fresh start: parts left by an earlier attempt on the same inputs must not be resumed from
+                self.checkpoints.discard(self.run_key)
+                payload = {
+                    "user_df": self.user_df, "shared_reference": self.reference is not None, "reference_frames": self._checkpoint_reference_frames(),
+                    "symmetrical_map": self.symmetrical_map, "user_block_keys": self._user_block_keys, "prior": self._prior,
+                    "record_keys": self._record_keys, "reference_fingerprints": self._reference_fingerprints, "matching_fingerprint": self._matching_fingerprint,
+                    "master_clusters": None if self.reference is not None else self.master_clusters
+                }
+            elif stage == "match":
+                payload = self._match_checkpoint_part(passes_done)
+            else:
+                payload = {
+                    "reports": self.reports, "official_user_indices": self.official_user_indices,
+                    "linked_user_indices": self.linked_user_indices, "duplicate_user_indices": self.duplicate_user_indices,
+                    "budget_stats": self.budget_stats, "group_members": self.group_members
+                }
+            self.checkpoints.save(self.run_key, stage, payload, passes_done if stage == "match" else None)
+        except OSError as e:
+            logging.warning("Could not write %s checkpoint: %s", stage, e)
+            self.log_callback(f"⚠️ Could not write a checkpoint, this run cannot be resumed: {e}")
+            self.checkpoints = None
+
+    def _checkpoint_reference_frames(self):
+        """{"master_df": ..., "officials_df": ...}: the key each precomputed reference table is stored under.
+
+        Tables are stored once per content and matching configuration, not with every run; shared reference
+        frames are prepared again by the ReferenceIndex and a missing or empty table is kept as it is.
+        """
+        if self.reference is not None:
+            return {"master_df": None, "officials_df": None}
+        frames = {}
+        for name, pair_type in (("master_df", "user_master"), ("officials_df", "user_official")):
+            df, fingerprint = getattr(self, name), self._reference_fingerprints[pair_type]
+            if fingerprint is None:
+                frames[name] = df
+                continue
+            frames[name] = reference_frame_key(fingerprint, self.symmetrical_map)
+            self.checkpoints.save_frame(frames[name], df)
+        return frames
+
+    def _match_checkpoint_part(self, passes_done):
+        """Edges, near misses and pairs left unscored since the previous match checkpoint."""
+        new_matches, self._checkpoint_edges = self.all_matches[self._checkpoint_edges:], len(self.all_matches)
+        near_misses = {}
+        for pair_type, arrays in self._near_misses.items():
+            if len(arrays) > self._checkpoint_near_misses.get(pair_type, 0):
+                near_misses[pair_type] = _concat_edges(arrays[self._checkpoint_near_misses.get(pair_type, 0):])
+            self._checkpoint_near_misses[pair_type] = len(arrays)
+        part = {
+            "passes_done": passes_done, "edges": self._edges_by_pair_type(new_matches),
+            "unscored": {pair_type: np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2) for pair_type, pairs in self._new_unscored.items() if pairs},
+            "budget_deferred": {pair_type: np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2) for pair_type, pairs in self._new_deferred.items() if pairs},
+            "skipped_comparisons": self.skipped_comparisons, "short_circuit_stats": self.short_circuit_stats,
+            "near_misses": near_misses
+        }
+        self._checkpoint_passes = passes_done
+        self._new_unscored, self._new_deferred = defaultdict(set), defaultdict(set)
+        return part
+
+    def _resume_from_checkpoints(self):
+        """Restore the last completed stage of an earlier run on the same inputs; returns its name or None."""
+        if self.checkpoints is None:
+            return None
+        self.checkpoints.prune(config.CHECKPOINT_CONFIG["max_age_days"])
+        self.run_key = analysis_input_hash(self.user_df, self.master_df, self.officials_df, self.nickname_map, self.province_name,
+                                           self._raw_reference_fingerprints(), self.time_budget if self._deadline is not None else None)
+        prep = self.checkpoints.load(self.run_key, "prep")
+        if prep is None or (prep.get("shared_reference") and self.reference is None):
+            return None
+        frames = {name: self.checkpoints.load_frame(value) if isinstance(value, str) else value for name, value in prep["reference_frames"].items()}
+        if any(isinstance(value, str) and frames[name] is None for name, value in prep["reference_frames"].items()):
+            return None
+        self.user_df = prep["user_df"]
+        if self.reference is None:
+            self.master_df, self.officials_df = frames["master_df"], frames["officials_df"]
+            self.master_clusters = prep.get("master_clusters")
+        self.symmetrical_map, self._user_block_keys, self._prior = prep["symmetrical_map"], prep["user_block_keys"], prep["prior"]
+        self._record_keys, self._reference_fingerprints, self._matching_fingerprint = prep["record_keys"], prep["reference_fingerprints"], prep["matching_fingerprint"]
+        stage, progress = "prep", "preprocessing"
+
+        parts = self.checkpoints.load_parts(self.run_key, "match")
+        if parts:
+            last = parts[-1]
+            self._resume_passes_done = self._checkpoint_passes = last["passes_done"]
+            edges, near_misses = defaultdict(list), defaultdict(list)
+            for part in parts:
+                for pair_type, arr in part["edges"].items():
+                    edges[pair_type].append(arr)
+                for pair_type, arr in part["unscored"].items():
+                    self._unscored_pairs[pair_type].update(map(tuple, arr.tolist()))
+                for pair_type, arr in part["budget_deferred"].items():
+                    self._budget_deferred[pair_type].update(map(tuple, arr.tolist()))
+                for pair_type, arr in part["near_misses"].items():
+                    near_misses[pair_type].append(arr)
+            self._resume_edges = {pair_type: list(zip(arr["i"].tolist(), arr["j"].tolist(), [MATCH_STATUS_NAMES[c] for c in arr["status"].tolist()], arr["score"].tolist()))
+                                  for pair_type, arr in ((pair_type, _concat_edges(arrays)) for pair_type, arrays in edges.items())}
+            self.skipped_comparisons, self.short_circuit_stats = last["skipped_comparisons"], last["short_circuit_stats"]
+            self._near_misses = defaultdict(list, {pair_type: [_concat_edges(arrays)] for pair_type, arrays in near_misses.items()})
+            self._checkpoint_near_misses = {pair_type: 1 for pair_type in self._near_misses}
+            stage, progress = "match", f"{self._resume_passes_done} of {sum(len(funcs) for funcs in PASS_PIPELINE.values())} comparison passes"
+
+            groups = self.checkpoints.load(self.run_key, "groups")
+            if groups is not None:
+                self.reports = groups["reports"]
+                self.official_user_indices, self.linked_user_indices, self.duplicate_user_indices = groups["official_user_indices"], groups["linked_user_indices"], groups["duplicate_user_indices"]
+                self.budget_stats = groups.get("budget_stats")
+                self.group_members = groups.get("group_members")
+                self.all_matches = [(f"{pair_type.split('_')[0]}_{i}", f"{pair_type.split('_')[1]}_{j}", status, score)
+                                    for pair_type, edges in self._resume_edges.items() for i, j, status, score in edges]
+                stage, progress = "groups", "grouping"
+        self.log_callback(f"⏩ Resuming an interrupted run on the same files: {progress} already done.")
+        return stage
+
+    def _edges_by_pair_type(self, matches=None):
+        """self.all_matches (or a slice of it) as {pair_type: MATCH_EDGE_DTYPE array of index labels}."""
+        grouped = defaultdict(list)
+        for node1, node2, status, score in self.all_matches if matches is None else matches:
+            (source1, i), (source2, j) = node1.split('_', 1), node2.split('_', 1)
+            grouped[f"{source1}_{source2}"].append((int(i), int(j), MATCH_STATUS_CODES[status], score))
+        return {pair_type: np.array(rows, dtype=MATCH_EDGE_DTYPE) for pair_type, rows in grouped.items()}
+
+    def _near_miss_edges(self):
+        """Scored pairs that missed every threshold and were not matched later, once each, per pair type."""
+        matched = self._edges_by_pair_type()
+        result = {}
+        for pair_type, arrays in self._near_misses.items():
+            edges = _concat_edges(arrays)
+            if not len(edges):
+                continue
+            # Strict-pass misses are scored again by later passes, with the same score
+            _, first = np.unique(_pair_keys(edges), return_index=True)
+            edges = edges[np.sort(first)]
+            if pair_type in matched:
+                edges = edges[~np.isin(_pair_keys(edges), _pair_keys(matched[pair_type]))]
+            result[pair_type] = edges
+        return result
 
     def _preprocess_data(self):
         self.progress_queue.put(("indeterminate", "Step 1: Preparing and cleaning data..."))
-        for nick, formal_list in self.nickname_map.items():
-            std_nick, std_formals = nick.lower().replace('.', '').replace(' ', ''), {f.lower().replace('.', '').replace(' ', '') for f in formal_list}
-            all_names = {std_nick} | std_formals
-            for name in all_names:
-                self.symmetrical_map[name].update(all_names)
+        self.symmetrical_map = self.reference.symmetrical_map if self.reference is not None else _symmetrical_nickname_map(self.nickname_map)
 
-        self.user_df = _precompute_dataframe(self.user_df, self.symmetrical_map)
+        self._load_prior_state()
+        if self._prior is None:
+            self.user_df = _precompute_dataframe(self.user_df, self.symmetrical_map)
+            self._user_block_keys = _row_blocking_keys(self.user_df, self.cancel_token)
+        if self.reference is not None:
+            return
         if self.master_df is not None:
+            # Fingerprinted before precomputing, like the ReferenceIndex does
+            master_fingerprint = self._raw_reference_fingerprints()["user_master"]
             self.master_df = _precompute_dataframe(self.master_df, self.symmetrical_map)
+            self.master_clusters = prepare_master_clusters(self._master_cluster_store, self.master_df, self.symmetrical_map, master_fingerprint,
+                                                           self.cancel_token, self.log_callback, self.execution_backend)
         if self.officials_df is not None:
             self.officials_df = _precompute_dataframe(self.officials_df, self.symmetrical_map)
 
     def _perform_matching(self):
         self.progress_queue.put(("determinate", 0.1, "Step 2: Analyzing for duplicates and official records..."))
+        pass_pipeline = PASS_PIPELINE
+        total_passes = sum(len(funcs) for funcs in pass_pipeline.values())
+        if self.nodes or self.out_of_core:
+            if self._resume_passes_done < total_passes:
+                if self.nodes:
+                    self._perform_partitioned_matching()
+                else:
+                    self._perform_out_of_core_matching()
+                self._checkpoint("match", total_passes)
+            else:
+                self.all_matches = [(f"user_{i}", f"{pair_type.split('_')[1]}_{j}", status, score) for pair_type, edges in self._resume_edges.items() for i, j, status, score in edges]
+            return
         candidate_pools = {}
-        if self.officials_df is not None and not self.officials_df.empty:
-            candidate_pools['user_official'] = _generate_pairs_from_blocks_2_files(self.user_df, self.officials_df)
-        if self.master_df is not None and not self.master_df.empty:
-            candidate_pools['user_master'] = _generate_pairs_from_blocks_2_files(self.user_df, self.master_df)
-        candidate_pools['user_user'] = _generate_pairs_from_blocks(self.user_df)
-
         all_matches, matched_pairs = [], defaultdict(set)
-        pass_pipeline = {
-            'user_official': [compare_records_strict_configurable, compare_records_standard_configurable, compare_records_lenient_configurable],
-            'user_master': [compare_records_strict_configurable, compare_records_standard_configurable],
-            'user_user': [compare_records_strict_configurable, compare_records_standard_configurable]
-        }
+        self.all_matches = all_matches
+        self._init_match_graph()
+        # A resumed run picks up its own edges so far; an incremental run starts from the stored ones
+        seed_edges = self._resume_edges if self._resume_edges is not None else (self._prior["edges"] if self._prior is not None else None)
+        if seed_edges:
+            self._seed_edges(seed_edges, all_matches, matched_pairs)
+        if self._resume_edges is not None:
+            # Already in the match checkpoints; stored prior edges go into the first one
+            self._checkpoint_edges = len(all_matches)
+        if self._resume_edges is None and self._prior is not None:
+            for pair_type, edges in self._prior.get("near_misses", {}).items():
+                self._near_misses[pair_type].append(edges)
 
-        total_passes = sum(len(funcs) for funcs in pass_pipeline.values())
         current_pass = 0
 
         for pair_type, funcs in pass_pipeline.items():
             df1_prefix, df2_prefix = pair_type.split('_')
             df1 = self.user_df if df1_prefix == "user" else self.officials_df
             df2 = {"official": self.officials_df, "master": self.master_df, "user": None}[df2_prefix]
-            if df1 is None or (df2_prefix != "user" and (df2 is None or df2.empty)):
+            if df1 is None or (df2_prefix != "user" and (df2 is None or df2.empty)) or current_pass + len(funcs) <= self._resume_passes_done:
                 current_pass += len(funcs)
                 continue
-            for func in funcs:
+            df2_source = df2_prefix if df2 is not None else df1_prefix
+            if pair_type not in candidate_pools:
+                if pair_type == 'user_official':
+                    candidate_pools[pair_type] = self._candidate_pairs(pair_type)
+                else:
+                    self._generate_later_pools(candidate_pools)
+            for pass_number, func in enumerate(funcs):
+                _raise_if_cancelled(self.cancel_token)
                 current_pass += 1
+                if current_pass <= self._resume_passes_done:
+                    continue
                 progress = 0.1 + (0.6 * (current_pass / total_passes))
                 self.progress_queue.put(("determinate", progress, f"Step 2: Comparing records ({pair_type})..."))
 
-                pairs_to_check = [p for p in candidate_pools.get(pair_type, []) if tuple(sorted(p)) not in matched_pairs[pair_type]]
+                # Pairs keep their (df1 index, df2 index) orientation; sorting them would conflate user 3/master 5 with user 5/master 3
+                deferred = self._budget_deferred[pair_type]
+                pairs_to_check = [p for p in candidate_pools.get(pair_type, []) if p not in matched_pairs[pair_type] and p not in deferred]
+                if pairs_to_check and pass_number > 0 and self.skip_connected_pairs:
+                    pairs_to_check = self._drop_resolved_pairs(pairs_to_check, df1_prefix, df2_source, pair_type)
                 if not pairs_to_check:
                     continue
-                pass_results = _run_parallel_comparison(df1, df2, func, pairs_to_check)
-                for (i, j), status in pass_results:
-                    all_matches.append((f"{df1_prefix}_{i}", f"{df2_prefix if df2 is not None else df1_prefix}_{j}", status))
-                    matched_pairs[pair_type].add(tuple(sorted((i, j))))
-        self.all_matches = all_matches
+                pass_args = (df1, df2, func, pairs_to_check, self.cancel_token, self.log_callback, self.execution_backend,
+                             self.reference.pool if self.reference is not None else None, df2_source)
+                near_misses = self._near_misses[pair_type]
+                if self._deadline is None:
+                    pass_results = _run_parallel_comparison(*pass_args, near_misses=near_misses)
+                else:
+                    pass_results, unscored = _run_parallel_comparison(*pass_args, deadline=self._pass_deadline(total_passes - current_pass + 1), near_misses=near_misses)
+                    self._defer_pairs(pair_type, unscored)
+                ids1, ids2 = self._node_ids(df1_prefix, pass_results["i"]), self._node_ids(df2_source, pass_results["j"])
+                for i, j, code, score, id1, id2 in zip(pass_results["i"].tolist(), pass_results["j"].tolist(), pass_results["status"].tolist(), pass_results["score"].tolist(), ids1.tolist(), ids2.tolist()):
+                    status = MATCH_STATUS_NAMES[code]
+                    all_matches.append((f"{df1_prefix}_{i}", f"{df2_source}_{j}", status, score))
+                    matched_pairs[pair_type].add((i, j))
+                    self.match_graph.union(id1, id2, flag=(status == "Fuzzy Match"))
+                if pair_type == 'user_official' and pass_number == 0:
+                    self.official_resolved_user_indices.update(pass_results["i"].tolist())
+                self._checkpoint("match", current_pass)
+                self._stream_findings()
+        self._checkpoint("match", total_passes)
+        self._stream_findings(force=True)
+        if self.skipped_comparisons:
+            self.log_callback(f"⏭️ Skipped {self.skipped_comparisons} comparisons between records already grouped by earlier matches.")
+        if self._deadline is not None:
+            self._summarize_budget(candidate_pools, matched_pairs)
+
+    def _stream_findings(self, force=False):
+        """Send groups that are new or grew since the last update to the progress queue, at most once per interval."""
+        settings = config.LIVE_FINDINGS_CONFIG
+        if not self.live_findings or (not force and time.monotonic() - self._last_findings_at < settings["min_interval_seconds"]):
+            return
+        self._last_findings_at = time.monotonic()
+        size = len(self.match_graph.parent)
+        if self._announced_sizes is None:
+            self._announced_sizes = np.zeros(size, dtype=np.int64)
+        roots = self.match_graph.roots(np.arange(size))
+        group_sizes = np.bincount(roots, minlength=size)
+        nodes = np.flatnonzero(group_sizes[roots] > 1)
+        if not len(nodes):
+            return
+        order = np.argsort(roots[nodes], kind="stable")
+        nodes, node_roots = nodes[order], roots[nodes[order]]
+        starts = np.flatnonzero(np.r_[True, node_roots[1:] != node_roots[:-1]])
+        # A group is new if none of its records was sent before, grown if it is larger than when it was
+        previous = np.maximum.reduceat(self._announced_sizes[nodes], starts)
+        current = group_sizes[node_roots[starts]]
+        changed = np.flatnonzero(current > previous)
+        counts = {source: np.zeros(len(starts), dtype=np.int64) for source in ROW_SOURCE_IDS}
+        for source, offset in self._node_offsets.items():
+            counts[source] = np.add.reduceat(((nodes >= offset) & (nodes < offset + len(self._node_labels[source]))).astype(np.int64), starts)
+        users, codes = counts["user"], REPORT_SECTION_CODES
+        # A group goes to the first section it qualifies for, as in the report
+        section = np.select([(users > 0) & (counts["official"] > 0), (users > 0) & (counts["master"] > 0), users > 1],
+                            [codes["officials"], codes["linking"], codes["dedupe"]], -1)
+        changed = changed[section[changed] >= 0]
+        self._announced_sizes[nodes] = np.repeat(current, np.diff(np.r_[starts, len(nodes)]))
+        if not len(changed):
+            return
+        changed = changed[np.argsort(section[changed], kind="stable")]
+        shown = changed[:settings["max_groups_per_update"]]
+        bounds = np.r_[starts, len(nodes)]
+        section_names = {code: name for name, code in codes.items()}
+        groups = [self._describe_group(nodes[bounds[g]:bounds[g + 1]], section_names[section[g]], "new" if previous[g] == 0 else "grown")
+                  for g in shown.tolist()]
+        self.progress_queue.put(("findings", {
+            "counts": {"new": int((previous[changed] == 0).sum()), "grown": int((previous[changed] > 0).sum()), "officials": int((section[changed] == codes["officials"]).sum())},
+            "groups": groups, "more": len(changed) - len(shown)
+        }))
+
+    def _describe_group(self, members, section, change, max_rows=6):
+        rows, name = [], None
+        for source, offset in self._node_offsets.items():
+            labels = self._node_labels[source]
+            picked = members[(members >= offset) & (members < offset + len(labels))] - offset
+            rows += [row_label(source, label) for label in labels.take(picked).tolist()]
+            if source == "user" and len(picked):
+                first = self.user_df.loc[labels[picked[0]]]
+                name = " ".join(str(first.get(col, "")) for col in ("First Name", "Last Name") if pd.notna(first.get(col)) and str(first.get(col)))
+        if len(rows) > max_rows:
+            rows = rows[:max_rows] + [f"+{len(rows) - max_rows} more"]
+        return {"section": section, "change": change, "name": name or "-", "rows": rows}
+
+    def _pass_deadline(self, remaining_passes):
+        """An equal share of the time left for each remaining pass; time a pass does not use rolls over."""
+        now = time.monotonic()
+        return now + max(0.0, self._deadline - now) / max(1, remaining_passes)
+
+    def _defer_pairs(self, pair_type, pairs):
+        """Pairs the time budget did not reach skip this run's later passes and go to the next run in full."""
+        if not pairs:
+            return
+        self._budget_deferred[pair_type].update(pairs)
+        self._new_deferred[pair_type].update(pairs)
+        if self.run_state is not None:
+            self._leave_unscored(pair_type, pairs)
+
+    def _leave_unscored(self, pair_type, pairs):
+        """Pairs this run does not score, offered to the next incremental run (and to the next match checkpoint)."""
+        self._unscored_pairs[pair_type].update(pairs)
+        self._new_unscored[pair_type].update(pairs)
+
+    def _summarize_budget(self, candidate_pools, matched_pairs):
+        """Pairs compared and left over, and the estimated share of matches found.
+
+        The estimate applies the match rate seen at each blocking-evidence level to the unscored pairs of
+        that level; a level no pair was scored at borrows the rate of the next stronger one.
+        """
+        total = unscored = found = 0
+        missed, estimable = 0.0, True
+        for pair_type, pairs in candidate_pools.items():
+            evidence, deferred, matched = self._pair_evidence.get(pair_type, {}), self._budget_deferred[pair_type], matched_pairs[pair_type]
+            settled, hits, left = defaultdict(int), defaultdict(int), defaultdict(int)
+            for pair in pairs:
+                weight = evidence.get(pair, 0)
+                if pair in deferred:
+                    left[weight] += 1
+                    continue
+                settled[weight] += 1
+                if pair in matched: hits[weight] += 1
+            levels = sorted(settled)
+            for weight, count in left.items():
+                level = next((l for l in levels if l >= weight), levels[-1] if levels else None)
+                if level is None:
+                    estimable = False
+                else:
+                    missed += count * hits[level] / settled[level]
+            total, unscored, found = total + len(pairs), unscored + sum(left.values()), found + sum(hits.values())
+        coverage = (found / (found + missed) if found + missed else 1.0) if estimable else None
+        self.budget_stats = {"budget_seconds": self.time_budget, "pairs_total": total, "pairs_scored": total - unscored, "pairs_unscored": unscored,
+                             "estimated_coverage": round(coverage, 4) if coverage is not None else None, "complete": unscored == 0}
+        if not unscored:
+            self.log_callback(f"⏱️ Time budget: all {total} candidate pairs compared in time.")
+            return
+        coverage_text = f"~{coverage:.1%} of the expected matches found" if coverage is not None else "coverage could not be estimated"
+        self.log_callback(f"⏱️ Time budget reached: {total - unscored} of {total} candidate pairs compared ({coverage_text}); {unscored} pairs left unscored.")
+        if self.run_state is not None:
+            self.log_callback("⏱️ Run the same file again without a time budget to compare the remaining pairs.")
+        else:
+            self.log_callback("⚠️ Incremental re-runs are off, so the remaining pairs cannot be completed later; a run without a budget compares everything again.")
 
-    def _generate_reports(self):
-        all_nodes = [f"user_{i}" for i in self.user_df.index]
+    def _generate_later_pools(self, candidate_pools):
         if self.master_df is not None and not self.master_df.empty:
-            all_nodes.extend([f"master_{i}" for i in self.master_df.index])
-        if self.officials_df is not None and not self.officials_df.empty:
-            all_nodes.extend([f"official_{i}" for i in self.officials_df.index])
-
-        parent = {node: node for node in all_nodes}
-        def find(i):
-            if parent.get(i, i) == i:
-                return i
-            parent[i] = find(parent[i])
-            return parent[i]
-
-        def union(i, j):
-            root_i, root_j = find(i), find(j)
-            if root_i != root_j:
-                parent[root_j] = root_i
-
-        for node1, node2, _ in self.all_matches:
-            union(node1, node2)
-
-        final_groups_dict = defaultdict(list)
-        for node in all_nodes:
-            final_groups_dict[find(node)].append(node)
-
-        user_involved_groups = {k: v for k, v in final_groups_dict.items() if any(n.startswith("user_") for n in v) and len(v) > 1}
-
-        official_rows, linking_rows, dedupe_rows = [], [], []
-        group_id_counters = {"official": 1, "linking": 1, "dedupe": 1}
-        group_remarks = {k: "Fuzzy Match" if any(s == "Fuzzy Match" for n1, n2, s in self.all_matches if find(n1) == k and find(n2) == k) else "Exact Match" for k in user_involved_groups}
-        sorted_groups = sorted(user_involved_groups.items(), key=lambda item: (0 if any(n.startswith("official_") for n in item[1]) else (1 if any(n.startswith("master_") for n in item[1]) else 2), 0 if group_remarks[item[0]] == "Exact Match" else 1, sorted([int(n.split('_')[1]) for n in item[1] if n.startswith("user_")])[0]))
-        
+            candidate_pools['user_master'] = self._candidate_pairs('user_master')
+        candidate_pools['user_user'] = self._candidate_pairs('user_user')
+        if self.officials_first:
+            self._short_circuit_resolved_users(candidate_pools)
+
+    def _short_circuit_resolved_users(self, candidate_pools):
+        """Officials-first: drop user-user pairs of two rows with a strict official hit that already share a fuzzy group.
+
+        As with _drop_resolved_pairs, scoring such a pair changes neither the group nor its Exact/Fuzzy remark,
+        but here the pairs go before the first user-user pass. A pair with only one resolved row can bring the
+        other row into the official's group, and so can a user-MasterDB pair (through another row matching the
+        same MasterDB record), so those are all scored.
+        """
+        resolved = self.official_resolved_user_indices
+        pairs = candidate_pools.get('user_user')
+        if not resolved or not pairs:
+            return
+        both = [p for p in pairs if p[0] in resolved and p[1] in resolved]
+        dropped = set()
+        if both:
+            both_array = np.asarray(both)
+            ids1, ids2 = self._node_ids("user", both_array[:, 0]), self._node_ids("user", both_array[:, 1])
+            find, flagged = self.match_graph.find, self.match_graph.flagged
+            for pair, id1, id2 in zip(both, ids1.tolist(), ids2.tolist()):
+                root = find(id1)
+                if root == find(id2) and flagged[root]:
+                    dropped.add(pair)
+        if dropped:
+            candidate_pools['user_user'] = [p for p in pairs if p not in dropped]
+            if self.run_state is not None:
+                self._leave_unscored('user_user', dropped)
+        removed, saved = len(dropped), len(dropped) * len(PASS_PIPELINE['user_user'])
+        self.short_circuit_stats = {"resolved_user_rows": len(resolved), "candidate_pairs_removed": removed, "comparisons_saved": saved}
+        self.log_callback(f"⏭️ Officials-first: {len(resolved)} user rows already matched to an official; {removed} candidate pairs removed (up to {saved} comparisons saved).")
+
+    def _candidate_pairs(self, pair_type):
+        """Blocked candidate pairs; incremental runs only pair new or modified rows, plus earlier unscored pairs.
+
+        Under a time budget the pairs come ranked by the weight of the blocking keys they share.
+        """
+        prior = self._prior if self._prior is not None and pair_type in self._prior["reusable"] else None
+        evidence = defaultdict(int) if self._deadline is not None else None
+        if pair_type == 'user_user':
+            pairs = _generate_pairs_from_blocks(self.user_df, self.cancel_token, row_keys=self._user_block_keys, focus=prior["changed"] if prior else None, evidence=evidence)
+        else:
+            source = 'official' if pair_type == 'user_official' else 'master'
+            df2 = self.officials_df if source == 'official' else self.master_df
+            user_df = self.user_df.loc[prior["changed_list"]] if prior else self.user_df
+            index2 = self.reference.indexes.get(source) if self.reference is not None else None
+            pairs = _generate_pairs_from_blocks_2_files(user_df, df2, self.cancel_token, row_keys=self._user_block_keys, index2=index2, evidence=evidence)
+        if prior and prior["pending"].get(pair_type):
+            pairs = list(set(pairs).union(prior["pending"][pair_type]))
+        if evidence is not None:
+            self._pair_evidence[pair_type] = evidence
+            pairs = _rank_pairs(pairs, evidence)
+        return pairs
+
+    def _raw_reference_fingerprints(self):
+        """frame_fingerprint of each reference table as loaded, before it is precomputed; hashed once per run."""
+        if self._reference_fingerprints is None:
+            if self.reference is not None:
+                self._reference_fingerprints = dict(self.reference.fingerprints)
+            else:
+                self._reference_fingerprints = {"user_official": frame_fingerprint(self.officials_df), "user_master": frame_fingerprint(self.master_df)}
+        return self._reference_fingerprints
+
+    def _load_prior_state(self):
+        """Reuse features, blocking keys and edges of rows unchanged since this lineage's last run."""
+        if self.run_state is None:
+            return
+        self._record_keys = record_keys(self.user_df)
+        self._raw_reference_fingerprints()
+        self._matching_fingerprint = matching_fingerprint(self.symmetrical_map)
+        state = self.run_state.load(self.lineage)
+        if state is None or state["matching"] != self._matching_fingerprint:
+            return
+        old_positions = {key: pos for pos, key in enumerate(state["keys"])}
+        labels = self.user_df.index
+        matched = [(label, old_positions.get(key)) for label, key in zip(labels, self._record_keys)]
+        label_of = {pos: label for label, pos in matched if pos is not None}
+        if not label_of:
+            return
+        changed_list = [label for label, pos in matched if pos is None]
+
+        opt_cols = [c for c in _MATCH_FIELDS if c.startswith('_opt_')]
+        stored_features = state["features"].iloc[list(label_of)].set_axis(pd.Index(list(label_of.values())))
+        frames = [stored_features]
+        if changed_list:
+            frames.append(_precompute_dataframe(self.user_df.loc[changed_list].copy(), self.symmetrical_map)[opt_cols])
+        features = pd.concat(frames).reindex(labels)
+        for col in opt_cols:
+            self.user_df[col] = features[col]
+        self._user_block_keys = {label: state["block_keys"][pos] for pos, label in label_of.items()}
+        if changed_list:
+            self._user_block_keys.update(_row_blocking_keys(self.user_df.loc[changed_list], self.cancel_token))
+
+        reusable = {'user_user'} | {t for t, fp in self._reference_fingerprints.items() if fp is not None and state["reference"].get(t) == fp}
+        edges, pending, near_misses = {}, {}, {}
+        for pair_type in reusable:
+            # b is a stored row position for user_user, and a master/official index otherwise
+            both_rows = pair_type == 'user_user'
+            known = lambda a, b: a in label_of and (not both_rows or b in label_of)
+            stored = state["edges"].get(pair_type)
+            if stored is not None and len(stored):
+                edges[pair_type] = [(label_of[a], label_of[b] if both_rows else b, MATCH_STATUS_NAMES[code], score)
+                                    for a, b, code, score in zip(stored["a"].tolist(), stored["b"].tolist(), stored["status"].tolist(), stored["score"].tolist())
+                                    if known(a, b)]
+            stored_pending = state["pending"].get(pair_type)
+            if stored_pending is not None and len(stored_pending):
+                pending[pair_type] = {(label_of[a], label_of[b] if both_rows else b) for a, b in stored_pending.tolist() if known(a, b)}
+            stored_misses = state.get("near_misses", {}).get(pair_type)
+            if stored_misses is not None and len(stored_misses):
+                kept = [(label_of[a], label_of[b] if both_rows else b, code, score)
+                        for a, b, code, score in zip(stored_misses["a"].tolist(), stored_misses["b"].tolist(), stored_misses["status"].tolist(), stored_misses["score"].tolist())
+                        if known(a, b)]
+                near_misses[pair_type] = np.array(kept, dtype=MATCH_EDGE_DTYPE)
+        self._prior = {"changed": set(changed_list), "changed_list": changed_list, "reusable": reusable, "edges": edges, "pending": pending,
+                       "near_misses": near_misses}
+        self.log_callback(f"♻️ Incremental run: {len(label_of)} of {len(labels)} rows unchanged since the last submission; "
+                          f"{len(changed_list)} new or modified rows will be compared.")
+        for pair_type, name in (("user_master", "MasterDB"), ("user_official", "OfficialsDB")):
+            if self._reference_fingerprints[pair_type] is not None and pair_type not in reusable:
+                self.log_callback(f"♻️ {name} changed since the last run; all rows are compared against it again.")
+
+    def _seed_edges(self, edges_by_type, all_matches, matched_pairs):
+        """Add edges found before this run's passes (stored or checkpointed) to the match graph."""
+        for pair_type, edges in edges_by_type.items():
+            source2 = pair_type.split('_')[1]
+            ids1 = self._node_ids("user", [e[0] for e in edges])
+            ids2 = self._node_ids(source2, [e[1] for e in edges])
+            for (i, j, status, score), id1, id2 in zip(edges, ids1.tolist(), ids2.tolist()):
+                all_matches.append((f"user_{i}", f"{source2}_{j}", status, score))
+                matched_pairs[pair_type].add((i, j))
+                self.match_graph.union(id1, id2, flag=(status == "Fuzzy Match"))
+                if pair_type == 'user_official' and status == "Exact Match":
+                    self.official_resolved_user_indices.add(i)
+
+    def _save_run_state(self):
+        """Persist this run's features, blocking keys and accepted edges for the next submission of the list."""
+        if self.run_state is None:
+            return
+        position = {label: pos for pos, label in enumerate(self.user_df.index)}
+        opt_cols = [c for c in _MATCH_FIELDS if c.startswith('_opt_')]
+        def stored(edges_by_type):
+            result = {}
+            for pair_type, matches in edges_by_type.items():
+                arr = np.empty(len(matches), dtype=RUN_STATE_EDGE_DTYPE)
+                arr["a"] = [position[i] for i in matches["i"].tolist()]
+                arr["b"] = [position[j] for j in matches["j"].tolist()] if pair_type == 'user_user' else matches["j"]
+                arr["status"], arr["score"] = matches["status"], matches["score"]
+                result[pair_type] = arr
+            return result
+        pending = {pair_type: np.array([(position[i], position[j] if pair_type == 'user_user' else j) for i, j in pairs], dtype=np.int64).reshape(-1, 2)
+                   for pair_type, pairs in self._unscored_pairs.items()}
+        state = {
+            "matching": self._matching_fingerprint, "reference": self._reference_fingerprints, "keys": self._record_keys,
+            "features": self.user_df[opt_cols].reset_index(drop=True), "block_keys": [self._user_block_keys[label] for label in self.user_df.index],
+            "edges": stored(self._edges_by_pair_type()), "pending": pending, "near_misses": stored(self._near_miss_edges())
+        }
+        try:
+            self.run_state.save(self.lineage, state)
+        except OSError as e:
+            logging.warning("Could not save run state: %s", e)
+            self.log_callback(f"⚠️ Could not save incremental state for this file: {e}")
+
+    def _save_artifact(self):
+        """Write this run's edges and near misses (with tiers), group members and provenance for later tools."""
+        if self.artifacts is None or self.group_members is None:
+            return
+        fields, parts = {}, []
+        near_misses = self._near_miss_edges()
+        for pair_type, edges in self._edges_by_pair_type().items():
+            if pair_type in near_misses:
+                edges = np.concatenate([edges, near_misses.pop(pair_type)])
+            parts.append(self._artifact_edges(pair_type, edges, fields))
+        parts.extend(self._artifact_edges(pair_type, edges, fields) for pair_type, edges in near_misses.items())
+        meta = {
+            "lineage": self.lineage, "user_file": str(self.user_filepath), "province": self.province_name, "run_key": self.run_key,
+            "started": self.start_time.isoformat() if hasattr(self.start_time, "isoformat") else self.start_time,
+            "app_version": config.APP_VERSION, "matching": config.ADAPTIVE_MATCHING_CONFIG,
+            "near_miss_floor": config.THRESHOLD_SWEEP_CONFIG["min_stored_score"] if config.THRESHOLD_SWEEP_CONFIG["store_near_misses"] else None,
+            "skip_connected_pairs": self.skip_connected_pairs, "officials_first": self.officials_first,
+            "records": {source: len(df) for source, df in (("user", self.user_df), ("master", self.master_df), ("official", self.officials_df)) if df is not None},
+            "complete": self.budget_stats is None or self.budget_stats["complete"]
+        }
+        edges = np.concatenate(parts) if parts else np.empty(0, dtype=ARTIFACT_EDGE_DTYPE)
+        try:
+            self.artifacts.save(self.lineage, edges, self.group_members, self._artifact_clusters(edges), meta)
+        except OSError as e:
+            logging.warning("Could not save match artifact: %s", e)
+            self.log_callback(f"⚠️ Could not save the match artifact for this file: {e}")
+
+    def _artifact_clusters(self, edges):
+        """ARTIFACT_CLUSTER_DTYPE members of the MasterDB duplicate clusters that any MasterDB record in edges belongs to."""
+        clusters = np.empty(0, dtype=ARTIFACT_CLUSTER_DTYPE)
+        if self.master_clusters is None:
+            return clusters
+        master = ROW_SOURCE_IDS["master"]
+        labels = np.concatenate([edges["index1"][edges["source1"] == master], edges["index2"][edges["source2"] == master]])
+        hit = np.unique(self.master_clusters["cluster"][np.isin(self.master_clusters["index"], labels)])
+        members = np.isin(self.master_clusters["cluster"], hit)
+        clusters = np.empty(int(members.sum()), dtype=ARTIFACT_CLUSTER_DTYPE)
+        clusters["index"], clusters["cluster"] = self.master_clusters["index"][members], self.master_clusters["cluster"][members]
+        return clusters
+
+    def _artifact_edges(self, pair_type, edges, fields):
+        """MATCH_EDGE_DTYPE edges of one pair type as ARTIFACT_EDGE_DTYPE rows; fields caches _discriminating_fields per source."""
+        source1, source2 = pair_type.split('_')
+        frames = {"user": self.user_df, "master": self.master_df, "official": self.officials_df}
+        for source in (source1, source2):
+            if source not in fields: fields[source] = _discriminating_fields(frames[source])
+        present1, present2 = fields[source1].reindex(edges["i"]).to_numpy(), fields[source2].reindex(edges["j"]).to_numpy()
+        arr = np.empty(len(edges), dtype=ARTIFACT_EDGE_DTYPE)
+        arr["source1"], arr["index1"], arr["source2"], arr["index2"] = ROW_SOURCE_IDS[source1], edges["i"], ROW_SOURCE_IDS[source2], edges["j"]
+        arr["status"], arr["score"], arr["name_only"] = edges["status"], edges["score"], ~(present1 & present2).any(axis=1)
+        # The strictest pass an edge cleared (passes run strictest first); near misses have none
+        arr["tier"] = np.where(edges["status"] == MATCH_STATUS_CODES["Exact Match"], ARTIFACT_TIER_CODES["strict"], ARTIFACT_TIER_CODES["standard"])
+        arr["tier"][(edges["status"] == MATCH_STATUS_CODES["No Match"]) | np.isnan(edges["score"])] = -1
+        if compare_records_lenient_configurable in PASS_PIPELINE.get(pair_type, []):
+            below_standard = edges["score"] < tier_thresholds("standard", arr["name_only"]).astype(np.float32)
+            arr["tier"][(arr["tier"] == ARTIFACT_TIER_CODES["standard"]) & below_standard] = ARTIFACT_TIER_CODES["lenient"]
+        return arr
+
+    def _init_match_graph(self):
+        """Number every record across the sources so matches can be tracked in an integer union-find."""
+        self._node_offsets, self._node_labels = {}, {}
+        offset = 0
+        for source, df in (("user", self.user_df), ("master", self.master_df), ("official", self.officials_df)):
+            if df is None or df.empty: continue
+            self._node_offsets[source], self._node_labels[source] = offset, df.index
+            offset += len(df)
+        self.match_graph = _UnionFind(offset)
+
+    def _node_ids(self, source, labels):
+        return self._node_labels[source].get_indexer(np.asarray(labels)) + self._node_offsets[source]
+
+    def _drop_resolved_pairs(self, pairs, source1, source2, pair_type):
+        """Remove pairs whose records already share a group that contains a fuzzy edge.
+
+        Scoring them can neither change group membership nor the group's Exact/Fuzzy remark, so the
+        report is unchanged; groups joined only by exact edges are still scored in case a fuzzy edge appears.
+        """
+        pair_array = np.asarray(pairs)
+        ids1, ids2 = self._node_ids(source1, pair_array[:, 0]), self._node_ids(source2, pair_array[:, 1])
+        find, flagged = self.match_graph.find, self.match_graph.flagged
+        kept = []
+        for pair, id1, id2 in zip(pairs, ids1.tolist(), ids2.tolist()):
+            root = find(id1)
+            if root == find(id2) and flagged[root]: continue
+            kept.append(pair)
+        skipped = len(pairs) - len(kept)
+        if skipped:
+            if self.run_state is not None:
+                # Offered again to the next incremental run, where the rows that connected them may be gone
+                self._leave_unscored(pair_type, set(pairs).difference(kept))
+            self.skipped_comparisons += skipped
+            logging.info("%s: skipped %d of %d comparisons already resolved by the union-find", pair_type, skipped, len(pairs))
+        return kept
+
+    def _perform_partitioned_matching(self):
+        """Hash-partition the blocking keys across self.nodes and merge the edges they return."""
+        from distributed import run_partitioned_matching
+        self.progress_queue.put(("determinate", 0.2, f"Step 2: Comparing records on {len(self.nodes)} nodes..."))
+        self.log_callback(f"🌐 Distributing blocking keys across {len(self.nodes)} matching nodes...")
+        self.all_matches = run_partitioned_matching(self.user_df, self.master_df, self.officials_df, self.nodes, cancel_token=self.cancel_token, log_callback=self.log_callback)
+        self.progress_queue.put(("determinate", 0.7, "Step 2: Merging node results..."))
+
+    def _perform_out_of_core_matching(self):
+        """Score every pair type from a scratch SQLite database, in bounded memory (out_of_core.py)."""
+        from out_of_core import run_out_of_core_matching
+        self.progress_queue.put(("determinate", 0.2, "Step 2: Comparing records from disk (out-of-core)..."))
+        self.log_callback("💽 Out-of-core matching: streaming blocks from a scratch database on disk...")
+        self.all_matches = run_out_of_core_matching(self.user_df, self.master_df, self.officials_df, self._near_misses,
+                                                    cancel_token=self.cancel_token, log_callback=self.log_callback)
+        self.progress_queue.put(("determinate", 0.7, "Step 2: Reading matches back from disk..."))
+
+    def _generate_reports(self):
+        # Integer union-find over every record; a group is flagged as soon as one of its edges is fuzzy
+        self._init_match_graph()
+        graph, ids1, ids2, fuzzy_edges, scores = self.match_graph, [], [], [], []
+        for pair_type, edges in self._edges_by_pair_type().items():
+            source1, source2 = pair_type.split('_')
+            ids1.append(self._node_ids(source1, edges["i"]))
+            ids2.append(self._node_ids(source2, edges["j"]))
+            fuzzy_edges.append(edges["status"] == MATCH_STATUS_CODES["Fuzzy Match"])
+            scores.append(edges["score"])
+        ids1, ids2, fuzzy_edges, scores = (np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+                                           for parts, dtype in ((ids1, np.int64), (ids2, np.int64), (fuzzy_edges, bool), (scores, np.float64)))
+        split_stats = None
+        if config.CLUSTER_SPLIT_CONFIG["enabled"]:
+            settings = config.CLUSTER_SPLIT_CONFIG
+            keep, split_stats = _split_overmerged(ids1, ids2, fuzzy_edges, scores, settings["min_group_size"],
+                                                  settings["min_part_size"], settings["max_cost"])
+            ids1, ids2, fuzzy_edges = ids1[keep], ids2[keep], fuzzy_edges[keep]
+        if self.master_clusters is not None and "master" in self._node_offsets:
+            cluster_ids1, cluster_ids2, cluster_fuzzy = self._master_cluster_edges(np.concatenate([ids1, ids2]))
+            ids1, ids2, fuzzy_edges = np.concatenate([ids1, cluster_ids1]), np.concatenate([ids2, cluster_ids2]), np.concatenate([fuzzy_edges, cluster_fuzzy])
+        graph.union_all(ids1.tolist(), ids2.tolist(), fuzzy_edges.tolist())
+
+        # Only records with an edge can be in a group of two or more. Per record: group, source
+        # (coded in name order: master, official, user) and index label
+        nodes = np.unique(np.concatenate([ids1, ids2]))
+        group_roots, group_of = np.unique(graph.roots(nodes), return_inverse=True)
+        if split_stats is not None:
+            self._log_split(split_stats, np.bincount(group_of))
+        source_names = sorted(self._node_offsets)
+        source_codes, labels, positions = (np.zeros(len(nodes), dtype=np.int64) for _ in range(3))
+        for code, source in enumerate(source_names):
+            offset, index = self._node_offsets[source], self._node_labels[source]
+            in_source = (nodes >= offset) & (nodes < offset + len(index))
+            source_codes[in_source], positions[in_source] = code, nodes[in_source] - offset
+            labels[in_source] = index.take(positions[in_source])
+
+        # One sort key per group: officials first, then MasterDB links, then duplicates; Exact before Fuzzy; lowest user row
+        no_user = np.iinfo(np.int64).max
+        is_user = source_codes == source_names.index("user") if "user" in source_names else np.zeros(len(nodes), dtype=bool)
+        lowest_user = np.full(len(group_roots), no_user, dtype=np.int64)
+        np.minimum.at(lowest_user, group_of[is_user], labels[is_user])
+        kind = np.full(len(group_roots), 2, dtype=np.int64)
+        np.minimum.at(kind, group_of, np.array([{"official": 0, "master": 1, "user": 2}[name] for name in source_names], dtype=np.int64)[source_codes])
+        fuzzy = np.array([graph.flagged[root] for root in group_roots.tolist()], dtype=bool)
+        order = [g for g in np.lexsort((lowest_user, fuzzy, kind)).tolist() if lowest_user[g] != no_user]
+
+        # Members of each group, by source name then row (report rows are sorted again when saved)
+        member_order = np.lexsort((labels, source_codes, group_of))
+        bounds = np.searchsorted(group_of[member_order], np.arange(len(group_roots) + 1)).tolist()
+        members = list(zip([source_names[c] for c in source_codes[member_order].tolist()], labels[member_order].tolist(), positions[member_order].tolist(), member_order.tolist()))
+        kind, fuzzy = kind.tolist(), fuzzy.tolist()
+        # Every grouped record with its component and, once placed, its report section and group_id
+        self.group_members = np.zeros(len(nodes), dtype=GROUP_MEMBER_DTYPE)
+        self.group_members["source"] = np.array([ROW_SOURCE_IDS[name] for name in source_names], dtype=np.int8)[source_codes]
+        self.group_members["index"], self.group_members["component"], self.group_members["section"] = labels, group_of, -1
+
+        # Section rows as (source, row position, group_id, remark); the frames are assembled once at the end
+        sections = {"officials": [], "linking": [], "dedupe": []}
+        group_id_counters = {"officials": 1, "linking": 1, "dedupe": 1}
         processed_user_indices = set()
-        for group_key, group_members in sorted_groups:
-            user_nodes = {int(n.split('_')[1]) for n in group_members if n.startswith("user_")}
+        for g in order:
+            group_members = members[bounds[g]:bounds[g + 1]]
+            user_nodes = {label for source, label, _, _ in group_members if source == "user"}
             if not user_nodes.isdisjoint(processed_user_indices):
                 continue
-            
-            has_official = any(n.startswith("official_") for n in group_members)
-            has_master = any(n.startswith("master_") for n in group_members)
-
-            if has_official:
-                for node in sorted(group_members):
-                    source, idx_str = node.split('_'); idx = int(idx_str)
-                    df = self.user_df if source == 'user' else (self.officials_df if source == 'official' else None)
-                    if df is not None:
-                        official_rows.append({**df.loc[idx].to_dict(), "group_id": group_id_counters["official"], "Row": f"{'userfile' if source == 'user' else 'official'} {idx + 2}", "Remarks": "Official"})
-                self.official_user_indices.update(user_nodes)
-                group_id_counters["official"] += 1
-            elif has_master:
-                for node in sorted(group_members):
-                    source, idx_str = node.split('_'); idx = int(idx_str)
-                    df = self.user_df if source == 'user' else (self.master_df if source == 'master' else None)
-                    if df is not None:
-                        linking_rows.append({**df.loc[idx].to_dict(), "group_id": group_id_counters["linking"], "Row": f"{'userfile' if source == 'user' else 'masterdb'} {idx + 2}", "Remarks": group_remarks[group_key]})
-                self.linked_user_indices.update(user_nodes)
-                group_id_counters["linking"] += 1
+
+            remark = "Fuzzy Match" if fuzzy[g] else "Exact Match"
+            if kind[g] == 0:
+                section, kept, remark, found = "officials", ("user", "official"), "Official", self.official_user_indices
+            elif kind[g] == 1:
+                section, kept, found = "linking", ("user", "master"), self.linked_user_indices
             elif len(user_nodes) > 1:
-                for node in sorted(group_members):
-                    source, idx_str = node.split('_'); idx = int(idx_str)
-                    if source == 'user':
-                        dedupe_rows.append({**self.user_df.loc[idx].to_dict(), "group_id": group_id_counters["dedupe"], "Row": f"userfile {idx + 2}", "Remarks": group_remarks[group_key]})
-                self.duplicate_user_indices.update(user_nodes)
-                group_id_counters["dedupe"] += 1
-            
+                section, kept, found = "dedupe", ("user",), self.duplicate_user_indices
+            else:
+                section = None
+            if section is not None:
+                group_id = group_id_counters[section]
+                shown = [(source, position, node) for source, _, position, node in group_members if source in kept]
+                sections[section].extend((source, position, group_id, remark) for source, position, _ in shown)
+                placed = [node for _, _, node in shown]
+                self.group_members["section"][placed], self.group_members["group_id"][placed] = REPORT_SECTION_CODES[section], group_id
+                found.update(user_nodes)
+                group_id_counters[section] += 1
+
             processed_user_indices.update(user_nodes)
 
-        self.reports["officials"], self.reports["linking"], self.reports["dedupe"] = pd.DataFrame(official_rows), pd.DataFrame(linking_rows), pd.DataFrame(dedupe_rows)
+        frames = {"user": self.user_df, "master": self.master_df, "official": self.officials_df}
+        for section, rows in sections.items():
+            self.reports[section] = _assemble_section(rows, frames)
+
+    def _master_cluster_edges(self, node_ids):
+        """Edges joining every matched MasterDB record to the rest of its stored duplicate cluster."""
+        clusters = self.master_clusters
+        offset, labels = self._node_offsets["master"], self._node_labels["master"]
+        masters = node_ids[(node_ids >= offset) & (node_ids < offset + len(labels))]
+        hit = np.unique(clusters["cluster"][np.isin(clusters["index"], labels.take(masters - offset))])
+        members = np.isin(clusters["cluster"], hit)
+        member_ids = offset + labels.get_indexer(clusters["index"][members])
+        member_clusters = clusters["cluster"][members]
+        # Each member is joined to the first member of its cluster
+        _, first, inverse = np.unique(member_clusters, return_index=True, return_inverse=True)
+        anchors = member_ids[first][inverse]
+        joined = member_ids != anchors
+        pulled = len(np.setdiff1d(member_ids, masters))
+        if pulled:
+            self.log_callback(f"🔗 Added {pulled:,} MasterDB records from {len(hit):,} duplicate clusters of linked MasterDB records.")
+        return anchors[joined], member_ids[joined], clusters["fuzzy"][member_clusters[joined]]
+
+    def _log_split(self, stats, group_sizes):
+        min_size = config.CLUSTER_SPLIT_CONFIG["min_group_size"]
+        largest_after = int(group_sizes.max()) if len(group_sizes) else 0
+        self.log_callback(f"✂️ Group splitting: largest group {stats['largest_before']} records, {stats['groups_over']} over {min_size}, before splitting.")
+        self.log_callback(f"✂️ Cut {stats['edges_cut']:,} weak fuzzy links; largest group now {largest_after} records, "
+                          f"{int((group_sizes > min_size).sum())} over {min_size}.")
+        if stats["groups_left"]:
+            self.log_callback(f"⚠️ Splitting cost cap reached: {stats['groups_left']} large group(s) kept whole.")
 
     def _save_results(self):
         self.progress_queue.put(("determinate", 0.8, "Step 3: Compiling findings into report file..."))
@@ -631,10 +2103,10 @@ class AnalysisEngine:
             if not df.empty:
                 opt_cols = [c for c in df.columns if c.startswith('_opt_')]
                 df.drop(columns=opt_cols, inplace=True, errors='ignore')
-                df.sort_values(by=['group_id', 'Row'], inplace=True)
+                df.sort_values(by=['group_id', ROW_SOURCE_COL, ROW_INDEX_COL], inplace=True)
                 df['group_id'] = (df['group_id'] != df['group_id'].shift()).cumsum()
-                # Base ordering starts with group and row
-                base_cols = ["group_id", "Row"]
+                # Base ordering starts with group and row (the provenance columns become 'Row' when written)
+                base_cols = ["group_id", ROW_SOURCE_COL, ROW_INDEX_COL]
                 # For linking section, insert optional informational 'Batch Name' immediately after 'Row' if present
                 if key == "linking" and "Batch Name" in df.columns:
                     base_cols.append("Batch Name")
@@ -680,7 +2152,7 @@ class AnalysisEngine:
 
         final_output_path = excel_output_path
         
-        excel_generation_success = generate_excel_report(self.reports, self.user_df, self.user_filepath, excel_output_path, self.start_time, end_time, self.summary_stats, self.master_df, self.officials_df, self.official_user_indices, (self.linked_user_indices | self.duplicate_user_indices))
+        excel_generation_success = generate_excel_report(self.reports, self.user_df, self.user_filepath, excel_output_path, self.start_time, end_time, self.summary_stats, self.master_df, self.officials_df, self.official_user_indices, (self.linked_user_indices | self.duplicate_user_indices), self.budget_stats)
         
         if not excel_generation_success:
             self.log_callback(f"❌ FILE LOCKED: Could not save report to {excel_output_path}.")
@@ -703,6 +2175,8 @@ class AnalysisEngine:
         self.progress_queue.put(("determinate", 1.0, "Step 4: Finalizing analysis..."))
         summary_table_data = create_summary_section(self.summary_stats, self.user_df, self.master_df, self.officials_df)
         summary_lines = [f"--- Summary Report ---\nScan Started:   {self.start_time:%Y-%m-%d %H:%M:%S}\nScan Finished:  {end_time:%Y-%m-%d %H:%M:%S}\nTotal Duration: {format_duration((end_time - self.start_time).total_seconds())}\n"]
+        if self.budget_stats:
+            summary_lines.extend([f"{label.ljust(22)}{value}" for label, value in budget_summary_rows(self.budget_stats)] + [""])
         if summary_table_data:
             headers = ["Analysis Section", "Total Scanned", "Names Found"]
             col_widths = [max(len(str(h)), max((len(str(row[i])) for row in summary_table_data), default=0)) for i, h in enumerate(headers)]
@@ -716,14 +2190,30 @@ class AnalysisEngine:
                     summary_lines.append(" | ".join([str(cell).ljust(w) if j==0 else str(cell).rjust(w) for j, (cell, w) in enumerate(zip(row, col_widths))]))
         
         self.log_callback("\n" + "\n".join(summary_lines))
+        self.report_saved = True
         self.final_report_callback(final_output_path)
         self.status_callback("main", "Analysis complete. Report saved.", "success")
 
-def run_analysis(user_df, master_df, officials_df, nickname_map, user_filepath, province_name, log_callback, status_callback, start_time, final_report_callback, progress_queue):
-    engine = AnalysisEngine(user_df, master_df, officials_df, nickname_map, user_filepath, province_name, log_callback, status_callback, start_time, final_report_callback, progress_queue)
+def run_analysis(user_df, master_df, officials_df, nickname_map, user_filepath, province_name, log_callback, status_callback, start_time, final_report_callback, progress_queue, cancel_token=None, execution_backend=None, nodes=None, run_state=None, checkpoints=None, reference=None, time_budget=None, artifacts=None, master_clusters=None, out_of_core=None):
+    engine = AnalysisEngine(user_df, master_df, officials_df, nickname_map, user_filepath, province_name, log_callback, status_callback, start_time, final_report_callback, progress_queue, cancel_token, execution_backend, nodes, run_state, checkpoints, reference, time_budget, artifacts, master_clusters, out_of_core)
     engine.run_analysis()
+    return engine
+
+def budget_summary_rows(budget_stats):
+    """(label, value) rows describing a time-budgeted run, for the report and the log summary."""
+    total, scored = budget_stats["pairs_total"], budget_stats["pairs_scored"]
+    coverage = budget_stats["estimated_coverage"]
+    rows = [
+        ("Time Budget:", f"{format_duration(budget_stats['budget_seconds'])} ({'all pairs compared' if budget_stats['complete'] else 'partial result'})"),
+        ("Pairs Compared:", f"{scored:,} of {total:,} ({scored / total:.1%})" if total else "0 of 0"),
+        ("Pairs Left Unscored:", f"{budget_stats['pairs_unscored']:,}"),
+        ("Est. Match Coverage:", f"~{coverage:.1%}" if coverage is not None else "not estimated")
+    ]
+    if not budget_stats["complete"]:
+        rows.append(("", "Run the file again without a time budget to compare the remaining pairs."))
+    return rows
 
-def generate_excel_report(reports, user_df, user_filepath, output_filename, start_time, end_time, summary_stats, master_df, officials_df, official_user_indices, chart_duplicate_indices):
+def generate_excel_report(reports, user_df, user_filepath, output_filename, start_time, end_time, summary_stats, master_df, officials_df, official_user_indices, chart_duplicate_indices, budget_stats=None):
     if user_df is not None and not user_df.empty: user_df.fillna('', inplace=True)
     for key in reports:
         if reports[key] is not None and not reports[key].empty: reports[key] = reports[key].fillna('')
@@ -733,7 +2223,7 @@ def generate_excel_report(reports, user_df, user_filepath, output_filename, star
     summary_table_data = create_summary_section(summary_stats, user_df, master_df, officials_df)
     create_dashboard_sheet(wb.create_sheet("Dashboard", 0), reports, user_df, user_filepath, start_time, end_time, summary_stats, official_user_indices, chart_duplicate_indices)
     create_user_data_sheet(wb.create_sheet("User File Data", 1), user_df, reports, official_user_indices)
-    create_analysis_report_sheet(wb.create_sheet("Analysis Report", 2), reports, user_filepath, start_time, end_time, summary_stats, user_df, master_df, officials_df, summary_table_data)
+    create_analysis_report_sheet(wb.create_sheet("Analysis Report", 2), {key: _with_row_labels(df) for key, df in reports.items()}, user_filepath, start_time, end_time, summary_stats, user_df, master_df, officials_df, summary_table_data, budget_stats)
     try:
         wb.save(output_filename)
         return True
@@ -746,9 +2236,9 @@ def create_dashboard_sheet(ws, reports, user_df, user_filepath, start_time, end_
     exact_matches_count, fuzzy_matches_count = 0, 0
     all_duplicates_df = pd.concat([reports.get("linking", pd.DataFrame()), reports.get("dedupe", pd.DataFrame())], ignore_index=True)
     if not all_duplicates_df.empty and chart_duplicate_indices:
-        user_rows_in_dupes = all_duplicates_df[all_duplicates_df['Row'].str.startswith('userfile', na=False)].copy()
+        user_rows_in_dupes = all_duplicates_df[all_duplicates_df[ROW_SOURCE_COL] == ROW_SOURCE_IDS["user"]].copy()
         if not user_rows_in_dupes.empty:
-            user_rows_in_dupes['original_index'] = user_rows_in_dupes['Row'].str.extract(r'(\d+)$', expand=False).astype(int) - 2
+            user_rows_in_dupes['original_index'] = user_rows_in_dupes[ROW_INDEX_COL]
             chart_records = user_rows_in_dupes[user_rows_in_dupes['original_index'].isin(chart_duplicate_indices)]
             if not chart_records.empty:
                 group_remark_map = all_duplicates_df.drop_duplicates(subset=['group_id']).set_index('group_id')['Remarks']
@@ -761,7 +2251,7 @@ def create_dashboard_sheet(ws, reports, user_df, user_filepath, start_time, end_
     if not all_findings_df.empty:
         city_col = 'City' if 'City' in all_findings_df.columns else None
         if city_col:
-            user_records_in_findings = all_findings_df[all_findings_df['Row'].str.startswith('userfile', na=False)]
+            user_records_in_findings = all_findings_df[all_findings_df[ROW_SOURCE_COL] == ROW_SOURCE_IDS["user"]]
             if not user_records_in_findings.empty:
                 top_cities = user_records_in_findings[city_col].fillna('Unknown').value_counts().nlargest(5)
     kpi_value_font, kpi_title_font, chart_header_font = Font(name='Calibri', size=26, bold=True), Font(name='Calibri', size=12, bold=True), Font(name='Calibri', size=12, bold=True)
@@ -922,14 +2412,11 @@ def create_user_data_sheet(ws, user_df, reports, official_user_indices):
     exact_dupe_indices, fuzzy_dupe_indices = set(), set()
     all_duplicates = pd.concat([reports.get("dedupe", pd.DataFrame()), reports.get("linking", pd.DataFrame())], ignore_index=True)
     if not all_duplicates.empty:
-        for _, row in all_duplicates.iterrows():
-            if 'userfile' not in str(row.get('Row', '')): continue
-            match = re.search(r'(\d+)$', str(row.get('Row', '')))
-            if match:
-                original_index = int(match.group(1)) - 2
-                if original_index >= 0:
-                    if "Exact Match" in str(row.get('Remarks', '')): exact_dupe_indices.add(original_index)
-                    elif "Fuzzy Match" in str(row.get('Remarks', '')): fuzzy_dupe_indices.add(original_index)
+        user_rows = all_duplicates[all_duplicates[ROW_SOURCE_COL] == ROW_SOURCE_IDS["user"]]
+        remarks = user_rows['Remarks'].astype(str)
+        exact = remarks.str.contains("Exact Match", regex=False)
+        exact_dupe_indices = set(user_rows.loc[exact, ROW_INDEX_COL].tolist())
+        fuzzy_dupe_indices = set(user_rows.loc[~exact & remarks.str.contains("Fuzzy Match", regex=False), ROW_INDEX_COL].tolist())
     if user_df is not None:
         df_to_write = user_df.copy()
         df_to_write['Legend'] = ''
@@ -987,7 +2474,7 @@ def create_user_data_sheet(ws, user_df, reports, official_user_indices):
     if sex_col_letter_user_sheet:
         ws.column_dimensions[sex_col_letter_user_sheet].width = 7
 
-def create_analysis_report_sheet(ws, reports, user_filepath, start_time, end_time, summary_stats, user_df, master_df, officials_df, summary_table_data):
+def create_analysis_report_sheet(ws, reports, user_filepath, start_time, end_time, summary_stats, user_df, master_df, officials_df, summary_table_data, budget_stats=None):
     current_row, user_filename, center_align = 1, os.path.basename(user_filepath), Alignment(horizontal='center', vertical='center')
     thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
     # Track section ranges to apply custom column width rules later
@@ -1069,6 +2556,10 @@ def create_analysis_report_sheet(ws, reports, user_filepath, start_time, end_tim
     ws.cell(row=current_row, column=1, value="Scan Started:"), ws.cell(row=current_row, column=2, value=start_time.strftime("%Y-%m-%d %H:%M:%S")); current_row += 1
     ws.cell(row=current_row, column=1, value="Scan Finished:"), ws.cell(row=current_row, column=2, value=end_time.strftime("%Y-%m-%d %H:%M:%S")); current_row += 1
     ws.cell(row=current_row, column=1, value="Total Duration:"), ws.cell(row=current_row, column=2, value=format_duration((end_time - start_time).total_seconds())); current_row += 2
+    if budget_stats:
+        for label, value in budget_summary_rows(budget_stats):
+            ws.cell(row=current_row, column=1, value=label or None), ws.cell(row=current_row, column=2, value=value); current_row += 1
+        current_row += 1
     
     if summary_table_data:
         headers = ["Analysis Section", "Total Scanned", "Names Found"]
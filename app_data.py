@@ -0,0 +1,73 @@
+# app_data.py
+# Local cache locations and window preferences. Kept free of GUI imports so the headless entry points can use it.
+
+import json
+import os
+import time
+from pathlib import Path
+
+from config import PROVINCE_PROFILES
+
+class AppData:
+    def __init__(self, province_name):
+        self.data_dir = Path.home() / ".splink_master_checker"
+        self.data_dir.mkdir(exist_ok=True)
+        
+        # Get the province config, defaulting to Oriental Mindoro if not found
+        province_config = PROVINCE_PROFILES.get(province_name, PROVINCE_PROFILES["Oriental Mindoro"])
+        
+        # Use dot notation to access dataclass attributes
+        master_filename = os.path.basename(province_config.urls.master_db)
+        officials_filename = os.path.basename(province_config.urls.officials)
+        
+        self.master_db_path = self.data_dir / master_filename
+        self.master_db_meta_path = self.data_dir / f"{master_filename}.meta"
+        self.master_clusters_path = self.data_dir / f"{master_filename}.clusters"
+        self.officials_db_path = self.data_dir / officials_filename
+        self.officials_db_meta_path = self.data_dir / f"{officials_filename}.meta"
+        
+        self.nickname_path = self.data_dir / "Nicknames.csv"
+        self.nickname_meta_path = self.data_dir / "Nicknames.csv.meta"
+        
+        self.window_prefs_path = self.data_dir / "window_preferences.json"
+    
+    def load_window_preferences(self):
+        """Load saved window size and position"""
+        default_prefs = {
+            "width": 520,
+            "height": 580,
+            "x": None,
+            "y": None
+        }
+        
+        if self.window_prefs_path.exists():
+            try:
+                with open(self.window_prefs_path, 'r') as f:
+                    prefs = json.load(f)
+                    return {**default_prefs, **prefs}
+            except (json.JSONDecodeError, IOError):
+                pass
+        
+        return default_prefs
+    
+    def save_window_preferences(self, width, height, x, y):
+        """Save current window size and position"""
+        prefs = {
+            "width": width,
+            "height": height,
+            "x": x,
+            "y": y
+        }
+        
+        try:
+            with open(self.window_prefs_path, 'w') as f:
+                json.dump(prefs, f, indent=2)
+        except IOError:
+            pass
+
+    def get_last_updated_str(self, file_path):
+        if not file_path.exists(): return "Never"
+        try:
+            return time.strftime('%Y-%m-%d %H:%M', time.localtime(file_path.stat().st_mtime))
+        except FileNotFoundError:
+            return "Never"
@@ -0,0 +1,121 @@
+# benchmark.py
+# Times the matching engine's execution backends on synthetic beneficiary lists.
+# Run from your terminal: python benchmark.py --sizes 1000 5000 20000
+#                         python benchmark.py --officials-first --sizes 2000
+
+import argparse
+import queue
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import pandas as pd
+
+import config
+from analysis_engine import (
+    EXECUTION_BACKENDS, AnalysisEngine, _precompute_dataframe, _generate_pairs_from_blocks,
+    _run_parallel_comparison, compare_records_standard_configurable, ROW_SOURCE_COL, ROW_INDEX_COL
+)
+
+FIRST_NAMES = ["Maria", "Jose", "Juan", "Ana", "Pedro", "Rosa", "Antonio", "Carmen", "Manuel", "Luz", "Ramon", "Elena", "Ricardo", "Teresita", "Fernando", "Josefina"]
+MIDDLE_NAMES = ["Cruz", "Santos", "Reyes", "Garcia", "Mendoza", "Torres", "Flores", "Ramos", "Castillo", "Villanueva"]
+LAST_NAMES = ["Dela Cruz", "Bautista", "Aquino", "Fernandez", "Gonzales", "Lopez", "Marquez", "Navarro", "Pascual", "Salazar", "Tolentino", "Valdez", "Zamora", "Manalo"]
+CITIES = ["Calapan", "Naujan", "Victoria", "Pinamalayan", "Roxas", "Bongabong", "Puerto Galera", "Baco"]
+
+def _typo(name, rng):
+    if len(name) < 4: return name
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+def make_synthetic_records(size, duplicate_rate=0.15, seed=7):
+    """Builds a cleaned user DataFrame with a share of near-duplicate rows."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(size):
+        if rows and rng.random() < duplicate_rate:
+            row = dict(rng.choice(rows))
+            row["First Name"] = _typo(row["First Name"], rng)
+        else:
+            row = {
+                "First Name": rng.choice(FIRST_NAMES), "Middle Name": rng.choice(MIDDLE_NAMES), "Last Name": rng.choice(LAST_NAMES),
+                "Suffix": "", "Birthdate": f"{rng.randint(1950, 2004)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                "City": rng.choice(CITIES), "Sex": rng.choice(["Male", "Female"]), "Contact Number": ""
+            }
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def benchmark_backends(sizes, backends=EXECUTION_BACKENDS, repeats=1):
+    """Returns {size: {backend: best seconds}} for one standard user_user pass per backend."""
+    results = defaultdict(dict)
+    for size in sizes:
+        df = _precompute_dataframe(make_synthetic_records(size), defaultdict(set))
+        pairs = _generate_pairs_from_blocks(df)
+        print(f"\n{size} records, {len(pairs)} candidate pairs")
+        for backend in backends:
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                _run_parallel_comparison(df, None, compare_records_standard_configurable, pairs, backend=backend)
+                timings.append(time.perf_counter() - started)
+            results[size][backend] = min(timings)
+            print(f"  {backend:<8} {results[size][backend]:8.2f}s")
+    return dict(results)
+
+def _engine_reports(user_df, master_df, officials_df, officials_first):
+    """Runs matching and grouping (no Excel output); returns (reports, short_circuit_stats, seconds)."""
+    previous = config.MATCHING_OPTIMIZATIONS["officials_first_short_circuit"]
+    config.MATCHING_OPTIMIZATIONS["officials_first_short_circuit"] = officials_first
+    try:
+        engine = AnalysisEngine(user_df.copy(), master_df.copy(), officials_df.copy(), {}, "benchmark.xlsx", "Benchmark",
+                                lambda msg: None, lambda *args: None, datetime.now(), lambda path: None, queue.Queue())
+        started = time.perf_counter()
+        engine._preprocess_data()
+        engine._perform_matching()
+        engine._generate_reports()
+        elapsed = time.perf_counter() - started
+    finally:
+        config.MATCHING_OPTIMIZATIONS["officials_first_short_circuit"] = previous
+    return engine.reports, engine.short_circuit_stats, elapsed
+
+def _report_groups(report_df):
+    """A report section as a set of groups of (source id, row index, Remarks); group numbering is left out."""
+    if report_df.empty: return set()
+    return {frozenset(zip(group[ROW_SOURCE_COL], group[ROW_INDEX_COL], group["Remarks"])) for _, group in report_df.groupby("group_id")}
+
+def compare_officials_first(sizes, official_rate=0.05):
+    """Runs each size with and without the officials-first short-circuit and checks the report groups match."""
+    all_same = True
+    for size in sizes:
+        user_df = make_synthetic_records(size)
+        master_df = make_synthetic_records(size, seed=11)
+        officials_df = user_df.sample(frac=official_rate, random_state=3).reset_index(drop=True)
+        officials_df["Position"], officials_df["Barangay"] = "Kagawad", "Poblacion"
+        base_reports, _, base_time = _engine_reports(user_df, master_df, officials_df, False)
+        fast_reports, saved, fast_time = _engine_reports(user_df, master_df, officials_df, True)
+        same = all(_report_groups(base_reports[name]) == _report_groups(fast_reports[name]) for name in base_reports)
+        all_same &= same
+        print(f"{size} records: {saved.get('comparisons_saved', 0)} comparisons saved, "
+              f"{base_time:.2f}s -> {fast_time:.2f}s, report {'unchanged' if same else 'DIFFERS'}")
+    return all_same
+
+def print_summary(results):
+    backends = list(next(iter(results.values())).keys())
+    print("\n" + " | ".join(["Records".ljust(8)] + [b.rjust(8) for b in backends] + ["Winner".ljust(8)]))
+    print("-" * (11 * (len(backends) + 2)))
+    for size, timings in results.items():
+        winner = min(timings, key=timings.get)
+        print(" | ".join([str(size).ljust(8)] + [f"{timings[b]:7.2f}s" for b in backends] + [winner.ljust(8)]))
+
+if __name__ == "__main__":
+    from multiprocessing import freeze_support
+    freeze_support()
+    parser = argparse.ArgumentParser(description="Compare matching execution backends per dataset size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--backends", nargs="+", default=list(EXECUTION_BACKENDS), choices=list(EXECUTION_BACKENDS))
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--officials-first", action="store_true", help="Check the officials-first short-circuit leaves the report unchanged.")
+    args = parser.parse_args()
+    if args.officials_first:
+        raise SystemExit(0 if compare_officials_first(args.sizes) else 1)
+    print_summary(benchmark_backends(args.sizes, args.backends, args.repeats))
@@ -1,6 +1,7 @@
 # This is the master script to build provincially-configured executables.
 # Run this script from your terminal: python build.py
 
+import ast
 import os
 import sys
 import shutil
@@ -222,6 +223,29 @@ def build_nickname_gui():
 
     return False
 
+def local_imports(entry_scripts):
+    """File names of the modules in SCRIPT_DIR that the entry scripts import, directly or through each other."""
+    found, pending = set(), list(entry_scripts)
+    while pending:
+        file_name = pending.pop()
+        if file_name in found:
+            continue
+        found.add(file_name)
+        with open(os.path.join(SCRIPT_DIR, file_name), encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=file_name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                candidate = f"{module.split('.')[0]}.py"
+                if os.path.exists(os.path.join(SCRIPT_DIR, candidate)):
+                    pending.append(candidate)
+    return found
+
 def create_temp_files(province):
     """Creates a unique temporary directory with modified source files for this build run."""
     print(f"--- Preparing temporary files for {province}... ---")
@@ -234,8 +258,13 @@ def create_temp_files(province):
     # --- MODIFIED: Added excel_converter.py to the list of source files ---
     source_files = [
         "main.py", "gui.py", "analysis_engine.py",
-        "data_utils.py", "config.py", "excel_converter.py", "auditor.py"
+        "data_utils.py", "config.py", "excel_converter.py", "auditor.py",
+        "distributed.py", "run_state.py", "app_data.py", "out_of_core.py"
     ]
+    # A local module imported anywhere (also lazily, inside a function) but not copied only fails when the EXE runs
+    missing = sorted(local_imports([MAIN_SCRIPT_NAME, AUDITOR_SCRIPT_NAME]) - set(source_files))
+    if missing:
+        raise FileNotFoundError(f"Local modules imported by the app but missing from source_files: {', '.join(missing)}")
     for file_name in source_files:
         source_path = os.path.join(SCRIPT_DIR, file_name)
         if not os.path.exists(source_path):
@@ -0,0 +1,317 @@
+# cli.py
+# Headless analysis: the same load, clean, match and report pipeline as the app, without a display.
+# Never imports tkinter or customtkinter, so it runs on servers and in scheduled jobs.
+#
+#   python cli.py path/to/userfile.xlsx --province "Oriental Mindoro" --summary-json summary.json
+#   python cli.py incoming/ "extra/*.csv" --jobs 4 --summary-json batch_summary.json
+#
+# Several files, a directory or a glob run as one batch: the caches are loaded, decrypted and prepared
+# once (ReferenceIndex) and every file is matched against them, --jobs files at a time, with one report
+# per file and a consolidated summary.
+#
+# Logs go to stdout; the JSON summary goes to --summary-json (default: stdout, after the logs).
+# Exit codes: 0 report saved, 1 unexpected error, 2 bad arguments, 3 unreadable or empty user file,
+#             4 report file locked, 5 batch finished but some files failed, 130 cancelled (Ctrl+C / SIGTERM).
+
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import signal
+import sys
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import config
+from config import PROVINCE_PROFILES, GLOBAL_CONFIG, INCREMENTAL_CONFIG, CHECKPOINT_CONFIG, MATCH_ARTIFACT_CONFIG, ReportFormat
+from app_data import AppData
+from data_utils import get_encryption_key, load_sources, read_user_file, clean_dataframe
+from analysis_engine import run_analysis, CancellationToken, AnalysisCancelled, EXECUTION_BACKENDS, describe_findings
+from match_api import MatchIndex
+from preview import preview_analysis
+from run_state import RunStateStore, CheckpointStore, MatchArtifactStore, MasterClusterStore, lineage_id
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_INPUT = 3
+EXIT_REPORT_LOCKED = 4
+EXIT_BATCH_PARTIAL = 5
+EXIT_CANCELLED = 130
+
+USER_FILE_EXTENSIONS = (".csv", ".txt", ".xlsx", ".xls")
+# Reports are written next to their input; a directory run must not pick them up as user files
+_REPORT_NAME = re.compile(r"_report_\d+\.(xlsx|pdf)$", re.IGNORECASE)
+
+logger = logging.getLogger("cli")
+
+class ProgressLog:
+    """Stands in for the GUI progress queue: logs each new step once instead of drawing a bar."""
+
+    def __init__(self, log):
+        self.log = log
+        self._last_text = None
+
+    def put(self, message):
+        if message[0] == "findings":
+            for line in describe_findings(message[1]):
+                self.log(line)
+            return
+        text = message[-1]
+        if text != self._last_text:
+            self._last_text = text
+            self.log(text)
+
+def prepare_reference(province_name, log, offline=False, cancel_token=None):
+    """Refresh (unless offline), decrypt, clean and index the province caches once; sources load concurrently.
+
+    Returns a dict with app_data, encryption_key and index (a match_api.MatchIndex, i.e. a ReferenceIndex).
+    """
+    app_data = AppData(province_name)
+    encryption_key = get_encryption_key("doleadmin")
+    province_urls = {"master_db": PROVINCE_PROFILES[province_name].urls.master_db, "officials": PROVINCE_PROFILES[province_name].urls.officials}
+    if offline:
+        log("⚠️ Offline mode: using local caches without checking for updates.")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        sources = load_sources(app_data, encryption_key, log, province_urls, GLOBAL_CONFIG, refresh=not offline, cancel_token=cancel_token)
+        index = MatchIndex(sources["master_df"], sources["officials_df"], sources["nickname_map"], cancel_token,
+                           master_clusters=MasterClusterStore(app_data.master_clusters_path, encryption_key), log_callback=log)
+    return {"app_data": app_data, "encryption_key": encryption_key, "index": index}
+
+def analyze_file(user_filepath, province_name, reference, log, cancel_token=None, execution_backend=None, incremental=True, checkpoints=True, time_budget=None, out_of_core=None):
+    """Run one user file against prepared reference data; returns the JSON-ready summary (with exit_code)."""
+    started = datetime.now()
+    summary = {"user_file": os.path.abspath(user_filepath), "province": province_name, "started": started.isoformat(timespec="seconds"), "report": None}
+
+    def finish(status, exit_code, **extra):
+        finished = datetime.now()
+        summary.update(status=status, exit_code=exit_code, finished=finished.isoformat(timespec="seconds"), duration_seconds=round((finished - started).total_seconds(), 2), **extra)
+        return summary
+
+    if cancel_token is not None and cancel_token.cancelled:
+        return finish("cancelled", EXIT_CANCELLED)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            user_df = clean_dataframe(read_user_file(user_filepath))
+    except Exception as e:
+        log(f"❌ [UserFile] Could not read {user_filepath}: {e}")
+        return finish("input_error", EXIT_INPUT, error=str(e))
+    if user_df is None or user_df.empty:
+        log(f"❌ [UserFile] No records found in {user_filepath}.")
+        return finish("input_error", EXIT_INPUT, error="No records found in the user file.")
+    log(f"✅ [UserFile] Loaded and Cleaned {len(user_df)} records.")
+    summary["records"] = len(user_df)
+
+    report_paths = []
+    data_dir, encryption_key = reference["app_data"].data_dir, reference["encryption_key"]
+    try:
+        engine = run_analysis(
+            user_df, None, None, None,
+            user_filepath, province_name, log, lambda part, text=None, state="default": None, started, report_paths.append,
+            ProgressLog(log), cancel_token, execution_backend,
+            run_state=RunStateStore(data_dir / INCREMENTAL_CONFIG["state_dir_name"], encryption_key) if incremental else None,
+            checkpoints=CheckpointStore(data_dir / CHECKPOINT_CONFIG["dir_name"], encryption_key) if checkpoints else None,
+            reference=reference["index"], time_budget=time_budget, out_of_core=out_of_core,
+            artifacts=MatchArtifactStore(data_dir / MATCH_ARTIFACT_CONFIG["dir_name"], encryption_key)
+        )
+    except AnalysisCancelled:
+        return finish("cancelled", EXIT_CANCELLED)
+
+    summary["counts"] = engine.summary_stats
+    if engine.budget_stats:
+        summary["time_budget"] = engine.budget_stats
+    if engine.report_saved:
+        summary["report"] = os.path.abspath(report_paths[-1]) if report_paths else None
+        return finish("ok", EXIT_OK)
+    if cancel_token is not None and cancel_token.cancelled:
+        return finish("cancelled", EXIT_CANCELLED)
+    return finish("report_locked", EXIT_REPORT_LOCKED, error="The report file could not be written (is it open in Excel?).")
+
+def collect_user_files(inputs):
+    """Expand files, directories (their user files, not recursive) and glob patterns; keeps order, drops repeats.
+
+    Paths named explicitly are kept as given so a missing one can be reported.
+    """
+    files = OrderedDict()
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(os.path.join(item, name) for name in os.listdir(item))
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item))
+        else:
+            files.setdefault(os.path.abspath(item), item)
+            continue
+        for path in matches:
+            if os.path.isfile(path) and path.lower().endswith(USER_FILE_EXTENSIONS) and not _REPORT_NAME.search(path):
+                files.setdefault(os.path.abspath(path), path)
+    return list(files.values())
+
+def is_batch(inputs):
+    return len(inputs) > 1 or any(os.path.isdir(item) or glob.has_magic(item) for item in inputs)
+
+def preview_file(user_filepath, province_name, reference, log, cancel_token=None, execution_backend=None, sample_rows=None):
+    """Estimate a full analysis of one file from a sample (preview.py); returns the JSON-ready summary."""
+    summary = {"user_file": os.path.abspath(user_filepath), "province": province_name, "report": None}
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            user_df = clean_dataframe(read_user_file(user_filepath))
+    except Exception as e:
+        log(f"❌ [UserFile] Could not read {user_filepath}: {e}")
+        return {**summary, "status": "input_error", "exit_code": EXIT_INPUT, "error": str(e)}
+    if user_df is None or user_df.empty:
+        log(f"❌ [UserFile] No records found in {user_filepath}.")
+        return {**summary, "status": "input_error", "exit_code": EXIT_INPUT, "error": "No records found in the user file."}
+    estimate = preview_analysis(user_df, reference["index"], sample_rows, execution_backend=execution_backend, cancel_token=cancel_token, log_callback=log)
+    return {**summary, "status": "ok", "exit_code": EXIT_OK, "records": len(user_df), "preview": estimate}
+
+def run_batch(user_files, province_name, reference, log, cancel_token=None, execution_backend=None, jobs=1, incremental=True, checkpoints=True, time_budget=None, out_of_core=None):
+    """Analyze every file against one prepared reference, `jobs` files at a time; returns the consolidated summary.
+
+    Files of the same lineage (resubmissions of one list) run one after another, since they share incremental state.
+    time_budget applies to each file.
+    """
+    started = datetime.now()
+    jobs = max(1, jobs)
+    lineages = OrderedDict()
+    for path in user_files:
+        lineages.setdefault(lineage_id(path, province_name), []).append(path)
+    log(f"📦 Batch: {len(user_files)} files, {jobs} at a time.")
+
+    def run_lineage(paths):
+        results = []
+        for path in paths:
+            name = os.path.basename(path)
+            if jobs > 1:
+                file_log = lambda message, name=name: log(f"[{name}] {message}")
+            else:
+                file_log = log
+                log(f"📄 {name}")
+            try:
+                results.append(analyze_file(path, province_name, reference, file_log, cancel_token, execution_backend, incremental, checkpoints, time_budget, out_of_core))
+            except Exception as e:
+                logger.error("❌ %s failed: %s", path, e, exc_info=True)
+                results.append({"user_file": os.path.abspath(path), "province": province_name, "status": "error", "exit_code": EXIT_ERROR, "error": str(e), "report": None})
+        return results
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="batch-file") as pool:
+        per_lineage = list(pool.map(run_lineage, lineages.values()))
+    by_path = {summary["user_file"]: summary for results in per_lineage for summary in results}
+    files = [by_path[os.path.abspath(path)] for path in user_files]
+
+    totals = {"files": len(files), "ok": sum(1 for f in files if f["status"] == "ok"), "records": sum(f.get("records", 0) for f in files)}
+    totals["failed"] = totals["files"] - totals["ok"]
+    for key in ("officials", "linking", "duplicates", "unique"):
+        totals[key] = sum(f.get("counts", {}).get(key, 0) for f in files)
+    if any(f["status"] == "cancelled" for f in files):
+        status, exit_code = "cancelled", EXIT_CANCELLED
+    elif totals["failed"]:
+        status, exit_code = "partial", EXIT_BATCH_PARTIAL
+    else:
+        status, exit_code = "ok", EXIT_OK
+    finished = datetime.now()
+    duration = round((finished - started).total_seconds(), 2)
+    log(f"📦 Batch finished: {totals['ok']} of {totals['files']} reports saved in {duration}s.")
+    return {"province": province_name, "started": started.isoformat(timespec="seconds"), "finished": finished.isoformat(timespec="seconds"),
+            "duration_seconds": duration, "status": status, "exit_code": exit_code, "totals": totals, "files": files}
+
+def _install_cancel_handlers(cancel_token, log):
+    def request_cancel(signum, frame):
+        if not cancel_token.cancelled:
+            log("🛑 Cancel requested. Stopping workers...")
+        cancel_token.cancel()
+    signal.signal(signal.SIGINT, request_cancel)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_cancel)
+
+def write_summary(summary, destination):
+    text = json.dumps(summary, indent=2, ensure_ascii=False, default=str)
+    if destination == "-":
+        print(text, flush=True)
+    else:
+        with open(destination, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run a beneficiary de-duplication analysis without the GUI.")
+    parser.add_argument("inputs", nargs="+", metavar="user_file", help="User file(s) to analyze (.csv, .txt, .xlsx or .xls), directories or glob patterns.")
+    parser.add_argument("--province", default="Oriental Mindoro", choices=list(PROVINCE_PROFILES))
+    parser.add_argument("--offline", action="store_true", help="Use the local caches without checking for updates.")
+    parser.add_argument("--backend", default=None, choices=["auto", *EXECUTION_BACKENDS], help="Comparison backend (default: PARALLEL_CONFIG).")
+    parser.add_argument("--format", choices=[f.value.lower() for f in ReportFormat], help="Report format (default: REPORT_FORMAT).")
+    parser.add_argument("--no-incremental", action="store_true", help="Do not reuse or update the state of earlier submissions.")
+    parser.add_argument("--no-checkpoints", action="store_true", help="Do not resume from or write checkpoints.")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="SECONDS",
+                        help="Compare the most likely pairs first and stop after about this long; a later run without it completes the rest (default: TIME_BUDGET_CONFIG).")
+    parser.add_argument("--out-of-core", action="store_true", default=None,
+                        help="Match from a scratch SQLite database in bounded memory, for files too large for RAM; slower (default: OUT_OF_CORE_CONFIG).")
+    parser.add_argument("--preview", action="store_true",
+                        help="Only estimate the report counts, candidate pairs and run time from a sample of rows; no report is written.")
+    parser.add_argument("--sample-rows", type=int, default=None, help="Rows sampled by --preview (default: PREVIEW_CONFIG).")
+    parser.add_argument("--jobs", type=int, default=1, help="Batch runs: number of files analyzed at the same time.")
+    parser.add_argument("--summary-json", default="-", help="Where to write the JSON summary ('-' for stdout).")
+    return parser
+
+def configure_logging():
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(errors="replace")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stdout)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    if args.format:
+        config.REPORT_FORMAT = ReportFormat.PDF if args.format == "pdf" else ReportFormat.EXCEL
+    if args.time_budget is not None and args.time_budget <= 0:
+        build_parser().error("--time-budget must be a positive number of seconds.")
+    batch = is_batch(args.inputs)
+    user_files = collect_user_files(args.inputs)
+    missing = [path for path in user_files if not os.path.isfile(path)]
+    if missing or not user_files:
+        logger.error("❌ User file not found: %s", ", ".join(missing) or " ".join(args.inputs))
+        summary = {"user_file": os.path.abspath(missing[0]) if missing else " ".join(args.inputs), "province": args.province,
+                   "status": "input_error", "exit_code": EXIT_INPUT, "error": "File not found." if missing else "No user files matched."}
+        write_summary(summary, args.summary_json)
+        return EXIT_INPUT
+
+    cancel_token = CancellationToken()
+    _install_cancel_handlers(cancel_token, logger.info)
+    reference = None
+    failure_target = "; ".join(os.path.abspath(path) for path in user_files)
+    try:
+        reference = prepare_reference(args.province, logger.info, offline=args.offline, cancel_token=cancel_token)
+        # One pool for every pass and every file; its workers already hold the MasterDB and OfficialsDB records
+        if not args.preview:
+            reference["index"].start_pool(args.backend, logger.info)
+        if args.preview:
+            files = [preview_file(path, args.province, reference, logger.info, cancel_token, args.backend, args.sample_rows) for path in user_files]
+            ok = all(f["exit_code"] == EXIT_OK for f in files)
+            summary = files[0] if not batch else {"province": args.province, "status": "ok" if ok else "partial",
+                                                  "exit_code": EXIT_OK if ok else EXIT_BATCH_PARTIAL, "files": files}
+        elif batch:
+            summary = run_batch(user_files, args.province, reference, logger.info, cancel_token, args.backend, args.jobs,
+                                incremental=not args.no_incremental, checkpoints=not args.no_checkpoints, time_budget=args.time_budget, out_of_core=args.out_of_core)
+        else:
+            summary = analyze_file(user_files[0], args.province, reference, logger.info, cancel_token, args.backend,
+                                   incremental=not args.no_incremental, checkpoints=not args.no_checkpoints, time_budget=args.time_budget, out_of_core=args.out_of_core)
+    except AnalysisCancelled:
+        summary = {"user_file": failure_target, "province": args.province, "status": "cancelled", "exit_code": EXIT_CANCELLED}
+    except Exception as e:
+        logger.error("❌ An unexpected error occurred: %s", e, exc_info=True)
+        summary = {"user_file": failure_target, "province": args.province, "status": "error", "exit_code": EXIT_ERROR, "error": str(e)}
+    finally:
+        if reference is not None:
+            reference["index"].close()
+    write_summary(summary, args.summary_json)
+    return summary["exit_code"]
+
+if __name__ == "__main__":
+    from multiprocessing import freeze_support
+    freeze_support()
+    sys.exit(main())
@@ -123,6 +123,145 @@ ADAPTIVE_MATCHING_CONFIG = {
     }
 }
 
+# --- Matching Work Reduction ---
+MATCHING_OPTIMIZATIONS = {
+    # Later passes skip pairs whose records are already in the same group (and that group already has
+    # a fuzzy edge), since scoring them cannot change the report
+    "skip_connected_pairs": True,
+    # User-user pairs of two rows with a strict official hit that already share a group with a fuzzy edge
+    # are dropped before the first user-user pass; the report is unchanged. Saves work on files with many
+    # officials. Check with: python benchmark.py --officials-first
+    "officials_first_short_circuit": False
+}
+
+# --- Splitting Over-Merged Groups ---
+# Transitive matches (A~B, B~C, C~D) can chain different people into one giant group. With this on, groups
+# larger than "min_group_size" are cut at fuzzy links that are the only connection between two parts of at
+# least "min_part_size" records, weakest score first. Turns off skip_connected_pairs, whose skipped pairs
+# would otherwise make real cross-links look like single weak links.
+CLUSTER_SPLIT_CONFIG = {
+    "enabled": False,
+    "min_group_size": 10,
+    "min_part_size": 2,
+    "max_cost": 500000                  # Records + links visited by all splitting searches of one run (~2 s); the rest are then kept whole
+}
+
+# --- Parallel Matching Resource Limits ---
+# Worker count and chunk size are derived from measured free RAM; override here for low-memory machines.
+PARALLEL_CONFIG = {
+    "backend": "auto",                  # "process", "thread", "inline", or "auto" (threads on free-threaded builds)
+    "max_workers": None,                # None = cpu_count() - 1
+    "memory_limit_mb": None,            # Hard cap for the whole worker pool; None = use a share of available RAM
+    "available_memory_fraction": 0.6,   # Share of currently available RAM the pool may claim
+    "worker_baseline_mb": 150,          # Idle worker footprint (interpreter, pandas, rapidfuzz)
+    "record_overhead_factor": 3.0,      # Python dict records are heavier than the DataFrame columns they come from
+    "min_chunk_pairs": 500,
+    "max_chunk_pairs": 50000            # Bounds the pair list and result list held per task
+}
+
+# --- Key-Partitioned Multi-Node Matching ---
+# Each node runs `python distributed.py --serve --host 0.0.0.0 --port 6001`. Messages are pickled:
+# keep nodes on a trusted network and replace the authkey before enabling.
+DISTRIBUTED_CONFIG = {
+    "enabled": False,
+    "nodes": [],                        # e.g. ["10.0.0.11:6001", "10.0.0.12:6001"]
+    "authkey": "change-this-node-key"
+}
+
+# --- Out-of-Core Matching ---
+# For files whose records and candidate pairs do not fit in RAM: records, blocking keys and edges go to a
+# scratch SQLite database (deleted after the run) and blocks are scored in bounded batches on one core, so it is
+# about (cores - 1) times slower than the process backend. Incremental state, time budgets and the
+# MATCHING_OPTIMIZATIONS do not apply. Also `python cli.py <userfile> --out-of-core`.
+OUT_OF_CORE_CONFIG = {
+    "enabled": False,
+    "directory": None,                  # Where the scratch database goes; None = the system temp folder
+    "batch_pairs": 20000,               # Pairs scored per batch
+    "cache_records": 50000,             # Records kept in memory between blocks
+    "insert_rows": 10000,               # Rows written per transaction while loading
+    "sqlite_cache_mb": 64
+}
+
+# --- Incremental Re-runs ---
+# Resubmissions of the same list (same file name apart from "(2)", "_v3", dates...) reuse the encrypted
+# match state of the previous run in the app data folder and only compare new or modified rows.
+INCREMENTAL_CONFIG = {
+    "enabled": True,
+    "state_dir_name": "run_state"
+}
+
+# --- MasterDB Duplicate Clusters ---
+# Duplicates inside the MasterDB are found once per MasterDB version (and matching settings) and kept, encrypted,
+# next to the cache. A user row linked to one record of such a cluster is reported with the whole cluster.
+# The first analysis after a MasterDB update pays for the MasterDB-vs-itself comparison.
+MASTER_CLUSTER_CONFIG = {
+    "enabled": True
+}
+
+# --- Match Artifacts ---
+# The scored edges, groups and row provenance of each run are also kept (encrypted, latest run per list) for
+# tools that work from a finished run instead of matching again or reading the Excel report.
+MATCH_ARTIFACT_CONFIG = {
+    "enabled": True,
+    "dir_name": "match_artifacts"
+}
+
+# --- Threshold Sweeps ---
+# Pairs that miss every threshold but score at least "min_stored_score" are kept too (run state and match
+# artifact), so threshold_sweep.py can re-tier a finished run for other thresholds without matching again.
+THRESHOLD_SWEEP_CONFIG = {
+    "store_near_misses": True,
+    "min_stored_score": 80              # Sweeps are exact for effective thresholds at or above this score
+}
+
+# --- Checkpoints ---
+# Encrypted checkpoints after preprocessing, each comparison pass and grouping, so a crashed, cancelled
+# or locked-report run on the same files resumes from its last completed stage.
+CHECKPOINT_CONFIG = {
+    "enabled": True,
+    "dir_name": "checkpoints",
+    "max_age_days": 7                   # Checkpoints of runs that were never resumed are removed after this
+}
+
+# --- Time-Budgeted Analysis ---
+# With a budget (seconds, from the start of the analysis) candidate pairs are scored most-likely first
+# and whatever does not fit is left for the next run of the same file, which completes it.
+TIME_BUDGET_CONFIG = {
+    "seconds": None,                    # Default budget; None = score every candidate pair
+    "report_reserve_fraction": 0.1,     # Share of the budget kept for grouping and writing the report
+    "max_chunk_pairs": 2000             # Smaller chunks so scoring stops close to the deadline
+}
+
+# --- Live Findings ---
+# While matching runs, groups that are new or have grown since the last update are sent to the GUI log
+# (official hits first). Updates are sent at most once per interval and capped, so the window stays responsive.
+# They are preliminary: splitting and MasterDB clusters are applied when the report is built.
+LIVE_FINDINGS_CONFIG = {
+    "enabled": True,
+    "min_interval_seconds": 2.0,
+    "max_groups_per_update": 15
+}
+
+# --- Run Preview ---
+# `python cli.py <userfile> --preview` samples user rows, scores them against the full indexes and estimates
+# the report counts (with confidence intervals), candidate pairs and matching time of a full run.
+PREVIEW_CONFIG = {
+    "sample_rows": 2000,
+    "confidence": 0.95,
+    "seed": 7,                          # Fixed, so repeated previews of one file agree
+    "key_probe_rows": 500               # Rows timed to estimate blocking-key time for the whole file
+}
+
+# --- Local Lookup Service ---
+# `python lookup_service.py` keeps the prepared MasterDB/OfficialsDB in memory and answers single-record
+# queries over HTTP. It has no authentication: keep it bound to localhost.
+LOOKUP_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "max_records_per_request": 100,
+    "latency_window": 1000              # Recent requests kept for the latency percentiles at /stats
+}
+
 # --- Global Configuration (Shared by all provinces) ---
 GLOBAL_CONFIG = {
     "NICKNAME_CSV_URL": "https://raw.githubusercontent.com/DOLE-MIMAROPA/MIMAROPA-DATABASE/main/Nicknames.csv",
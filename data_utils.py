@@ -7,6 +7,11 @@ import io
 import warnings
 import base64
 import sys
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
 from datetime import datetime
 from collections import defaultdict
 from pathlib import Path
@@ -23,6 +28,27 @@ from config import (
 class InvalidFileTypeError(Exception):
     pass
 
+# Sources are parsed on several threads at once; stderr is silenced while any of them is parsing
+_stderr_lock = threading.Lock()
+_stderr_users = 0
+_stderr_saved = None
+
+@contextmanager
+def _quiet_stderr():
+    global _stderr_users, _stderr_saved
+    with _stderr_lock:
+        if _stderr_users == 0:
+            _stderr_saved, sys.stderr = sys.stderr, open(os.devnull, 'w')
+        _stderr_users += 1
+    try:
+        yield
+    finally:
+        with _stderr_lock:
+            _stderr_users -= 1
+            if _stderr_users == 0:
+                sys.stderr.close()
+                sys.stderr, _stderr_saved = _stderr_saved, None
+
 def get_encryption_key(password: str) -> bytes:
     kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=ENCRYPTION_SALT, iterations=480000)
     return base64.urlsafe_b64encode(kdf.derive(password.encode()))
@@ -379,37 +405,12 @@ def download_file_with_logging(log_callback, file_type, download_func, *args, **
     prefix = {'UP_TO_DATE': '✅', 'UPDATED': '✅', 'NETWORK_ERROR': '⚠️', 'HTTP_ERROR': '❌'}.get(status, 'ℹ️')
     log_callback(f"{prefix} [{file_type}] {message}")
 
-def update_remote_files(app_data, encryption_key, log_callback, province_urls, global_urls):
-    auth_headers = get_auth_headers(encryption_key)
-    if not auth_headers:
-        log_callback("❌ CRITICAL: Could not decrypt GitHub token. Cannot check for updates.")
-        return False
-
-    files_to_check = {
-        "MasterDB": (province_urls["master_db"], app_data.master_db_path, app_data.master_db_meta_path),
-        "OfficialsDB": (province_urls["officials"], app_data.officials_db_path, app_data.officials_db_meta_path),
-        "Nickname": (global_urls["NICKNAME_CSV_URL"], app_data.nickname_path, app_data.nickname_meta_path)
-    }
-    if check_internet():
-        log_callback("🌐 Internet found. Preparing to check remote files...")
-        for name, (url, path, meta_path) in files_to_check.items():
-            download_file_with_logging(log_callback, name, smart_download_pat, url, path, meta_path, auth_headers, encryption_key, encrypt_locally=True)
-        return True
-    else:
-        log_callback("⚠️ No internet connection detected. Proceeding with local caches.")
-        for name, (_, path, _) in files_to_check.items():
-            if path.exists(): log_callback(f"✅ [{name}] Using local cache.")
-            else: log_callback(f"❌ [{name}] No internet and no local cache found.")
-        return False
-
 def load_nickname_map(app_data, encryption_key, log_callback=None):
     try:
         if not os.path.exists(app_data.nickname_path): return {}
         with open(app_data.nickname_path, "rb") as f: content_bytes = decrypt_data(f.read(), encryption_key)
         
-        original_stderr = sys.stderr; sys.stderr = open(os.devnull, 'w')
-        try: df = pd.read_csv(io.StringIO(content_bytes.decode(errors='ignore')))
-        finally: sys.stderr.close(); sys.stderr = original_stderr
+        with _quiet_stderr(): df = pd.read_csv(io.StringIO(content_bytes.decode(errors='ignore')))
         
         if not {'nickname', 'formal_name'}.issubset(df.columns):
             if log_callback: log_callback("❌ [Nickname] File has incorrect format.")
@@ -430,14 +431,148 @@ def load_raw_file(filepath, encryption_key):
         with open(filepath, "rb") as f:
             content_bytes = decrypt_data(f.read(), encryption_key)
         
-        original_stderr = sys.stderr
-        sys.stderr = open(os.devnull, 'w')
-        try:
+        with _quiet_stderr():
             df = pd.read_csv(io.StringIO(content_bytes.decode(errors='ignore')), dtype=str, engine='python', on_bad_lines='warn')
-        finally:
-            sys.stderr.close()
-            sys.stderr = original_stderr
-            
         return df
     except Exception as e:
-        raise InvalidFileTypeError(f"Could not read the file. It may be invalid or corrupted: {e}")
\ No newline at end of file
+        raise InvalidFileTypeError(f"Could not read the file. It may be invalid or corrupted: {e}")
+
+
+def _load_cached_table(path, name, encryption_key, log_callback):
+    """Decrypt and parse one cached reference table; None (with a log line) when it is missing or unreadable."""
+    if not path.exists(): return None
+    try:
+        df = load_raw_file(path, encryption_key)
+        log_callback(f"✅ [{name}] Loaded {len(df)} records from cache.")
+        return df
+    except Exception as e:
+        log_callback(f"⚠️ [{name}] Could not load from cache: {e}.")
+        return None
+
+def read_user_file(filepath):
+    """Reads a user CSV/TXT/Excel file as strings; empty files give an empty DataFrame."""
+    user_df = pd.DataFrame()
+    if os.path.getsize(filepath) > 0:
+        file_ext = os.path.splitext(filepath)[1].lower()
+        if file_ext in ['.csv', '.txt']:
+            sep = ',' if file_ext == '.csv' else '\t'
+            with _quiet_stderr():
+                user_df = pd.read_csv(filepath, sep=sep, dtype=str, engine='python', on_bad_lines='warn').dropna(how='all')
+        elif file_ext in ['.xlsx', '.xls']:
+            user_df = pd.read_excel(filepath, dtype=str).dropna(how='all')
+    return user_df
+
+def load_sources(app_data, encryption_key, log_callback, province_urls, global_urls, user_filepath=None, refresh=True, cancel_token=None):
+    """Refresh, decrypt, parse and clean every input, with independent sources overlapping.
+
+    MasterDB, OfficialsDB and the nickname list each run download -> decrypt/parse -> clean on their own
+    thread once the connectivity check is done, and the user file is read and cleaned meanwhile. Log lines
+    are passed to log_callback from the calling thread only (it may be a GUI). Returns a dict with
+    has_internet, nickname_map, master_df, officials_df, user_df (None without user_filepath) and
+    timings ({source: {stage: seconds}}).
+    """
+    messages = queue.Queue()
+    log = messages.put
+    timings = defaultdict(dict)
+
+    def timed(source, stage, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[source][stage] = time.perf_counter() - started
+
+    def check_cancel():
+        if cancel_token is not None: cancel_token.raise_if_cancelled()
+
+    auth_headers = get_auth_headers(encryption_key) if refresh else None
+    if refresh and not auth_headers:
+        log_callback("❌ CRITICAL: Could not decrypt GitHub token. Cannot check for updates.")
+    sources = {
+        "MasterDB": (province_urls["master_db"], app_data.master_db_path, app_data.master_db_meta_path),
+        "OfficialsDB": (province_urls["officials"], app_data.officials_db_path, app_data.officials_db_meta_path),
+        "Nickname": (global_urls["NICKNAME_CSV_URL"], app_data.nickname_path, app_data.nickname_meta_path)
+    }
+
+    pool = ThreadPoolExecutor(max_workers=len(sources) + 2, thread_name_prefix="load")
+    cancelled = False
+    started = time.perf_counter()
+    try:
+        internet = pool.submit(timed, "Network", "check", check_internet) if auth_headers else None
+
+        def refresh_source(name):
+            if internet is None: return
+            url, path, meta_path = sources[name]
+            if internet.result():
+                timed(name, "download", download_file_with_logging, log, name, smart_download_pat, url, path, meta_path, auth_headers, encryption_key, encrypt_locally=True)
+            elif path.exists(): log(f"✅ [{name}] Using local cache.")
+            else: log(f"❌ [{name}] No internet and no local cache found.")
+
+        def reference_chain(name, is_officials_file=False):
+            refresh_source(name)
+            check_cancel()
+            df = timed(name, "decrypt+parse", _load_cached_table, sources[name][1], name, encryption_key, log)
+            check_cancel()
+            return timed(name, "clean", clean_dataframe, df, is_officials_file=is_officials_file)
+
+        def nickname_chain():
+            refresh_source("Nickname")
+            check_cancel()
+            return timed("Nickname", "decrypt+parse", load_nickname_map, app_data, encryption_key, log)
+
+        def user_chain():
+            df = timed("UserFile", "parse", read_user_file, user_filepath)
+            check_cancel()
+            return timed("UserFile", "clean", clean_dataframe, df)
+
+        if internet is not None:
+            internet.add_done_callback(lambda f: log("🌐 Internet found. Preparing to check remote files..." if not f.exception() and f.result()
+                                                     else "⚠️ No internet connection detected. Proceeding with local caches."))
+        futures = {
+            "user": pool.submit(user_chain) if user_filepath else None,
+            "master": pool.submit(reference_chain, "MasterDB"),
+            "officials": pool.submit(reference_chain, "OfficialsDB", True),
+            "nickname": pool.submit(nickname_chain)
+        }
+        pending = {f for f in futures.values() if f is not None}
+        while pending:
+            _, pending = wait_futures(pending, timeout=0.1)
+            while not messages.empty(): log_callback(messages.get())
+            if cancel_token is not None and cancel_token.cancelled:
+                # Chains stop at their next check; downloads in flight finish in the background
+                cancelled = True
+                break
+        elapsed = time.perf_counter() - started
+        while not messages.empty(): log_callback(messages.get())
+    finally:
+        pool.shutdown(wait=not cancelled, cancel_futures=True)
+    check_cancel()
+
+    for source, stages in timings.items():
+        log_callback(f"⏱️ [{source}] " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stages.items()))
+    log_callback(f"⏱️ Sources ready in {elapsed:.2f}s ({sum(sum(stages.values()) for stages in timings.values()):.2f}s of work overlapped).")
+    return {
+        "has_internet": bool(internet is not None and internet.result()),
+        "nickname_map": futures["nickname"].result(), "master_df": futures["master"].result(), "officials_df": futures["officials"].result(),
+        "user_df": futures["user"].result() if futures["user"] is not None else None, "timings": {k: dict(v) for k, v in timings.items()}
+    }
+
+def clean_dataframe(df, is_officials_file=False):
+    """Maps columns to the intended layout and normalizes every known field."""
+    if df is None or df.empty: return df
+    cleaned_df = smart_remap_columns_to_intended(df, is_officials_file=is_officials_file)
+    cleaned_df = parse_full_name_column(cleaned_df)
+    for col in cleaned_df.columns:
+        if col in ["First Name", "Middle Name", "Last Name", "Suffix", "Position", "Barangay"]:
+            cleaned_df[col] = cleaned_df[col].apply(normalize_name)
+        elif col == "City":
+            cleaned_df[col] = cleaned_df[col].apply(normalize_city)
+        elif col == "Sex":
+            cleaned_df[col] = cleaned_df[col].apply(normalize_sex)
+        elif col == "Birthdate":
+            cleaned_df[col] = cleaned_df[col].apply(normalize_date)
+        elif col == "Contact Number":
+            cleaned_df[col] = cleaned_df[col].apply(lambda x: str(x).strip() if pd.notna(x) else '')
+        elif col == "Batch Name":
+            cleaned_df[col] = cleaned_df[col].apply(normalize_batch_name)
+    return cleaned_df
@@ -0,0 +1,190 @@
+# distributed.py
+# Key-partitioned matching across several worker nodes.
+#
+# Every blocking key is owned by exactly one node (crc32(key) % N). Each node builds the blocks it owns,
+# scores their candidate pairs through the normal pass pipeline and returns the match edges. The
+# coordinator (AnalysisEngine) merges and de-duplicates the edges before the union-find in
+# _generate_reports, so the groups are the same as a single-machine run.
+#
+# Start a node on each machine:   python distributed.py --serve --host 0.0.0.0 --port 6001
+# and list them in config.DISTRIBUTED_CONFIG["nodes"].
+#
+# Nodes talk over multiprocessing.connection (plain sockets with an HMAC handshake). Messages are
+# pickled, so only run nodes on trusted networks and change the shared authkey.
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Listener, Client
+
+import config
+from analysis_engine import (
+    PASS_PIPELINE, CANCEL_POLL_SECONDS, MATCH_STATUS_NAMES, AnalysisCancelled, _MATCH_FIELDS,
+    _concat_edges, _generate_pairs_from_blocks, _generate_pairs_from_blocks_2_files, _run_parallel_comparison
+)
+
+def partition_of_key(key, num_partitions):
+    """Stable owner of a blocking key. hash() is salted per process, crc32 is the same on every node."""
+    return zlib.crc32(key.encode("utf-8")) % num_partitions
+
+def matching_config_fingerprint():
+    """Nodes refuse work when their thresholds differ from the coordinator's, since results would differ."""
+    payload = json.dumps({"version": config.APP_VERSION, "matching": config.ADAPTIVE_MATCHING_CONFIG}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def parse_node_address(address):
+    if isinstance(address, (tuple, list)):
+        return (str(address[0]), int(address[1]))
+    host, _, port = str(address).rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+def _node_authkey(authkey=None):
+    authkey = authkey if authkey is not None else config.DISTRIBUTED_CONFIG["authkey"]
+    return authkey.encode("utf-8") if isinstance(authkey, str) else authkey
+
+def match_partition(tables, pair_types, node_id, num_nodes, backend=None):
+    """Score the candidate pairs of every blocking key owned by node_id.
+
+    Returns {pair_type: MATCH_EDGE_DTYPE array} so replies stay compact on the wire.
+    """
+    def owns(key):
+        return partition_of_key(key, num_nodes) == node_id
+
+    edges = {}
+    user_df = tables["user"]
+    for pair_type in pair_types:
+        other = pair_type.split('_')[1]
+        df2 = None if other == "user" else tables.get(other)
+        if other != "user" and (df2 is None or df2.empty):
+            continue
+        if df2 is None:
+            candidate_pairs = _generate_pairs_from_blocks(user_df, key_filter=owns)
+        else:
+            candidate_pairs = _generate_pairs_from_blocks_2_files(user_df, df2, key_filter=owns)
+        matched, pass_edges = set(), []
+        for func in PASS_PIPELINE[pair_type]:
+            pairs_to_check = [p for p in candidate_pairs if p not in matched]
+            if not pairs_to_check:
+                continue
+            pass_results = _run_parallel_comparison(user_df, df2, func, pairs_to_check, backend=backend)
+            matched.update(zip(pass_results["i"].tolist(), pass_results["j"].tolist()))
+            pass_edges.append(pass_results)
+        edges[pair_type] = _concat_edges(pass_edges)
+    return edges
+
+def _handle_request(request, backend=None):
+    op = request.get("op")
+    if op == "ping":
+        return {"ok": True, "fingerprint": matching_config_fingerprint()}
+    if op == "shutdown":
+        return {"ok": True}
+    if op != "match":
+        return {"ok": False, "error": f"Unknown request '{op}'."}
+    if request.get("fingerprint") != matching_config_fingerprint():
+        return {"ok": False, "error": "Matching configuration or app version differs from the coordinator."}
+    edges = match_partition(request["tables"], request["pair_types"], request["node_id"], request["num_nodes"], backend)
+    return {"ok": True, "edges": edges}
+
+def serve_node(host="127.0.0.1", port=6001, authkey=None, backend=None, ready_queue=None):
+    """Run a worker node until it receives a shutdown request."""
+    with Listener((host, port), authkey=_node_authkey(authkey)) as listener:
+        logging.info("Matching node listening on %s:%s", *listener.address)
+        if ready_queue is not None:
+            ready_queue.put(listener.address)
+        while True:
+            with listener.accept() as conn:
+                request = conn.recv()
+                try:
+                    reply = _handle_request(request, backend)
+                except Exception as e:
+                    logging.error("Node request failed", exc_info=True)
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                conn.send(reply)
+            if request.get("op") == "shutdown":
+                break
+
+def start_local_nodes(num_nodes, authkey=None, backend=None):
+    """Start num_nodes worker nodes as local processes; returns (addresses, processes).
+
+    Stands in for separate machines when testing partitioned runs on one computer.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    processes = [ctx.Process(target=serve_node, args=("127.0.0.1", 0, authkey, backend, ready)) for _ in range(num_nodes)]
+    for proc in processes:
+        proc.start()
+    addresses = [ready.get(timeout=120) for _ in processes]
+    return addresses, processes
+
+def stop_local_nodes(addresses, processes=(), authkey=None):
+    for address in addresses:
+        try:
+            with Client(parse_node_address(address), authkey=_node_authkey(authkey)) as conn:
+                conn.send({"op": "shutdown"})
+                conn.recv()
+        except (OSError, EOFError):
+            pass
+    for proc in processes:
+        proc.join(timeout=10)
+
+def run_partitioned_matching(user_df, master_df, officials_df, nodes, authkey=None, cancel_token=None, log_callback=None):
+    """Coordinator side: fan the blocking-key partitions out to the nodes and merge their edges.
+
+    Returns edges in AnalysisEngine.all_matches form, de-duplicated (a pair sharing keys owned by
+    different nodes is scored on each of them with the same result).
+    """
+    nodes = [parse_node_address(n) for n in nodes]
+    authkey = _node_authkey(authkey)
+    tables = {"user": user_df[[c for c in _MATCH_FIELDS if c in user_df.columns]]}
+    pair_types = ["user_user"]
+    for name, df, pair_type in (("official", officials_df, "user_official"), ("master", master_df, "user_master")):
+        if df is not None and not df.empty:
+            tables[name] = df[[c for c in _MATCH_FIELDS if c in df.columns]]
+            pair_types.insert(0, pair_type)
+    pair_types.sort(key=list(PASS_PIPELINE).index)
+    fingerprint = matching_config_fingerprint()
+
+    def ask(node_id, address):
+        with Client(address, authkey=authkey) as conn:
+            conn.send({"op": "match", "node_id": node_id, "num_nodes": len(nodes), "tables": tables, "pair_types": pair_types, "fingerprint": fingerprint})
+            while not conn.poll(CANCEL_POLL_SECONDS):
+                if cancel_token is not None and cancel_token.cancelled:
+                    raise AnalysisCancelled()
+            reply = conn.recv()
+        if not reply.get("ok"):
+            raise RuntimeError(f"Node {address[0]}:{address[1]} failed: {reply.get('error')}")
+        if log_callback: log_callback(f"✅ [Node {node_id + 1}/{len(nodes)}] Returned {sum(len(e) for e in reply['edges'].values())} match edges.")
+        return reply["edges"]
+
+    with ThreadPoolExecutor(max_workers=len(nodes)) as pool:
+        replies = list(pool.map(ask, range(len(nodes)), nodes))
+
+    merged = {}
+    for edges in replies:
+        for pair_type, arr in edges.items():
+            for i, j, code, score in zip(arr["i"].tolist(), arr["j"].tolist(), arr["status"].tolist(), arr["score"].tolist()):
+                merged.setdefault((pair_type, i, j), (MATCH_STATUS_NAMES[code], score))
+    order = {pair_type: n for n, pair_type in enumerate(PASS_PIPELINE)}
+    all_matches = []
+    for (pair_type, i, j), (status, score) in sorted(merged.items(), key=lambda item: (order[item[0][0]], item[0][1], item[0][2])):
+        df1_prefix, df2_prefix = pair_type.split('_')
+        all_matches.append((f"{df1_prefix}_{i}", f"{df2_prefix}_{j}", status, score))
+    return all_matches
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Run a key-partitioned matching node.")
+    parser.add_argument("--serve", action="store_true", help="Start a node and wait for work from a coordinator.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6001)
+    parser.add_argument("--backend", default=None, help="Execution backend on this node: process, thread or inline.")
+    args = parser.parse_args()
+    if args.serve:
+        serve_node(args.host, args.port, backend=args.backend)
+    else:
+        parser.print_help()
@@ -1,8 +1,11 @@
 # excel_converter.py
 
 import os
-import win32com.client as win32
 import logging
+try:
+    import win32com.client as win32
+except ImportError:  # Excel automation is Windows-only; reports stay in Excel format elsewhere
+    win32 = None
 
 def convert_to_pdf(excel_path, pdf_path):
     """
@@ -12,6 +15,9 @@ def convert_to_pdf(excel_path, pdf_path):
     Returns:
         bool: True on success, False on failure.
     """
+    if win32 is None:
+        logging.warning("PDF conversion needs Microsoft Excel (pywin32); keeping the Excel report.")
+        return False
     excel = None
     workbook = None
     try:
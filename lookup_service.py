@@ -0,0 +1,153 @@
+# lookup_service.py
+# Local lookup service for registration desks: "is this person already in the MasterDB or officials list?"
+#
+# Loads and prepares the province caches once (the MatchIndex a batch run uses too), then answers
+# queries over plain HTTP with the same blocking, passes and thresholds as a full analysis.
+#
+#   python lookup_service.py --province "Oriental Mindoro" [--offline] [--port 8765]
+#
+#   POST /match   {"record": {"First Name": "Juan", "Last Name": "Dela Cruz", "Birthdate": "1980-02-01"}}
+#                 or {"records": [...]} (up to LOOKUP_CONFIG["max_records_per_request"])
+#   GET  /stats   request count and latency percentiles (ms) over the last LOOKUP_CONFIG["latency_window"] requests
+#   GET  /health
+#
+# Records use the same column names as a user file (aliases and a single full-name column are accepted).
+# There is no authentication, so the service binds to localhost unless told otherwise.
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import PROVINCE_PROFILES, LOOKUP_CONFIG
+from analysis_engine import INTENDED_COLS
+from cli import prepare_reference, configure_logging
+
+logger = logging.getLogger("lookup")
+
+class LatencyTracker:
+    """Durations of the most recent requests, for percentile reporting."""
+
+    def __init__(self, window):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds * 1000.0)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            samples, count = sorted(self._samples), self.count
+        if not samples:
+            return {"requests": count, "window": 0}
+        def percentile(p):
+            # Nearest-rank percentile
+            return round(samples[min(len(samples) - 1, max(0, int(round(p / 100.0 * len(samples))) - 1))], 3)
+        return {"requests": count, "window": len(samples), "p50_ms": percentile(50), "p90_ms": percentile(90),
+                "p99_ms": percentile(99), "max_ms": round(samples[-1], 3)}
+
+class LookupService:
+    """Answers match queries against one prepared MatchIndex; safe to call from several threads."""
+
+    def __init__(self, index, province_name):
+        self.index = index
+        self.province_name = province_name
+        self.latency = LatencyTracker(LOOKUP_CONFIG["latency_window"])
+        # Build the record stores now so the first query does not pay for them
+        for source in ("master", "official"):
+            if source in index.indexes: index.record_store(source)
+
+    def lookup(self, records):
+        """Match raw record dicts; returns one result per record, in order."""
+        query_df = self.index.prepare_records(records)
+        results = []
+        for i, candidates in enumerate(self.index.query_many(query_df, top_k=None, clean=False)):
+            status = "official" if any(c.source == "official" for c in candidates) else ("linked" if candidates else "new")
+            results.append({
+                "query": {col: query_df.at[i, col] for col in INTENDED_COLS},
+                "status": status,
+                "matches": [c.to_dict() for c in candidates]
+            })
+        return results
+
+def _make_handler(service):
+    class LookupHandler(BaseHTTPRequestHandler):
+        def _send_json(self, code, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"ok": True, "province": service.province_name})
+            elif self.path == "/stats":
+                self._send_json(200, service.latency.summary())
+            else:
+                self._send_json(404, {"error": "Not found."})
+
+        def do_POST(self):
+            if self.path != "/match":
+                self._send_json(404, {"error": "Not found."})
+                return
+            started = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                records = payload.get("records") if "records" in payload else [payload.get("record")]
+                if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+                    raise ValueError("Send {\"record\": {...}} or {\"records\": [{...}, ...]}.")
+                if len(records) > LOOKUP_CONFIG["max_records_per_request"]:
+                    raise ValueError(f"At most {LOOKUP_CONFIG['max_records_per_request']} records per request.")
+            except (ValueError, AttributeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            try:
+                results = service.lookup(records)
+            except Exception as e:
+                logger.error("Lookup failed", exc_info=True)
+                self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+            elapsed = time.perf_counter() - started
+            service.latency.add(elapsed)
+            self._send_json(200, {"results": results, "elapsed_ms": round(elapsed * 1000.0, 3)})
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return LookupHandler
+
+def serve(province_name, host=None, port=None, offline=False, ready_callback=None):
+    """Prepare the reference data and serve until interrupted."""
+    reference = prepare_reference(province_name, logger.info, offline=offline)
+    service = LookupService(reference["index"], province_name)
+    server = ThreadingHTTPServer((host or LOOKUP_CONFIG["host"], LOOKUP_CONFIG["port"] if port is None else port), _make_handler(service))
+    logger.info("🔎 Lookup service for %s listening on http://%s:%s", province_name, *server.server_address[:2])
+    if ready_callback is not None:
+        ready_callback(server)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping lookup service.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve single-record MasterDB/OfficialsDB lookups on localhost.")
+    parser.add_argument("--province", default="Oriental Mindoro", choices=list(PROVINCE_PROFILES))
+    parser.add_argument("--host", default=None, help=f"Bind address (default: {LOOKUP_CONFIG['host']}).")
+    parser.add_argument("--port", type=int, default=None, help=f"Port (default: {LOOKUP_CONFIG['port']}).")
+    parser.add_argument("--offline", action="store_true", help="Use the local caches without checking for updates.")
+    args = parser.parse_args()
+    configure_logging()
+    serve(args.province, args.host, args.port, args.offline)
+    sys.exit(0)
@@ -6,31 +6,28 @@ import threading
 import os
 import sys
 import logging
-from pathlib import Path
-import time
 pd = None  # lazy-loaded
 from datetime import datetime
 import warnings
 import queue
-import json
 import traceback
 import tkinter as tk
 import tkinter.messagebox as messagebox
 
 from gui import Tooltip, SettingsWindow, MessageDialog, ContextMenu, AboutDialog
+from app_data import AppData
 # Heavy modules will be imported lazily during initialization while native splash is visible
 get_encryption_key = None
-update_remote_files = None
-load_nickname_map = None
-smart_remap_columns_to_intended = None
-parse_full_name_column = None
-normalize_name = None
-normalize_date = None
-normalize_sex = None
-normalize_city = None
-load_raw_file = None
+load_sources = None
 run_analysis = None
-from config import HIDDEN_PASSWORD, PROVINCE_PROFILES, GLOBAL_CONFIG, THEME_COLORS, ThemeColor, APP_VERSION
+CancellationToken = None
+AnalysisCancelled = None
+RunStateStore = None
+CheckpointStore = None
+MatchArtifactStore = None
+MasterClusterStore = None
+describe_findings = None
+from config import HIDDEN_PASSWORD, PROVINCE_PROFILES, GLOBAL_CONFIG, THEME_COLORS, ThemeColor, APP_VERSION, INCREMENTAL_CONFIG, CHECKPOINT_CONFIG, MATCH_ARTIFACT_CONFIG
 
 if 'DEFAULT_PROVINCE' not in globals():
     DEFAULT_PROVINCE = "Oriental Mindoro"
@@ -85,10 +82,8 @@ def resource_path(relative_path):
 def lazy_import_heavy(progress_cb=None):
     """Import heavy modules after splash is shown to avoid late splash appearance."""
     global pd
-    global get_encryption_key, update_remote_files, load_nickname_map
-    global smart_remap_columns_to_intended, parse_full_name_column, normalize_name, normalize_date, normalize_sex, normalize_city
-    global normalize_batch_name
-    global load_raw_file, run_analysis
+    global get_encryption_key, load_sources
+    global run_analysis, CancellationToken, AnalysisCancelled, RunStateStore, CheckpointStore, MatchArtifactStore, MasterClusterStore, describe_findings
 
     try:
         if _pyi_splash:
@@ -105,33 +100,33 @@ def lazy_import_heavy(progress_cb=None):
         if get_encryption_key is None:
             from data_utils import (
                 get_encryption_key as _get_encryption_key,
-                update_remote_files as _update_remote_files,
-                load_nickname_map as _load_nickname_map,
-                smart_remap_columns_to_intended as _smart_remap_columns_to_intended,
-                parse_full_name_column as _parse_full_name_column,
-                normalize_name as _normalize_name, normalize_date as _normalize_date,
-                normalize_sex as _normalize_sex, normalize_city as _normalize_city,
-                normalize_batch_name as _normalize_batch_name,
-                load_raw_file as _load_raw_file
+                load_sources as _load_sources
             )
             get_encryption_key = _get_encryption_key
-            update_remote_files = _update_remote_files
-            load_nickname_map = _load_nickname_map
-            smart_remap_columns_to_intended = _smart_remap_columns_to_intended
-            parse_full_name_column = _parse_full_name_column
-            normalize_name = _normalize_name
-            normalize_date = _normalize_date
-            normalize_sex = _normalize_sex
-            normalize_city = _normalize_city
-            normalize_batch_name = _normalize_batch_name
-            load_raw_file = _load_raw_file
+            load_sources = _load_sources
         if _pyi_splash:
             try: _pyi_splash.update_text("Booting up..\nPreparing engine...")
             except Exception: pass
         if progress_cb: progress_cb("Booting up..", "Preparing engine...", 24)
         if run_analysis is None:
-            from analysis_engine import run_analysis as _run_analysis
+            from analysis_engine import (
+                run_analysis as _run_analysis,
+                CancellationToken as _CancellationToken,
+                AnalysisCancelled as _AnalysisCancelled,
+                describe_findings as _describe_findings
+            )
             run_analysis = _run_analysis
+            CancellationToken = _CancellationToken
+            AnalysisCancelled = _AnalysisCancelled
+            describe_findings = _describe_findings
+            from run_state import (
+                RunStateStore as _RunStateStore, CheckpointStore as _CheckpointStore,
+                MatchArtifactStore as _MatchArtifactStore, MasterClusterStore as _MasterClusterStore
+            )
+            RunStateStore = _RunStateStore
+            CheckpointStore = _CheckpointStore
+            MatchArtifactStore = _MatchArtifactStore
+            MasterClusterStore = _MasterClusterStore
         if _pyi_splash:
             try: _pyi_splash.update_text("Booting up..\nLibraries ready")
             except Exception: pass
@@ -139,69 +134,6 @@ def lazy_import_heavy(progress_cb=None):
     except Exception as e:
         logging.error("Lazy import failed: %s", e, exc_info=True)
 
-class AppData:
-    def __init__(self, province_name):
-        self.data_dir = Path.home() / ".splink_master_checker"
-        self.data_dir.mkdir(exist_ok=True)
-        
-        # Get the province config, defaulting to Oriental Mindoro if not found
-        province_config = PROVINCE_PROFILES.get(province_name, PROVINCE_PROFILES["Oriental Mindoro"])
-        
-        # Use dot notation to access dataclass attributes
-        master_filename = os.path.basename(province_config.urls.master_db)
-        officials_filename = os.path.basename(province_config.urls.officials)
-        
-        self.master_db_path = self.data_dir / master_filename
-        self.master_db_meta_path = self.data_dir / f"{master_filename}.meta"
-        self.officials_db_path = self.data_dir / officials_filename
-        self.officials_db_meta_path = self.data_dir / f"{officials_filename}.meta"
-        
-        self.nickname_path = self.data_dir / "Nicknames.csv"
-        self.nickname_meta_path = self.data_dir / "Nicknames.csv.meta"
-        
-        self.window_prefs_path = self.data_dir / "window_preferences.json"
-    
-    def load_window_preferences(self):
-        """Load saved window size and position"""
-        default_prefs = {
-            "width": 520,
-            "height": 580,
-            "x": None,
-            "y": None
-        }
-        
-        if self.window_prefs_path.exists():
-            try:
-                with open(self.window_prefs_path, 'r') as f:
-                    prefs = json.load(f)
-                    return {**default_prefs, **prefs}
-            except (json.JSONDecodeError, IOError):
-                pass
-        
-        return default_prefs
-    
-    def save_window_preferences(self, width, height, x, y):
-        """Save current window size and position"""
-        prefs = {
-            "width": width,
-            "height": height,
-            "x": x,
-            "y": y
-        }
-        
-        try:
-            with open(self.window_prefs_path, 'w') as f:
-                json.dump(prefs, f, indent=2)
-        except IOError:
-            pass
-
-    def get_last_updated_str(self, file_path):
-        if not file_path.exists(): return "Never"
-        try:
-            return time.strftime('%Y-%m-%d %H:%M', time.localtime(file_path.stat().st_mtime))
-        except FileNotFoundError:
-            return "Never"
-
 class MasterCheckerApp(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -263,6 +195,7 @@ class MasterCheckerApp(ctk.CTk):
             self.user_filepath = None
             self.encryption_key = get_encryption_key("doleadmin")
             self.analysis_queue = None
+            self.cancel_token = None
 
             self._create_widgets()
             self.log_message("Welcome! Load your file to begin analysis.")
@@ -346,6 +279,9 @@ class MasterCheckerApp(ctk.CTk):
         self.progress_bar.set(0)
         self.progress_bar.grid(row=1, column=0, padx=10, sticky="ew")
 
+        self.cancel_button = ctk.CTkButton(self.progress_frame, text="Cancel", command=self.cancel_process, width=80, fg_color=fg_color, hover_color=hover_color)
+        self.cancel_button.grid(row=0, column=1, rowspan=2, padx=(0, 10), sticky="e")
+
         self.log_textbox = ctk.CTkTextbox(self.content_frame, state="disabled", wrap="word", font=ctk.CTkFont(family="Courier New", size=13))
         self.log_textbox.grid(row=2, column=0, padx=10, pady=(5, 0), sticky="nsew")
 
@@ -557,9 +493,10 @@ class MasterCheckerApp(ctk.CTk):
         self.progress_bar.configure(mode="indeterminate")
         self.progress_bar.start()
         self.progress_text.configure(text="Starting analysis...")
+        self.cancel_button.configure(state="normal")
         
         self.update_status("main", "Running analysis...", "running")
-        # Convert ProvinceURLs dataclass to dict expected by update_remote_files
+        # Convert ProvinceURLs dataclass to dict expected by load_sources
         province_urls = {
             "master_db": self.province_config.urls.master_db,
             "officials": self.province_config.urls.officials,
@@ -567,14 +504,25 @@ class MasterCheckerApp(ctk.CTk):
         global_urls = GLOBAL_CONFIG
 
         self.analysis_queue = queue.Queue()
+        self.cancel_token = CancellationToken()
         self.after(100, self.check_progress_queue)
         
         threading.Thread(
             target=self.process_in_thread, 
-            args=(province_urls, global_urls, self.analysis_queue),
+            args=(province_urls, global_urls, self.analysis_queue, self.cancel_token),
             daemon=True
         ).start()
 
+    def cancel_process(self):
+        """Ask the running analysis to stop; the worker thread restores the buttons once it has wound down."""
+        if self.cancel_token is None or self.cancel_token.cancelled:
+            return
+        self.cancel_token.cancel()
+        self.cancel_button.configure(state="disabled")
+        self.progress_text.configure(text="Cancelling analysis...")
+        self.update_status("main", "Cancelling analysis...", "running")
+        self.log_message("🛑 Cancel requested. Stopping workers...")
+
     def check_progress_queue(self):
         try:
             message = self.analysis_queue.get_nowait()
@@ -595,6 +543,9 @@ class MasterCheckerApp(ctk.CTk):
                 
                 self.progress_bar.set(progress_value)
                 self.progress_text.configure(text=display_text)
+
+            elif msg_type == "findings":
+                self.log_message("\n".join(describe_findings(message[1])))
             
         except queue.Empty:
             pass
@@ -602,78 +553,35 @@ class MasterCheckerApp(ctk.CTk):
             if self.run_button.cget("state") == "disabled":
                 self.after(100, self.check_progress_queue)
 
-    def process_in_thread(self, province_urls, global_urls, progress_queue):
+    def process_in_thread(self, province_urls, global_urls, progress_queue, cancel_token=None):
         start_time = datetime.now()
         try:
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore", UserWarning)
 
-                has_internet = update_remote_files(self.app_data, self.encryption_key, self.log_message, province_urls, global_urls)
+                # Downloads, decryption, parsing and cleaning of independent sources overlap
+                sources = load_sources(self.app_data, self.encryption_key, self.log_message, province_urls, global_urls,
+                                       user_filepath=self.user_filepath, cancel_token=cancel_token)
                 self.update_status("db"); self.update_status("officials"); self.update_status("nickname")
-                nickname_map = load_nickname_map(self.app_data, self.encryption_key, self.log_message)
-                master_df, officials_df = None, None
-                
-                if self.app_data.master_db_path.exists():
-                    try:
-                        master_df = load_raw_file(self.app_data.master_db_path, self.encryption_key)
-                        self.log_message(f"✅ [MasterDB] Loaded {len(master_df)} records from cache.")
-                    except Exception as e: self.log_message(f"⚠️ [MasterDB] Could not load from cache: {e}.")
-                
-                if self.app_data.officials_db_path.exists():
-                    try:
-                        officials_df = load_raw_file(self.app_data.officials_db_path, self.encryption_key)
-                        self.log_message(f"✅ [OfficialsDB] Loaded {len(officials_df)} records from cache.")
-                    except Exception as e: self.log_message(f"⚠️ [OfficialsDB] Could not load from cache: {e}.")
-                
-                user_df = pd.DataFrame()
-                if os.path.getsize(self.user_filepath) > 0:
-                    
-                    original_stderr = sys.stderr
-                    devnull = open(os.devnull, 'w')
-                    try:
-                        file_ext = os.path.splitext(self.user_filepath)[1].lower()
-                        if file_ext in ['.csv', '.txt']:
-                            sys.stderr = devnull
-                            sep = ',' if file_ext == '.csv' else '\t'
-                            user_df = pd.read_csv(self.user_filepath, sep=sep, dtype=str, engine='python', on_bad_lines='warn').dropna(how='all')
-                        elif file_ext in ['.xlsx', '.xls']:
-                            user_df = pd.read_excel(self.user_filepath, dtype=str).dropna(how='all')
-                    finally:
-                        sys.stderr = original_stderr
-                        devnull.close()
-
-                dfs = {"user": user_df, "master": master_df, "officials": officials_df}
-                for name, df in dfs.items():
-                    if df is None or df.empty: continue
-                    is_officials = (name == "officials")
-                    cleaned_df = smart_remap_columns_to_intended(df, is_officials_file=is_officials)
-                    cleaned_df = parse_full_name_column(cleaned_df)
-                    for col in cleaned_df.columns:
-                        if col in ["First Name", "Middle Name", "Last Name", "Suffix", "Position", "Barangay"]:
-                            cleaned_df[col] = cleaned_df[col].apply(normalize_name)
-                        elif col == "City":
-                            cleaned_df[col] = cleaned_df[col].apply(normalize_city)
-                        elif col == "Sex":
-                            cleaned_df[col] = cleaned_df[col].apply(normalize_sex)
-                        elif col == "Birthdate":
-                            cleaned_df[col] = cleaned_df[col].apply(normalize_date)
-                        elif col == "Contact Number":
-                            cleaned_df[col] = cleaned_df[col].apply(lambda x: str(x).strip() if pd.notna(x) else '')
-                        elif col == "Batch Name":
-                            cleaned_df[col] = cleaned_df[col].apply(normalize_batch_name)
-                    dfs[name] = cleaned_df
-                
-                user_df, master_df, officials_df = dfs["user"], dfs["master"], dfs["officials"]
+                nickname_map, master_df, officials_df, user_df = sources["nickname_map"], sources["master_df"], sources["officials_df"], sources["user_df"]
                 self.log_message(f"✅ [UserFile] Loaded and Cleaned {len(user_df)} records.")
+                if cancel_token is not None: cancel_token.raise_if_cancelled()
             
             run_analysis(
                 user_df, master_df, officials_df, nickname_map, 
                 self.user_filepath, 
                 self.province_name,  
                 self.log_message, self.update_status, start_time, self.log_final_report_path,
-                progress_queue
+                progress_queue, cancel_token,
+                run_state=RunStateStore(self.app_data.data_dir / INCREMENTAL_CONFIG["state_dir_name"], self.encryption_key),
+                checkpoints=CheckpointStore(self.app_data.data_dir / CHECKPOINT_CONFIG["dir_name"], self.encryption_key),
+                artifacts=MatchArtifactStore(self.app_data.data_dir / MATCH_ARTIFACT_CONFIG["dir_name"], self.encryption_key),
+                master_clusters=MasterClusterStore(self.app_data.master_clusters_path, self.encryption_key)
             )
 
+        except AnalysisCancelled:
+            self.log_message("🛑 Analysis cancelled before matching started. No report was generated.")
+            self.update_status("main", "Analysis cancelled.", "error")
         except Exception as e:
             self.log_message(f"❌ An unexpected error occurred: {e}")
             self.update_status("main", "An error occurred.", "error")
@@ -682,6 +590,8 @@ class MasterCheckerApp(ctk.CTk):
             self.after(100, self.enable_buttons)
 
     def enable_buttons(self):
+        self.cancel_token = None
+        self.cancel_button.configure(state="normal")
         self.progress_frame.grid_forget()
         self.progress_bar.stop()
         self.run_button.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
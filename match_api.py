@@ -0,0 +1,91 @@
+# match_api.py
+# Programmatic single-record matching against the MasterDB and OfficialsDB, without files or reports.
+#
+#   from match_api import MatchIndex
+#   index = MatchIndex.build(master_df, officials_df, nickname_map)
+#   for candidate in index.query({"First Name": "Juan", "Last Name": "Dela Cruz", "Birthdate": "1980-02-01"}, top_k=5):
+#       print(candidate.row, candidate.status, candidate.tier, candidate.score)
+#
+# Records and reference frames go through the same cleaning, feature precomputation, blocking and tiered
+# thresholds as a full analysis, so a candidate found here is the edge an analysis would have found.
+
+import warnings
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from analysis_engine import INTENDED_COLS, ReferenceIndex, row_label
+from data_utils import clean_dataframe
+
+# Stricter tiers rank first; candidates that pass no tier come last
+_TIER_RANK = {"strict": 0, "standard": 1, "lenient": 2, None: 3}
+
+@dataclass(frozen=True)
+class MatchCandidate:
+    """One reference record found for a query record."""
+    source: str                 # "official" or "master"
+    index: int                  # Row label in the reference frame
+    row: str                    # Row as shown in reports, e.g. "masterdb 15"
+    status: str                 # "Exact Match", "Fuzzy Match" or "No Match"
+    tier: Optional[str]         # Strictest tier passed ("strict", "standard", "lenient"), None for "No Match"
+    score: float
+    record: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_match(self):
+        return self.status != "No Match"
+
+    def to_dict(self):
+        return asdict(self)
+
+class MatchIndex(ReferenceIndex):
+    """A ReferenceIndex with a record-level query API; build() accepts raw (uncleaned) reference frames."""
+
+    @classmethod
+    def build(cls, master_df=None, officials_df=None, nickname_map=None, clean=True, cancel_token=None):
+        """Clean (unless clean=False), precompute and index the reference frames."""
+        if clean:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                master_df = clean_dataframe(_as_str_frame(master_df))
+                officials_df = clean_dataframe(_as_str_frame(officials_df), is_officials_file=True)
+        return cls(master_df, officials_df, nickname_map or {}, cancel_token)
+
+    def query(self, record, top_k=5, include_non_matches=False, clean=True):
+        """Ranked candidates for one record (dict or Series with user-file column names)."""
+        return self.query_many([record], top_k, include_non_matches, clean)[0]
+
+    def query_many(self, records, top_k=5, include_non_matches=False, clean=True):
+        """Ranked candidates per record, in input order; records is a list of dicts or a DataFrame.
+
+        Ranking: matches before non-matches, stricter tier first, then higher score. top_k=None keeps all.
+        """
+        query_df = self.prepare_records(records, clean)
+        found = self.match_records(query_df, include_non_matches)
+        results = []
+        for i in query_df.index:
+            ranked = sorted(found[i], key=lambda m: (_TIER_RANK[m[3]], -m[4], 0 if m[0] == "official" else 1, m[1]))
+            if top_k is not None: ranked = ranked[:top_k]
+            results.append([self._candidate(*m) for m in ranked])
+        return results
+
+    def prepare_records(self, records, clean=True):
+        """Query records as a cleaned DataFrame with a 0..n-1 index."""
+        df = records.copy() if isinstance(records, pd.DataFrame) else pd.DataFrame([dict(r) for r in records])
+        if not clean:
+            return df.reset_index(drop=True)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            return clean_dataframe(_as_str_frame(df)).reset_index(drop=True)
+
+    def _candidate(self, source, idx, status, tier, score):
+        df = self.frames[source]
+        cols = INTENDED_COLS + (["Position", "Barangay"] if source == "official" else [])
+        record = {col: ("" if pd.isna(df.at[idx, col]) else df.at[idx, col]) for col in cols if col in df.columns}
+        return MatchCandidate(source, int(idx), row_label(source, idx), status, tier, round(float(score), 2), record)
+
+def _as_str_frame(df):
+    # Cleaning expects the string columns a user file is read with
+    if df is None: return None
+    return df.astype(object).where(df.notna(), "").astype(str)
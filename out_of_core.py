@@ -0,0 +1,210 @@
+# out_of_core.py
+# Matching with the normalised records, blocking keys and edges in a scratch SQLite database instead of RAM.
+#
+# For MasterDBs and user files whose record dictionaries and candidate-pair sets no longer fit in memory.
+# Records and their blocking keys are written to the database once; then, per pair type, the (key, source, row)
+# index is read in key order, one block at a time, and the block's pairs are scored in bounded batches through
+# the normal pass pipeline. Edges go back to the database and are read once at the end. While scoring, memory
+# stays at one batch plus a bounded record cache, whatever the number of candidate pairs; the matched edges
+# are then loaded in full, since grouping needs all of them (they are a small fraction of the pairs scored).
+#
+# A pair that shares several keys is scored only in the block of the smallest key they share, so no global
+# set of seen pairs is needed. Keys are stored as 64-bit hashes (a collision only adds a candidate pair).
+#
+# Scoring runs in this process on one core, one batch at a time: about as fast as the inline backend, so
+# roughly (cores - 1) times slower than the process backend (see README). The database holds cleartext
+# records, so it is created readable by this user only and deleted when matching ends, also on errors.
+
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+from collections import OrderedDict
+from itertools import combinations
+
+import numpy as np
+
+import config
+from analysis_engine import (
+    PASS_PIPELINE, MATCH_EDGE_DTYPE, MATCH_STATUS_NAMES, ROW_SOURCE_IDS, CANCEL_CHECK_EVERY,
+    _MATCH_FIELDS, _get_blocking_keys_optimized, _raise_if_cancelled, _split_near_misses, _concat_edges, process_chunk
+)
+
+def key_hash(key):
+    """Blocking key as a signed 64-bit integer (SQLite INTEGER)."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+class OutOfCoreMatcher:
+    """A scratch SQLite database of records, blocking keys and edges for one analysis."""
+
+    def __init__(self, path, cache_records=None, batch_pairs=None):
+        settings = config.OUT_OF_CORE_CONFIG
+        self.path = str(path)
+        self.cache_records = cache_records or settings["cache_records"]
+        self.batch_pairs = batch_pairs or settings["batch_pairs"]
+        self._cache = OrderedDict()
+        self.conn = sqlite3.connect(self.path)
+        # Scratch data: no journal or fsync, and a bounded page cache
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute(f"PRAGMA cache_size = -{int(settings['sqlite_cache_mb']) * 1024}")
+        self.conn.executescript("""
+            CREATE TABLE records (source INTEGER, idx INTEGER, data BLOB, keys BLOB, PRIMARY KEY (source, idx)) WITHOUT ROWID;
+            CREATE TABLE keys (key INTEGER, source INTEGER, idx INTEGER);
+            CREATE TABLE edges (pair_type TEXT, i INTEGER, j INTEGER, status INTEGER, score REAL);
+        """)
+
+    def load(self, source, df, cancel_token=None):
+        """Write the match fields and blocking keys of every row of a precomputed frame."""
+        code = ROW_SOURCE_IDS[source]
+        rows = int(config.OUT_OF_CORE_CONFIG["insert_rows"])
+        fields = [c for c in _MATCH_FIELDS if c in df.columns]
+        for start in range(0, len(df), rows):
+            _raise_if_cancelled(cancel_token)
+            records, keys = [], []
+            for idx, rec in df.iloc[start:start + rows][fields].to_dict("index").items():
+                hashed = sorted({key_hash(key) for key in _get_blocking_keys_optimized(rec)})
+                records.append((code, int(idx), pickle.dumps(rec, protocol=pickle.HIGHEST_PROTOCOL), np.array(hashed, dtype=np.int64).tobytes()))
+                keys.extend((key, code, int(idx)) for key in hashed)
+            self.conn.executemany("INSERT INTO records VALUES (?, ?, ?, ?)", records)
+            self.conn.executemany("INSERT INTO keys VALUES (?, ?, ?)", keys)
+        self.conn.commit()
+
+    def build_index(self):
+        # Covering index: blocks are read in key order without touching the table
+        self.conn.execute("CREATE INDEX keys_by_key ON keys (key, source, idx)")
+        self.conn.commit()
+
+    def _records(self, code, indices):
+        """{row index: (record dict, frozenset of key hashes)}, through a bounded LRU cache."""
+        cache, found, missing = self._cache, {}, []
+        for idx in indices:
+            entry = cache.get((code, idx))
+            if entry is None:
+                missing.append(idx)
+            else:
+                cache.move_to_end((code, idx))
+                found[idx] = entry
+        for start in range(0, len(missing), 500):
+            part = missing[start:start + 500]
+            query = f"SELECT idx, data, keys FROM records WHERE source = ? AND idx IN ({','.join('?' * len(part))})"
+            for idx, data, keys in self.conn.execute(query, (code, *part)):
+                entry = (pickle.loads(data), frozenset(np.frombuffer(keys, dtype=np.int64).tolist()))
+                found[idx] = cache[(code, idx)] = entry
+        while len(cache) > self.cache_records:
+            cache.popitem(last=False)
+        return found
+
+    def _blocks(self, code1, code2):
+        """(key, rows of source 1, rows of source 2) per blocking key both sources share, in key order."""
+        query = "SELECT key, source, idx FROM keys WHERE source IN (?, ?) ORDER BY key"
+        current, side1, side2 = None, [], []
+        for key, source, idx in self.conn.execute(query, (code1, code2)):
+            if key != current:
+                if side1 and side2:
+                    yield current, side1, side2
+                current, side1, side2 = key, [], []
+            if source == code1:
+                side1.append(idx)
+            if source == code2:
+                side2.append(idx)
+        if side1 and side2:
+            yield current, side1, side2
+
+    def _pairs(self, pair_type):
+        """Batches of (pairs, records1, records2); each candidate pair appears exactly once."""
+        source1, source2 = pair_type.split('_')
+        code1, code2 = ROW_SOURCE_IDS[source1], ROW_SOURCE_IDS[source2]
+        pairs, records1, records2 = [], {}, {}
+        for key, rows1, rows2 in self._blocks(code1, code2):
+            block1 = self._records(code1, rows1)
+            block2 = block1 if code1 == code2 else self._records(code2, rows2)
+            block_pairs = combinations(sorted(rows1), 2) if code1 == code2 else ((i, j) for i in rows1 for j in rows2)
+            for i, j in block_pairs:
+                # Score the pair at the smallest key it shares
+                if min(block1[i][1] & block2[j][1]) != key:
+                    continue
+                pairs.append((i, j))
+                records1[i], records2[j] = block1[i][0], block2[j][0]
+                if len(pairs) >= self.batch_pairs:
+                    yield pairs, records1, records2
+                    pairs, records1, records2 = [], {}, {}
+        if pairs:
+            yield pairs, records1, records2
+
+    def match(self, pair_type, near_misses=None, cancel_token=None):
+        """Score every candidate pair of one pair type through its passes; returns (pairs scored, edges written)."""
+        scored = written = 0
+        for n, (pairs, records1, records2) in enumerate(self._pairs(pair_type)):
+            _raise_if_cancelled(cancel_token)
+            remaining, found = pairs, []
+            for func in PASS_PIPELINE[pair_type]:
+                if not remaining:
+                    break
+                edges = _split_near_misses(process_chunk(remaining, records1, records2, func, cancel_token), near_misses)
+                matched = set(zip(edges["i"].tolist(), edges["j"].tolist()))
+                remaining = [p for p in remaining if p not in matched]
+                found.append(edges)
+            edges = _concat_edges(found)
+            self.conn.executemany("INSERT INTO edges VALUES (?, ?, ?, ?, ?)",
+                                  zip([pair_type] * len(edges), edges["i"].tolist(), edges["j"].tolist(), edges["status"].tolist(), edges["score"].tolist()))
+            scored, written = scored + len(pairs), written + len(edges)
+            if n % 16 == 0:
+                self.conn.commit()
+        self.conn.commit()
+        return scored, written
+
+    def edges(self):
+        """{pair_type: MATCH_EDGE_DTYPE array} of everything written, in (i, j) order."""
+        result = {}
+        for pair_type in PASS_PIPELINE:
+            # Read straight into the array, without a list of row tuples next to it
+            rows = np.fromiter(self.conn.execute("SELECT i, j, status, score FROM edges WHERE pair_type = ? ORDER BY i, j", (pair_type,)), dtype=MATCH_EDGE_DTYPE)
+            if len(rows):
+                result[pair_type] = rows
+        return result
+
+    def close(self):
+        self.conn.close()
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logging.warning("Could not remove the out-of-core database %s: %s", self.path, e)
+
+def run_out_of_core_matching(user_df, master_df, officials_df, near_misses=None, cancel_token=None, log_callback=None):
+    """Match through a scratch SQLite database; returns edges in AnalysisEngine.all_matches form.
+
+    near_misses ({pair_type: list}) receives the "No Match" near-miss arrays, as _run_parallel_comparison does.
+    """
+    log = log_callback or (lambda message: None)
+    directory = config.OUT_OF_CORE_CONFIG["directory"] or tempfile.gettempdir()
+    os.makedirs(directory, exist_ok=True)
+    # mkstemp creates the file readable by this user only; SQLite takes an empty file as a new database
+    handle, path = tempfile.mkstemp(prefix="match_", suffix=".sqlite", dir=directory)
+    os.close(handle)
+    matcher = OutOfCoreMatcher(path)
+    try:
+        frames = {"user": user_df, "master": master_df, "official": officials_df}
+        for source, df in frames.items():
+            if df is not None and not df.empty:
+                matcher.load(source, df, cancel_token)
+        matcher.build_index()
+        log(f"💽 Records and blocking keys written to {path} ({os.path.getsize(path) / 2**20:,.0f} MB).")
+        for pair_type in PASS_PIPELINE:
+            other = frames[pair_type.split('_')[1]]
+            if other is None or other.empty:
+                continue
+            scored, written = matcher.match(pair_type, near_misses[pair_type] if near_misses is not None else None, cancel_token)
+            log(f"✅ [{pair_type}] {scored:,} candidate pairs scored from disk, {written:,} matches.")
+        all_matches = []
+        for pair_type, edges in matcher.edges().items():
+            source1, source2 = pair_type.split('_')
+            for n, (i, j, code, score) in enumerate(zip(edges["i"].tolist(), edges["j"].tolist(), edges["status"].tolist(), edges["score"].tolist())):
+                if n % CANCEL_CHECK_EVERY == 0:
+                    _raise_if_cancelled(cancel_token)
+                all_matches.append((f"{source1}_{i}", f"{source2}_{j}", MATCH_STATUS_NAMES[code], score))
+        return all_matches
+    finally:
+        matcher.close()
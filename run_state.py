@@ -0,0 +1,262 @@
+# run_state.py
+# Encrypted state kept between runs:
+# - RunStateStore: match state per beneficiary list ("lineage"), so a resubmitted, grown file only
+#   blocks and scores the rows that are new or modified since the last run.
+# - CheckpointStore: stage checkpoints of one analysis, so a crashed or interrupted run resumes.
+# - MatchArtifactStore: scored edges, groups and row provenance of the latest run per lineage, as
+#   columnar arrays, for tools that work from a finished run instead of matching again.
+# - MasterClusterStore: duplicate clusters inside a province's MasterDB, per MasterDB version.
+#
+# A lineage is the user file name with version suffixes such as "(2)", "_v3", "final" or a date removed,
+# plus the province. Rows are identified by a hash of their cleaned values and their occurrence number,
+# so unchanged rows are recognised even when rows are inserted or re-ordered.
+
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import re
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from cryptography.fernet import InvalidToken
+
+import config
+from data_utils import encrypt_data, decrypt_data
+
+RUN_STATE_VERSION = 1
+CHECKPOINT_VERSION = 3
+ARTIFACT_VERSION = 3
+MASTER_CLUSTER_VERSION = 1
+
+_VERSION_SUFFIX = re.compile(r"([\s_\-.]*(\(\d+\)|v\d+|rev\d+|final|updated|copy|\d{4}[-_]?\d{2}[-_]?\d{2}|\d{1,2}[-_]\d{1,2}[-_]\d{2,4}))+$", re.IGNORECASE)
+
+def lineage_id(user_filepath, province_name):
+    """Stable id shared by successive submissions of the same list."""
+    stem = os.path.splitext(os.path.basename(str(user_filepath)))[0].strip().lower()
+    stem = _VERSION_SUFFIX.sub("", stem) or stem
+    return hashlib.sha256(f"{province_name}|{stem}".encode("utf-8")).hexdigest()[:24]
+
+def record_keys(df):
+    """(row hash, occurrence) per row; identical rows are told apart by how many came before them."""
+    if df is None or df.empty: return []
+    cols = sorted(c for c in df.columns if not str(c).startswith("_opt_"))
+    hashes = pd.util.hash_pandas_object(df[cols].astype(str), index=False)
+    occurrence = hashes.groupby(hashes).cumcount()
+    return list(zip(hashes.tolist(), occurrence.tolist()))
+
+def frame_fingerprint(df):
+    """Content hash of a reference table (values and index), or None when it is missing."""
+    if df is None or df.empty: return None
+    cols = sorted(c for c in df.columns if not str(c).startswith("_opt_"))
+    hashes = pd.util.hash_pandas_object(df[cols].astype(str), index=True)
+    return hashlib.sha256(hashes.values.tobytes() + json.dumps(cols).encode("utf-8")).hexdigest()
+
+def matching_fingerprint(symmetrical_map):
+    """Stored edges are only valid for the engine version, thresholds and nickname map that produced them."""
+    payload = json.dumps({
+        "state": RUN_STATE_VERSION, "version": config.APP_VERSION, "matching": config.ADAPTIVE_MATCHING_CONFIG,
+        "nicknames": sorted((name, sorted(names)) for name, names in symmetrical_map.items())
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def analysis_input_hash(user_df, master_df, officials_df, nickname_map, province_name, reference_fingerprints=None, time_budget=None):
+    """Identifies one analysis: raw input contents, province, matching settings, time budget and engine version.
+
+    reference_fingerprints ({"user_master": ..., "user_official": ...}) skips re-hashing reference tables already fingerprinted.
+    """
+    if reference_fingerprints is not None:
+        tables = [frame_fingerprint(user_df), reference_fingerprints["user_master"], reference_fingerprints["user_official"]]
+    else:
+        tables = [frame_fingerprint(df) for df in (user_df, master_df, officials_df)]
+    payload = json.dumps({
+        "checkpoint": CHECKPOINT_VERSION, "version": config.APP_VERSION, "province": province_name,
+        "tables": tables,
+        "nicknames": sorted((str(nick), sorted(map(str, formals))) for nick, formals in (nickname_map or {}).items()),
+        "matching": config.ADAPTIVE_MATCHING_CONFIG, "optimizations": config.MATCHING_OPTIMIZATIONS, "cluster_split": config.CLUSTER_SPLIT_CONFIG,
+        "master_clusters": config.MASTER_CLUSTER_CONFIG,
+        # Pairs a budgeted run deferred are left out of its later passes, so a run under another budget cannot resume from it
+        "time_budget": time_budget
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def reference_frame_key(fingerprint, symmetrical_map):
+    """A precomputed reference table is valid for one raw content (frame_fingerprint) under one matching configuration."""
+    return hashlib.sha256(f"{CHECKPOINT_VERSION}|{fingerprint}|{matching_fingerprint(symmetrical_map)}".encode("utf-8")).hexdigest()
+
+def _read_encrypted(path, encryption_key):
+    """Decrypt and unpickle a store file; None if it is missing or unreadable."""
+    if not path.exists(): return None
+    try:
+        return pickle.loads(zlib.decompress(decrypt_data(path.read_bytes(), encryption_key)))
+    except (InvalidToken, zlib.error, pickle.UnpicklingError, EOFError, ValueError) as e:
+        logging.warning("Discarding unreadable state file %s: %s", path, e)
+        return None
+
+def _write_encrypted(path, obj, encryption_key):
+    _write_atomic(path, encrypt_data(zlib.compress(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)), encryption_key))
+
+def _write_atomic(path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(payload)
+    # Replace in one step so a crash mid-write never leaves a truncated file behind
+    os.replace(tmp_path, path)
+
+class RunStateStore:
+    """One encrypted, compressed state file per lineage in the app data directory."""
+
+    def __init__(self, directory, encryption_key):
+        self.directory = Path(directory)
+        self.encryption_key = encryption_key
+
+    def path_for(self, lineage):
+        return self.directory / f"{lineage}.state"
+
+    def load(self, lineage):
+        state = _read_encrypted(self.path_for(lineage), self.encryption_key)
+        return state if isinstance(state, dict) and state.get("version") == RUN_STATE_VERSION else None
+
+    def save(self, lineage, state):
+        _write_encrypted(self.path_for(lineage), {**state, "version": RUN_STATE_VERSION}, self.encryption_key)
+
+    def discard(self, lineage):
+        self.path_for(lineage).unlink(missing_ok=True)
+
+class CheckpointStore:
+    """Encrypted per-stage checkpoints of one analysis, keyed by analysis_input_hash().
+
+    The match stage is written in parts, one per finished pass, each holding only what that pass added.
+    Precomputed reference tables are stored once per reference_frame_key() and shared by every run on them.
+    """
+
+    def __init__(self, directory, encryption_key):
+        self.directory = Path(directory)
+        self.encryption_key = encryption_key
+
+    def path_for(self, run_key, stage, part=None):
+        name = stage if part is None else f"{stage}.{part:03d}"
+        return self.directory / f"{run_key[:24]}.{name}.ckpt"
+
+    def frame_path(self, frame_key):
+        return self.directory / f"reference.{frame_key[:24]}.ckpt"
+
+    def _load_path(self, path, key):
+        checkpoint = _read_encrypted(path, self.encryption_key)
+        if not isinstance(checkpoint, dict) or checkpoint.get("version") != CHECKPOINT_VERSION or checkpoint.get("inputs") != key:
+            return None
+        return checkpoint["payload"]
+
+    def load(self, run_key, stage):
+        """The stage payload, or None unless it was written for exactly these inputs and engine version."""
+        return self._load_path(self.path_for(run_key, stage), run_key)
+
+    def load_parts(self, run_key, stage):
+        """Payloads of the parts of a stage, in part order, up to the first missing or invalid one."""
+        paths = sorted(self.directory.glob(f"{run_key[:24]}.{stage}.*.ckpt"))
+        parts = []
+        for n, path in enumerate(paths):
+            payload = self._load_path(path, run_key)
+            if payload is None:
+                # Later parts only add to this one; without it they are of no use
+                for stale in paths[n:]:
+                    stale.unlink(missing_ok=True)
+                break
+            parts.append(payload)
+        return parts
+
+    def save(self, run_key, stage, payload, part=None):
+        _write_encrypted(self.path_for(run_key, stage, part), {"version": CHECKPOINT_VERSION, "inputs": run_key, "payload": payload}, self.encryption_key)
+
+    def load_frame(self, frame_key):
+        """The precomputed table saved under this reference_frame_key(), or None."""
+        path = self.frame_path(frame_key)
+        frame = self._load_path(path, frame_key)
+        if frame is None:
+            path.unlink(missing_ok=True)
+            return None
+        # Still in use: keep prune() from removing it
+        os.utime(path)
+        return frame
+
+    def save_frame(self, frame_key, df):
+        """Written only when the reference table or matching settings changed since the last run."""
+        if self.frame_path(frame_key).exists(): return
+        _write_encrypted(self.frame_path(frame_key), {"version": CHECKPOINT_VERSION, "inputs": frame_key, "payload": df}, self.encryption_key)
+
+    def discard(self, run_key):
+        """Remove every stage of a run; shared reference tables are left to prune()."""
+        if not self.directory.exists(): return
+        for path in self.directory.glob(f"{run_key[:24]}.*.ckpt"):
+            path.unlink(missing_ok=True)
+
+    def prune(self, max_age_days):
+        """Remove checkpoints of runs that were never resumed, and reference tables no run used since."""
+        if not self.directory.exists(): return
+        cutoff = time.time() - max_age_days * 86400
+        for path in self.directory.glob("*.ckpt"):
+            try:
+                if path.stat().st_mtime < cutoff: path.unlink()
+            except OSError:
+                pass
+
+class MatchArtifactStore:
+    """The latest analysis of each lineage as encrypted numpy arrays (.npz, read without pickle).
+
+    "edges": both records (source id, index label), status, tier, score and name-only flag of every accepted
+    pair and every near miss ("No Match" rows, see THRESHOLD_SWEEP_CONFIG).
+    "members": every record in a group: source id, index label, component, report section and group_id.
+    "clusters": the MasterDB duplicate clusters (MASTER_CLUSTER_CONFIG) of MasterDB records in "edges".
+    "meta": JSON dict describing the run. Source ids are analysis_engine.ROW_SOURCE_IDS.
+    """
+
+    def __init__(self, directory, encryption_key):
+        self.directory = Path(directory)
+        self.encryption_key = encryption_key
+
+    def path_for(self, lineage):
+        return self.directory / f"{lineage}.matches"
+
+    def load(self, lineage):
+        """{"edges": ..., "members": ..., "clusters": ..., "meta": {...}}, or None if missing, unreadable or of another version."""
+        path = self.path_for(lineage)
+        if not path.exists(): return None
+        try:
+            with np.load(io.BytesIO(decrypt_data(path.read_bytes(), self.encryption_key)), allow_pickle=False) as arrays:
+                artifact = {"edges": arrays["edges"], "members": arrays["members"], "clusters": arrays["clusters"], "meta": json.loads(arrays["meta"].tobytes().decode("utf-8"))}
+        except (InvalidToken, KeyError, ValueError, OSError) as e:
+            logging.warning("Discarding unreadable match artifact %s: %s", path, e)
+            return None
+        return artifact if artifact["meta"].get("version") == ARTIFACT_VERSION else None
+
+    def save(self, lineage, edges, members, clusters, meta):
+        buffer = io.BytesIO()
+        meta_bytes = json.dumps({**meta, "version": ARTIFACT_VERSION}, default=str).encode("utf-8")
+        np.savez_compressed(buffer, edges=edges, members=members, clusters=clusters, meta=np.frombuffer(meta_bytes, dtype=np.uint8))
+        _write_atomic(self.path_for(lineage), encrypt_data(buffer.getvalue(), self.encryption_key))
+
+def master_cluster_fingerprint(master_fingerprint, symmetrical_map):
+    """Clusters are valid for one MasterDB content (frame_fingerprint) under one matching configuration."""
+    return hashlib.sha256(f"{MASTER_CLUSTER_VERSION}|{master_fingerprint}|{matching_fingerprint(symmetrical_map)}".encode("utf-8")).hexdigest()
+
+class MasterClusterStore:
+    """One encrypted file next to a province's MasterDB cache with that MasterDB's duplicate clusters."""
+
+    def __init__(self, path, encryption_key):
+        self.path = Path(path)
+        self.encryption_key = encryption_key
+
+    def load(self, fingerprint):
+        """The clusters dict saved for exactly this fingerprint (master_cluster_fingerprint), else None."""
+        stored = _read_encrypted(self.path, self.encryption_key)
+        if not isinstance(stored, dict) or stored.get("fingerprint") != fingerprint:
+            return None
+        return stored["clusters"]
+
+    def save(self, fingerprint, clusters):
+        _write_encrypted(self.path, {"fingerprint": fingerprint, "clusters": clusters}, self.encryption_key)
@@ -0,0 +1,21 @@
+# Shared fixtures: small synthetic beneficiary lists (benchmark.make_synthetic_records) with a share of
+# near-duplicates, MasterDB links and official hits, so every pair type produces matches.
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import make_synthetic_records
+
+@pytest.fixture
+def sources():
+    """Cleaned (user_df, master_df, officials_df) frames."""
+    user_df = make_synthetic_records(2500)
+    officials_df = user_df.sample(frac=0.05, random_state=3).reset_index(drop=True)
+    officials_df["Position"], officials_df["Barangay"] = "Kagawad", "Pob"
+    master_df = pd.concat([make_synthetic_records(3000, seed=11), user_df.sample(frac=0.1, random_state=5)], ignore_index=True)
+    return user_df, master_df, officials_df
@@ -0,0 +1,61 @@
+# A running analysis stops within CANCEL_LATENCY_BOUND_SECONDS of a cancel request, mid-matching,
+# and leaves no report and no new checkpoint behind.
+
+import queue
+import threading
+from datetime import datetime
+
+import pytest
+
+from analysis_engine import CancellationToken, run_analysis
+from data_utils import get_encryption_key
+from run_state import CheckpointStore
+
+# Workers check the token every CANCEL_CHECK_EVERY pairs; far below a second on any backend that shares memory
+CANCEL_LATENCY_BOUND_SECONDS = 2.0
+
+class _MatchingStarted(queue.Queue):
+    """Progress queue that signals when the first comparison pass begins."""
+
+    def __init__(self):
+        super().__init__()
+        self.matching = threading.Event()
+
+    def put(self, message, *args, **kwargs):
+        if str(message[-1]).startswith("Step 2: Comparing records"):
+            self.matching.set()
+        super().put(message, *args, **kwargs)
+
+def _checkpoint_files(directory):
+    return {path.name: path.stat().st_mtime_ns for path in directory.glob("*.ckpt")} if directory.exists() else {}
+
+@pytest.mark.parametrize("backend", ["inline", "thread"])
+def test_cancel_mid_matching_stops_quickly_without_outputs(sources, tmp_path, backend):
+    user_df, master_df, officials_df = sources
+    checkpoint_dir = tmp_path / "checkpoints"
+    progress, token, reports, result = _MatchingStarted(), CancellationToken(), [], {}
+
+    def analyze():
+        result["engine"] = run_analysis(
+            user_df.copy(), master_df.copy(), officials_df.copy(), {}, str(tmp_path / "users.xlsx"), "Oriental Mindoro",
+            lambda message: None, lambda *args, **kwargs: None, datetime.now(), reports.append, progress, token,
+            execution_backend=backend, checkpoints=CheckpointStore(checkpoint_dir, get_encryption_key("doleadmin"))
+        )
+
+    worker = threading.Thread(target=analyze, daemon=True)
+    worker.start()
+    assert progress.matching.wait(timeout=60), "matching never started"
+    # Let the first pass get going so the cancel lands inside the workers' scoring loop
+    worker.join(timeout=0.3)
+    assert worker.is_alive(), "the fixture finished matching before it could be cancelled"
+    before = _checkpoint_files(checkpoint_dir)
+    token.cancel()
+    worker.join(timeout=CANCEL_LATENCY_BOUND_SECONDS)
+
+    assert not worker.is_alive(), f"analysis still running {CANCEL_LATENCY_BOUND_SECONDS}s after cancel"
+    engine = result["engine"]
+    assert engine.cancel_latency is not None and engine.cancel_latency < CANCEL_LATENCY_BOUND_SECONDS
+    assert not engine.report_saved and reports == []
+    assert not [path for path in tmp_path.iterdir() if path.name != "checkpoints"]
+    assert _checkpoint_files(checkpoint_dir) == before
+    assert not any(name.endswith(".groups.ckpt") for name in before)
@@ -0,0 +1,54 @@
+# An analysis interrupted after its prep or match checkpoints resumes to the report of an uninterrupted run.
+
+import queue
+from datetime import datetime
+
+import pytest
+
+from analysis_engine import PASS_PIPELINE, CancellationToken, run_analysis
+from benchmark import _report_groups
+from data_utils import get_encryption_key
+from run_state import CheckpointStore
+
+class _CancelAtPass(queue.Queue):
+    """Progress queue that cancels the run when the given comparison pass (1-based) starts."""
+
+    def __init__(self, token, cancel_at):
+        super().__init__()
+        self.token, self.cancel_at, self.passes = token, cancel_at, 0
+
+    def put(self, message, *args, **kwargs):
+        if str(message[-1]).startswith("Step 2: Comparing records ("):
+            self.passes += 1
+            if self.passes == self.cancel_at:
+                self.token.cancel()
+        super().put(message, *args, **kwargs)
+
+def _analyze(sources, directory, checkpoints=None, cancel_at=None):
+    user_df, master_df, officials_df = sources
+    token = CancellationToken() if cancel_at else None
+    logs = []
+    engine = run_analysis(
+        user_df.copy(), master_df.copy(), officials_df.copy(), {}, str(directory / "users.xlsx"), "Oriental Mindoro",
+        logs.append, lambda *args, **kwargs: None, datetime.now(), lambda *args: None,
+        _CancelAtPass(token, cancel_at) if cancel_at else queue.Queue(), token, execution_backend="inline", checkpoints=checkpoints
+    )
+    return engine, logs
+
+@pytest.mark.parametrize("cancel_at", [1, 3, 6])
+def test_resumed_run_reports_like_uninterrupted_run(sources, tmp_path, cancel_at):
+    expected, _ = _analyze(sources, tmp_path)
+    checkpoints = CheckpointStore(tmp_path / "checkpoints", get_encryption_key("doleadmin"))
+
+    interrupted, _ = _analyze(sources, tmp_path, checkpoints, cancel_at)
+    assert interrupted.cancel_latency is not None and not interrupted.report_saved
+    resumed, logs = _analyze(sources, tmp_path, checkpoints)
+    done = "preprocessing" if cancel_at == 1 else f"{cancel_at - 1} of {sum(len(funcs) for funcs in PASS_PIPELINE.values())} comparison passes"
+    assert f"⏩ Resuming an interrupted run on the same files: {done} already done." in logs
+
+    assert resumed.report_saved
+    assert set(resumed.reports) == set(expected.reports)
+    for section in expected.reports:
+        assert _report_groups(resumed.reports[section]) == _report_groups(expected.reports[section]), section
+    # A saved report discards the run's checkpoints
+    assert not list((tmp_path / "checkpoints").glob(f"{resumed.run_key[:24]}.*"))
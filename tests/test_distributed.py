@@ -0,0 +1,42 @@
+# Key-partitioned matching on local nodes finds exactly the edges of inline matching.
+
+import queue
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import config
+from analysis_engine import run_analysis
+from distributed import start_local_nodes, stop_local_nodes
+
+def _edges(engine):
+    """{pair_type: edges in (i, j) order}; the nodes return their partitions in any order."""
+    return {pair_type: np.sort(edges, order=["i", "j"]) for pair_type, edges in engine._edges_by_pair_type().items()}
+
+def _analyze(sources, directory, **options):
+    user_df, master_df, officials_df = sources
+    directory.mkdir()
+    return run_analysis(
+        user_df.copy(), master_df.copy(), officials_df.copy(), {}, str(directory / "users.xlsx"), "Oriental Mindoro",
+        lambda message: None, lambda *args, **kwargs: None, datetime.now(), lambda *args: None, queue.Queue(), **options
+    )
+
+@pytest.fixture
+def every_pair_scored(monkeypatch):
+    # Nodes score every candidate pair; turn off the inline shortcuts so both paths do the same work
+    monkeypatch.setitem(config.MATCHING_OPTIMIZATIONS, "skip_connected_pairs", False)
+    monkeypatch.setitem(config.MATCHING_OPTIMIZATIONS, "officials_first_short_circuit", False)
+
+def test_multi_node_edges_equal_inline(sources, tmp_path, every_pair_scored):
+    inline = _edges(_analyze(sources, tmp_path / "inline", execution_backend="inline"))
+    addresses, processes = start_local_nodes(2, backend="inline")
+    try:
+        distributed = _edges(_analyze(sources, tmp_path / "nodes", nodes=addresses))
+    finally:
+        stop_local_nodes(addresses, processes)
+
+    assert set(distributed) == set(inline) and inline
+    for pair_type, edges in inline.items():
+        assert len(edges), pair_type
+        assert np.array_equal(distributed[pair_type], edges), pair_type
@@ -0,0 +1,54 @@
+# The officials-first short-circuit leaves the report unchanged, also for rows linked to an official only
+# through another user row.
+
+import queue
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import config
+from analysis_engine import ROW_SOURCE_IDS, run_analysis
+from benchmark import make_synthetic_records, _report_groups
+
+@pytest.fixture
+def official_reached_through_user_row():
+    """Official O; user row A = O without Sex (a strict official hit); user row B = A with typos, no birthdate or
+    city but with Sex. B matches A (a name-only pair, lower threshold) but not O, so only A links it to O.
+    """
+    user_df = make_synthetic_records(300, seed=21)
+    master_df = make_synthetic_records(300, seed=22)
+    official = {"First Name": "Maria", "Middle Name": "Santos", "Last Name": "Dimaculangan", "Suffix": "", "Birthdate": "1980-04-12",
+                "City": "Calapan", "Sex": "Female", "Contact Number": ""}
+    officials_df = pd.DataFrame([{**official, "Position": "Kagawad", "Barangay": "Poblacion"}])
+    row_a = {**official, "Sex": ""}
+    row_b = {**row_a, "Middle Name": "antos", "Last Name": "Dimaculagan", "Birthdate": "", "City": "", "Sex": "Female"}
+    user_df = pd.concat([user_df, pd.DataFrame([row_a, row_b])], ignore_index=True)
+    return user_df, master_df, officials_df
+
+def _reports(sources, tmp_path, monkeypatch, officials_first):
+    monkeypatch.setitem(config.MATCHING_OPTIMIZATIONS, "officials_first_short_circuit", officials_first)
+    user_df, master_df, officials_df = sources
+    directory = tmp_path / str(officials_first)
+    directory.mkdir()
+    engine = run_analysis(
+        user_df.copy(), master_df.copy(), officials_df.copy(), {}, str(directory / "users.xlsx"), "Oriental Mindoro",
+        lambda message: None, lambda *args, **kwargs: None, datetime.now(), lambda *args: None, queue.Queue(), execution_backend="inline"
+    )
+    return engine.reports
+
+@pytest.mark.parametrize("fixture", ["official_reached_through_user_row", "sources"])
+def test_officials_first_keeps_report_groups(fixture, request, tmp_path, monkeypatch):
+    sources = request.getfixturevalue(fixture)
+    base = _reports(sources, tmp_path, monkeypatch, False)
+    fast = _reports(sources, tmp_path, monkeypatch, True)
+    assert set(fast) == set(base)
+    for section in base:
+        assert _report_groups(fast[section]) == _report_groups(base[section]), section
+
+def test_row_linked_through_user_row_is_in_officials_group(official_reached_through_user_row, tmp_path, monkeypatch):
+    user_df = official_reached_through_user_row[0]
+    reports = _reports(official_reached_through_user_row, tmp_path, monkeypatch, True)
+    rows = {(source, index) for group in _report_groups(reports["officials"]) for source, index, _ in group}
+    user = ROW_SOURCE_IDS["user"]
+    assert {(user, len(user_df) - 2), (user, len(user_df) - 1)} <= rows
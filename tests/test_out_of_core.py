@@ -0,0 +1,36 @@
+# Out-of-core matching (a scratch SQLite database) finds exactly the edges of inline matching.
+
+import queue
+from datetime import datetime
+
+import numpy as np
+
+import config
+from analysis_engine import run_analysis
+
+def _analyze(sources, directory, **options):
+    user_df, master_df, officials_df = sources
+    directory.mkdir()
+    return run_analysis(
+        user_df.copy(), master_df.copy(), officials_df.copy(), {}, str(directory / "users.xlsx"), "Oriental Mindoro",
+        lambda message: None, lambda *args, **kwargs: None, datetime.now(), lambda *args: None, queue.Queue(),
+        execution_backend="inline", **options
+    )
+
+def _edges(engine):
+    return {pair_type: np.sort(edges, order=["i", "j"]) for pair_type, edges in engine._edges_by_pair_type().items()}
+
+def test_out_of_core_edges_equal_inline(sources, tmp_path, monkeypatch):
+    # Out-of-core matching scores every candidate pair; turn off the inline shortcuts so both paths do the same work
+    monkeypatch.setitem(config.MATCHING_OPTIMIZATIONS, "skip_connected_pairs", False)
+    monkeypatch.setitem(config.MATCHING_OPTIMIZATIONS, "officials_first_short_circuit", False)
+    monkeypatch.setitem(config.OUT_OF_CORE_CONFIG, "directory", str(tmp_path / "scratch"))
+    inline = _edges(_analyze(sources, tmp_path / "inline", out_of_core=False))
+    on_disk = _edges(_analyze(sources, tmp_path / "on_disk", out_of_core=True))
+
+    assert set(on_disk) == set(inline) and inline
+    for pair_type, edges in inline.items():
+        assert len(edges), pair_type
+        assert np.array_equal(on_disk[pair_type], edges), pair_type
+    # The scratch database is removed once matching ends
+    assert not list((tmp_path / "scratch").iterdir())
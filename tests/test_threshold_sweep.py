@@ -0,0 +1,48 @@
+# Re-tiering a finished run's stored scores gives the section counts of a real run at those thresholds.
+
+import copy
+import queue
+from datetime import datetime
+
+import config
+from analysis_engine import ROW_SOURCE_COL, ROW_SOURCE_IDS, run_analysis
+from data_utils import get_encryption_key
+from run_state import MatchArtifactStore
+from threshold_sweep import ThresholdSweep
+
+def _analyze(sources, directory, artifacts=None):
+    user_df, master_df, officials_df = sources
+    directory.mkdir()
+    return run_analysis(
+        user_df.copy(), master_df.copy(), officials_df.copy(), {}, str(directory / "users.xlsx"), "Oriental Mindoro",
+        lambda message: None, lambda *args, **kwargs: None, datetime.now(), lambda *args: None, queue.Queue(),
+        execution_backend="inline", artifacts=artifacts
+    )
+
+def _section_counts(reports):
+    """The sweep's "sections" layout, from a run's reports."""
+    counts = {}
+    for section, report in reports.items():
+        if report.empty:
+            counts[section] = {"groups": 0, "user_rows": 0}
+        else:
+            counts[section] = {"groups": int(report["group_id"].nunique()),
+                               "user_rows": int((report[ROW_SOURCE_COL] == ROW_SOURCE_IDS["user"]).sum())}
+    return counts
+
+def test_sweep_matches_rerun_at_stricter_standard_threshold(sources, tmp_path, monkeypatch):
+    # Pairs skipped as already grouped are not stored, and a stricter setting may need them (see caveats())
+    monkeypatch.setitem(config.MATCHING_OPTIMIZATIONS, "skip_connected_pairs", False)
+    monkeypatch.setitem(config.MATCHING_OPTIMIZATIONS, "officials_first_short_circuit", False)
+    artifacts = MatchArtifactStore(tmp_path / "artifacts", get_encryption_key("doleadmin"))
+    run = _analyze(sources, tmp_path / "run", artifacts)
+    sweep = ThresholdSweep(artifacts.load(run.lineage))
+    matching = copy.deepcopy(config.ADAPTIVE_MATCHING_CONFIG)
+    matching["baseline_thresholds"]["standard_threshold"] = 160
+    swept = sweep.evaluate(matching)["sections"]
+
+    monkeypatch.setitem(config.ADAPTIVE_MATCHING_CONFIG["baseline_thresholds"], "standard_threshold", 160)
+    rerun = _analyze(sources, tmp_path / "rerun")
+
+    assert swept == _section_counts(rerun.reports)
+    assert swept != _section_counts(run.reports)
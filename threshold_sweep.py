@@ -0,0 +1,183 @@
+# threshold_sweep.py
+# Re-tiers a finished run for other thresholds from its match artifact, without matching again.
+#
+#   python threshold_sweep.py <userfile> --province "Oriental Mindoro" --standard 100 105 110 115 --strict 190 198
+#   python threshold_sweep.py <userfile> --standard-adjustment -25 -20 -15 --json sweep.json
+#
+# Every combination of the given values is evaluated, starting from the thresholds the run used. Scores do not
+# depend on the thresholds, so a pair's tier only needs its stored score and whether it is name-only. Pairs that
+# missed every threshold are in the artifact down to THRESHOLD_SWEEP_CONFIG["min_stored_score"]. MasterDB
+# duplicate clusters stored with the run pull in the rest of a matched MasterDB record's cluster, as in the report.
+
+import argparse
+import copy
+import itertools
+import json
+import sys
+import time
+
+import numpy as np
+
+import config
+from analysis_engine import (
+    PASS_PIPELINE, CONFIGURABLE_TIERS, MATCH_STATUS_CODES, ROW_SOURCE_IDS, REPORT_SECTION_CODES,
+    tier_thresholds, _UnionFind, _split_overmerged
+)
+from app_data import AppData
+from data_utils import get_encryption_key
+from run_state import MatchArtifactStore, lineage_id
+
+SOURCE_NAMES = {code: name for name, code in ROW_SOURCE_IDS.items()}
+# Option name -> (ADAPTIVE_MATCHING_CONFIG section, key)
+SWEEP_OPTIONS = {
+    "strict": ("baseline_thresholds", "strict_threshold"),
+    "standard": ("baseline_thresholds", "standard_threshold"),
+    "lenient": ("baseline_thresholds", "lenient_threshold"),
+    "strict_adjustment": ("threshold_adjustments", "strict_adjustment"),
+    "standard_adjustment": ("threshold_adjustments", "standard_adjustment"),
+    "lenient_adjustment": ("threshold_adjustments", "lenient_adjustment")
+}
+
+def load_artifact(user_filepath, province_name, encryption_key=None):
+    """The match artifact of the latest run of this file's lineage, or None."""
+    store = MatchArtifactStore(AppData(province_name).data_dir / config.MATCH_ARTIFACT_CONFIG["dir_name"],
+                               encryption_key or get_encryption_key("doleadmin"))
+    return store.load(lineage_id(user_filepath, province_name))
+
+def sweep_settings(base_matching, grid):
+    """One ADAPTIVE_MATCHING_CONFIG-shaped dict per combination of grid values ({option: [values]})."""
+    options = [option for option in SWEEP_OPTIONS if grid.get(option)]
+    settings = []
+    for values in itertools.product(*(grid[option] for option in options)):
+        matching = copy.deepcopy(base_matching)
+        for option, value in zip(options, values):
+            section, key = SWEEP_OPTIONS[option]
+            matching[section][key] = value
+        settings.append((dict(zip(options, values)), matching))
+    return settings
+
+class ThresholdSweep:
+    """Stored pair scores of one run, re-tiered and re-grouped for any thresholds."""
+
+    def __init__(self, artifact):
+        edges = artifact["edges"]
+        self.meta = artifact["meta"]
+        self.scores = edges["score"].astype(np.float64)
+        self.name_only = edges["name_only"]
+        self.stored_status = edges["status"]
+        self.pair_types = np.array([f"{SOURCE_NAMES[a]}_{SOURCE_NAMES[b]}" for a, b in zip(edges["source1"].tolist(), edges["source2"].tolist())])
+        clusters = artifact["clusters"]
+        # Records as compact node ids
+        keys = np.concatenate([(edges["source1"].astype(np.int64) << 40) | edges["index1"], (edges["source2"].astype(np.int64) << 40) | edges["index2"],
+                               (np.int64(ROW_SOURCE_IDS["master"]) << 40) | clusters["index"]])
+        node_keys, ids = np.unique(keys, return_inverse=True)
+        self.ids1, self.ids2, self.cluster_ids = ids[:len(edges)], ids[len(edges):2 * len(edges)], ids[2 * len(edges):]
+        self.node_sources = (node_keys >> 40).astype(np.int8)
+        # Each cluster member is joined to the first member of its cluster, as by AnalysisEngine._master_cluster_edges
+        self.cluster_of = clusters["cluster"]
+        _, first, inverse = np.unique(self.cluster_of, return_index=True, return_inverse=True)
+        self.cluster_anchors = self.cluster_ids[first][inverse]
+
+    def evaluate(self, matching):
+        """Pair and group counts for one ADAPTIVE_MATCHING_CONFIG-shaped dict."""
+        exact = np.zeros(len(self.scores), dtype=bool)
+        matched = np.zeros(len(self.scores), dtype=bool)
+        for pair_type in np.unique(self.pair_types).tolist():
+            rows = self.pair_types == pair_type
+            tiers = [CONFIGURABLE_TIERS[func][0] for func in PASS_PIPELINE.get(pair_type, [])]
+            if not tiers:
+                continue
+            scores, name_only = self.scores[rows], self.name_only[rows]
+            # Passes run strictest first and every pass sees the same score
+            passed = [scores > tier_thresholds(tier, name_only, matching) for tier in tiers]
+            exact[rows] = passed[0]
+            matched[rows] = np.logical_or.reduce(passed)
+        # Edges of non-configurable matchers have no score; they keep their stored result
+        unscored = np.isnan(self.scores)
+        matched[unscored] = self.stored_status[unscored] != MATCH_STATUS_CODES["No Match"]
+        exact[unscored] = self.stored_status[unscored] == MATCH_STATUS_CODES["Exact Match"]
+
+        pairs = {}
+        for pair_type in np.unique(self.pair_types[matched]).tolist():
+            rows = matched & (self.pair_types == pair_type)
+            pairs[pair_type] = {"exact": int((rows & exact).sum()), "fuzzy": int((rows & ~exact).sum())}
+
+        ids1, ids2, fuzzy, scores = self.ids1[matched], self.ids2[matched], ~exact[matched], self.scores[matched]
+        if config.CLUSTER_SPLIT_CONFIG["enabled"]:
+            settings = config.CLUSTER_SPLIT_CONFIG
+            keep, _ = _split_overmerged(ids1, ids2, fuzzy, scores, settings["min_group_size"], settings["min_part_size"], settings["max_cost"])
+            ids1, ids2 = ids1[keep], ids2[keep]
+        if len(self.cluster_ids):
+            # Clusters of the MasterDB records matched under these thresholds
+            hit = np.isin(self.cluster_of, self.cluster_of[np.isin(self.cluster_ids, np.concatenate([ids1, ids2]))])
+            joined = hit & (self.cluster_ids != self.cluster_anchors)
+            ids1, ids2 = np.concatenate([ids1, self.cluster_anchors[joined]]), np.concatenate([ids2, self.cluster_ids[joined]])
+        graph = _UnionFind(len(self.node_sources))
+        graph.union_all(ids1.tolist(), ids2.tolist(), [False] * len(ids1))
+        nodes = np.unique(np.concatenate([ids1, ids2]))
+        _, group_of = np.unique(graph.roots(nodes), return_inverse=True)
+        sources = self.node_sources[nodes]
+        counts = {source: np.bincount(group_of, weights=sources == code, minlength=group_of.max() + 1 if len(group_of) else 0)
+                  for source, code in ROW_SOURCE_IDS.items()}
+        # A group goes to the first section it qualifies for, as in the report
+        in_section = {
+            "officials": (counts["user"] > 0) & (counts["official"] > 0),
+            "linking": (counts["user"] > 0) & (counts["official"] == 0) & (counts["master"] > 0),
+            "dedupe": (counts["user"] > 1) & (counts["official"] == 0) & (counts["master"] == 0)
+        }
+        groups = {section: {"groups": int(mask.sum()), "user_rows": int(counts["user"][mask].sum())} for section, mask in in_section.items()}
+        return {"pairs": pairs, "sections": groups}
+
+def caveats(meta, settings):
+    """Notes on settings the stored scores cannot answer exactly."""
+    notes = []
+    floor = meta.get("near_miss_floor")
+    lowest = min(float(tier_thresholds(tier, np.array([False, True]), matching).min()) for _, matching in settings for tier in ("strict", "standard", "lenient"))
+    if floor is None:
+        notes.append("The run kept no near misses: settings looser than the run's own thresholds find no new pairs.")
+    elif lowest < floor:
+        notes.append(f"Pairs scoring below {floor:g} were not stored; settings with thresholds under {floor:g} undercount.")
+    if meta.get("skip_connected_pairs") or meta.get("officials_first"):
+        notes.append("The run skipped pairs already grouped (MATCHING_OPTIMIZATIONS): pair counts include skipped pairs that clear "
+                     "the thresholds, and settings stricter than the run's own may undercount groups.")
+    if not meta.get("complete", True):
+        notes.append("The run was time-budgeted and did not compare every pair.")
+    return notes
+
+def _print_table(results):
+    sections = list(REPORT_SECTION_CODES)
+    header = ["setting"] + [f"{section} groups/rows" for section in sections] + ["pairs exact/fuzzy"]
+    print(" | ".join(header))
+    for setting, result in results:
+        label = ", ".join(f"{option}={value:g}" for option, value in setting.items()) or "as run"
+        cells = [f"{result['sections'][s]['groups']}/{result['sections'][s]['user_rows']}" for s in sections]
+        exact = sum(p["exact"] for p in result["pairs"].values())
+        fuzzy = sum(p["fuzzy"] for p in result["pairs"].values())
+        print(" | ".join([label] + cells + [f"{exact}/{fuzzy}"]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-tier a finished run for a grid of thresholds, from its stored scores.")
+    parser.add_argument("user_file", help="The user file the run analyzed (identifies the stored run).")
+    parser.add_argument("--province", default="Oriental Mindoro", choices=list(config.PROVINCE_PROFILES))
+    for option in SWEEP_OPTIONS:
+        parser.add_argument(f"--{option.replace('_', '-')}", dest=option, type=float, nargs="+", default=None,
+                            help=f"Values for ADAPTIVE_MATCHING_CONFIG[\"{SWEEP_OPTIONS[option][0]}\"][\"{SWEEP_OPTIONS[option][1]}\"].")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    artifact = load_artifact(args.user_file, args.province)
+    if artifact is None:
+        print(f"No stored run for {args.user_file} ({args.province}). Analyze the file once first.", file=sys.stderr)
+        sys.exit(3)
+    started = time.perf_counter()
+    sweep = ThresholdSweep(artifact)
+    settings = [({}, artifact["meta"]["matching"])] + sweep_settings(artifact["meta"]["matching"], vars(args))
+    results = [(setting, sweep.evaluate(matching)) for setting, matching in settings]
+    print(f"Run of {artifact['meta']['started']}: {len(sweep.scores):,} stored pairs, {len(settings)} settings in {time.perf_counter() - started:.2f}s")
+    _print_table(results)
+    for note in caveats(artifact["meta"], settings):
+        print(f"Note: {note}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([{"setting": setting, **result} for setting, result in results], f, indent=2)
+    sys.exit(0)